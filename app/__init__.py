@@ -21,4 +21,10 @@ def create_app(config_name='default'):
     with app.app_context():
         db.create_all()
     
+    # 后台任务队列，解析与校验在线程池中执行，请求立即返回任务id
+    from app.services.jobQueue import JobQueue
+    from app.services.checkCtl import JOB_HANDLERS
+    app.extensions['job_queue'] = JobQueue(app, JOB_HANDLERS, max_workers=app.config['JOB_WORKERS'],
+                                           max_pending=app.config['JOB_MAX_PENDING'])
+    
     return app
\ No newline at end of file
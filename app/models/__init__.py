@@ -1,5 +1,6 @@
 from .user import User, Post, db
+from .job import Job
 
 
 # 方便导入
-__all__ = ['User', 'Post', 'db']
\ No newline at end of file
+__all__ = ['User', 'Post', 'Job', 'db']
\ No newline at end of file
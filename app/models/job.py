@@ -0,0 +1,41 @@
+import json
+from datetime import datetime
+from .user import db
+
+class Job(db.Model):
+    """后台任务（sql解析、校验），状态保存在 app.db 中，服务重启后仍可查询"""
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    # queued / running / succeeded / failed
+    status = db.Column(db.String(16), nullable=False, default='queued', index=True)
+    params = db.Column(db.Text, nullable=False, default='{}')
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(255))
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # 执行任务的进程（主机名:pid）与最近一次心跳，进程退出或租约过期的未完成任务在恢复时标记为失败
+    owner = db.Column(db.String(128), index=True)
+    heartbeat_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'params': json.loads(self.params or '{}'),
+            'progress': self.progress,
+            'message': self.message,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'owner': self.owner,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.kind} {self.id} {self.status}>'
@@ -1,8 +1,13 @@
-from flask import Blueprint, jsonify
+import json
+import os
+from flask import Blueprint, Response, current_app, jsonify, request
 from app.models import db, User, Post
 from datetime import datetime
 from app.services.checkCtl import envCheck as check
-from app.services.checkCtl import sqlCheck, sqlprase
+from app.services.checkCtl import FLEET_ENGINES, MIGRATION_DIR, SNAPSHOT_DIR, captureSnapshot, sqlCheck, sqlCheckFleet, sqlMigrate, sqlprase
+from app.services.checkCtl import _resolve_output_file
+from app.services.reportWriters import REPORT_WRITERS
+from app.services.jobQueue import QueueFullError
 
 # 创建蓝图
 main_bp = Blueprint('main', __name__)
@@ -32,10 +37,104 @@ def env_check_route():
     check()
     return jsonify({'message': 'success'})
 
+def _is_async():
+    """async=1 时提交后台任务并立即返回任务id，默认在请求线程中直接执行并返回结果"""
+    return request.args.get('async', '0') == '1'
+
+def _submit_job(kind, params):
+    """提交后台任务，返回 202 与任务状态地址；排队已满时返回 503"""
+    try:
+        job_id = current_app.extensions['job_queue'].submit(kind, params)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({'message': 'accepted', 'job_id': job_id, 'status_url': f'/jobs/{job_id}',
+                    'events_url': f'/jobs/{job_id}/events'}), 202
+
 @main_bp.route('/sqlprase')
 def sqlprase_to_file():
-    sqlprase()
-    return jsonify({'message': 'success'})
+    if _is_async():
+        return _submit_job('sqlprase', {})
+    report = sqlprase()
+    return jsonify({'message': 'success', **report})
+
+@main_bp.route('/sqlmigrate')
+def sqlmigrate_to_file():
+    """重放迁移目录下的sql文件得到最终结构；name 为输出文件名（不含扩展名），refresh=1 时不使用检查点"""
+    name = request.args.get('name', 'migrations')
+    if not name or '/' in name or '\\' in name or '..' in name:
+        return jsonify({'error': 'Invalid output name'}), 400
+    if not os.path.isdir(MIGRATION_DIR):
+        return jsonify({'error': f'Migration folder {MIGRATION_DIR} not found'}), 404
+    params = {'name': name, 'use_checkpoints': request.args.get('refresh', '0') != '1'}
+    database = request.args.get('database')
+    if database:
+        params['default_database'] = database
+    if _is_async():
+        return _submit_job('sqlmigrate', params)
+    report = sqlMigrate(**params)
+    return jsonify({'message': 'success', **report})
+
+@main_bp.route('/jobs/<string:job_id>', methods=['GET'], endpoint='job_status')
+def job_status(job_id):
+    job = current_app.extensions['job_queue'].get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job)
+
+@main_bp.route('/jobs/<string:job_id>/events', methods=['GET'], endpoint='job_events')
+def job_events(job_id):
+    """
+    实时推送任务的进度事件：默认 Server-Sent Events，format=jsonl 时为逐行 JSON（分块传输）
+    断线重连时通过 Last-Event-ID 请求头或 after 参数从指定序号之后继续，任务结束后关闭连接
+    """
+    queue = current_app.extensions['job_queue']
+    job = queue.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    jsonl = request.args.get('format') == 'jsonl'
+    after = request.headers.get('Last-Event-ID', type=int) or request.args.get('after', 0, type=int)
+
+    def format_event(event_id, event):
+        if jsonl:
+            return json.dumps({'id': event_id, **event}, ensure_ascii=False, default=str) + '\n'
+        name = 'finished' if event.get('stage') == 'finished' else 'progress'
+        return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+    def generate():
+        last = after
+        while True:
+            batch = queue.events(job_id, last)
+            if batch is None:
+                # 事件不在内存中（如服务重启前的任务），只返回当前状态
+                current = queue.get(job_id)
+                yield format_event(last + 1, {'stage': 'finished', 'status': current['status'],
+                                              'error': current['error']})
+                return
+            events, finished = batch
+            for event_id, event in events:
+                last = event_id
+                yield format_event(event_id, event)
+            if finished:
+                return
+            if not events:
+                # 保持连接，避免被代理断开
+                yield '\n' if jsonl else ': keepalive\n\n'
+
+    mimetype = 'application/x-ndjson' if jsonl else 'text/event-stream'
+    return Response(generate(), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _scope_options():
+    """校验范围：include=hr.emp*,sales 与 exclude=*.tmp_* 为逗号分隔的 '库.表' 通配模式"""
+    return {key: [pattern for pattern in request.args.get(key, '').split(',') if pattern] or None
+            for key in ('include', 'exclude')}
+
+def _report_options():
+    """报告参数：formats=md,jsonl,junit（默认md），summary=1 只输出汇总与不一致的对象；格式不支持时返回 None"""
+    formats = [fmt for fmt in request.args.get('formats', 'md').split(',') if fmt]
+    if not formats or any(fmt not in REPORT_WRITERS for fmt in formats):
+        return None
+    return {'formats': formats, 'summary_only': request.args.get('summary', '0') == '1'}
 
 @main_bp.route('/sqlcheck/<string:fileName>', methods=['GET'], endpoint='sqlcheck')
 def sql_test(fileName):
@@ -50,12 +149,33 @@ def sql_test(fileName):
         if '/' in fileName or '\\' in fileName or '..' in fileName:
             return jsonify({'error': 'Invalid file name'}), 400
         
-        # 调用SQL检查函数
-        sqlCheck(fileName)
+        # 调用SQL检查函数，refresh=1 时忽略实际结构快照重新读取；snapshot=<名称> 时与快照文件离线比较
+        snapshot = request.args.get('snapshot')
+        if snapshot and ('/' in snapshot or '\\' in snapshot or '..' in snapshot):
+            return jsonify({'error': 'Invalid snapshot name'}), 400
+        report_options = _report_options()
+        if report_options is None:
+            return jsonify({'error': f'Unsupported report format, allowed: {list(REPORT_WRITERS)}'}), 400
+        params = {'file_name': fileName, 'refresh': request.args.get('refresh', '0') == '1',
+                  'snapshot': snapshot, **report_options, **_scope_options()}
+        # 文件不存在时立即返回404，不提交后台任务
+        _resolve_output_file(fileName)
+        if snapshot:
+            try:
+                _resolve_output_file(snapshot, SNAPSHOT_DIR)
+            except FileNotFoundError:
+                return jsonify({'error': f'Snapshot {snapshot} not found in snapshot folder'}), 404
+        if _is_async():
+            return _submit_job('sqlcheck', params)
+        result = sqlCheck(**params)
         
         return jsonify({
             'message': 'success, please see the output folder',
-            'file_processed': fileName
+            'file_processed': fileName,
+            'run_id': result['run_id'],
+            'passed': result['passed'],
+            'outputs': result['outputs'],
+            'cache': result['cache']
         })
         
     except FileNotFoundError:
@@ -65,6 +185,66 @@ def sql_test(fileName):
         return jsonify({'error': 'File processing failed'}), 500
     
 
+@main_bp.route('/sqlcheck/fleet/<string:fileName>', methods=['GET'], endpoint='sqlcheck_fleet')
+def sql_fleet_test(fileName):
+    try:
+        # 安全检查：验证文件名
+        if not fileName.endswith('.json') or fileName.endswith('.yaml'):
+            return jsonify({'error': 'Only JSON/YAML files are allowed'}), 400
+        
+        # 防止路径遍历攻击
+        if '/' in fileName or '\\' in fileName or '..' in fileName:
+            return jsonify({'error': 'Invalid file name'}), 400
+        
+        # aliases=a,b,c 选择部分实例，不传时校验全部别名
+        aliases = [alias for alias in request.args.get('aliases', '').split(',') if alias]
+        concurrency = request.args.get('concurrency', 16, type=int)
+        timeout = request.args.get('timeout', 30, type=int)
+        # 单个实例从开始到完成的总时限（秒），超过时在汇总中记为超时
+        deadline = request.args.get('deadline', 600, type=int)
+        
+        refresh = request.args.get('refresh', '0') == '1'
+        # engine=async 时每个实例的库、表查询在多个连接上并发执行
+        engine = request.args.get('engine', 'thread')
+        if engine not in FLEET_ENGINES:
+            return jsonify({'error': f'Unsupported engine, allowed: {list(FLEET_ENGINES)}'}), 400
+        report_options = _report_options()
+        if report_options is None:
+            return jsonify({'error': f'Unsupported report format, allowed: {list(REPORT_WRITERS)}'}), 400
+        
+        params = {'file_name': fileName, 'aliases': aliases or None, 'max_workers': concurrency,
+                  'timeout': timeout, 'host_deadline': deadline, 'refresh': refresh, 'engine': engine, **report_options, **_scope_options()}
+        # 文件不存在时立即返回404，不提交后台任务
+        _resolve_output_file(fileName)
+        if _is_async():
+            return _submit_job('sqlcheck_fleet', params)
+        result = sqlCheckFleet(**params)
+        
+        return jsonify({'message': 'success', 'file_processed': fileName, **result})
+        
+    except FileNotFoundError:
+        return jsonify({'error': f'File {fileName} not found in output folder'}), 404
+    except Exception as e:
+        print(f"Error processing file {fileName}: {str(e)}")
+        return jsonify({'error': 'File processing failed'}), 500
+    
+
+@main_bp.route('/snapshot/capture', methods=['GET'], endpoint='snapshot_capture')
+def snapshot_capture():
+    alias = request.args.get('alias', 'default')
+    name = request.args.get('name')
+    if name and ('/' in name or '\\' in name or '..' in name):
+        return jsonify({'error': 'Invalid snapshot name'}), 400
+    try:
+        result = captureSnapshot(alias, name)
+        return jsonify({'message': 'success', **result})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error capturing snapshot for {alias}: {str(e)}")
+        return jsonify({'error': 'Snapshot capture failed'}), 500
+    
+
 @main_bp.route('/health')
 def health_check():
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
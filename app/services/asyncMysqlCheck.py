@@ -0,0 +1,282 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import pymysql
+from app.services.mysqlCheck import DatabaseValidator, SUMMARY_KEYS
+from app.services.schemaDiff import diff_schemas
+from app.services.tableDefinitions import definition_queries, fold_live_definitions
+from app.services.schemaFilter import SchemaFilter
+from app.services.schemaModel import compact_schema
+from app.services.reportWriters import report_paths
+from app.services.progressEvents import ProgressTracker
+
+try:
+    import aiomysql
+except ImportError:  # 可选依赖，未安装时在线程中执行 pymysql 查询
+    aiomysql = None
+
+# 默认最多同时使用的连接数
+DEFAULT_MAX_CONNECTIONS = 8
+
+
+class _AiomysqlConnection:
+    """基于 aiomysql 的异步连接"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @classmethod
+    async def connect(cls, params: Dict) -> '_AiomysqlConnection':
+        connection = await aiomysql.connect(
+            host=params['host'],
+            user=params['user'],
+            password=params['password'],
+            port=params['port'],
+            charset=params['charset'],
+            connect_timeout=params['connect_timeout'],
+            cursorclass=aiomysql.DictCursor,
+            autocommit=True
+        )
+        return cls(connection)
+
+    async def fetchall(self, sql: str, args: Optional[List] = None) -> List[Dict]:
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(sql, args)
+            return await cursor.fetchall()
+
+    async def close(self):
+        self.connection.close()
+
+
+class _ThreadConnection:
+    """未安装 aiomysql 时的回退：阻塞的 pymysql 调用放到线程中执行，不阻塞事件循环"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @classmethod
+    async def connect(cls, params: Dict) -> '_ThreadConnection':
+        connection = await asyncio.to_thread(
+            pymysql.connect,
+            host=params['host'],
+            user=params['user'],
+            password=params['password'],
+            port=params['port'],
+            charset=params['charset'],
+            connect_timeout=params['connect_timeout'],
+            read_timeout=params['timeout'],
+            write_timeout=params['timeout'],
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=True
+        )
+        return cls(connection)
+
+    async def fetchall(self, sql: str, args: Optional[List] = None) -> List[Dict]:
+        return await asyncio.to_thread(self._fetchall, sql, args)
+
+    def _fetchall(self, sql: str, args: Optional[List]) -> List[Dict]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, args)
+            return cursor.fetchall()
+
+    async def close(self):
+        await asyncio.to_thread(self.connection.close)
+
+
+def default_connector() -> Callable[[Dict], Awaitable[Any]]:
+    """已安装 aiomysql 时使用原生异步驱动，否则使用线程回退"""
+    return _AiomysqlConnection.connect if aiomysql is not None else _ThreadConnection.connect
+
+
+class AsyncDatabaseValidator(DatabaseValidator):
+    """
+    DatabaseValidator 的 asyncio 版本
+
+    - 库、表的元数据查询都是协程，分摊到最多 max_connections 个连接上并发执行，
+      单线程即可同时进行成千上万个表的校验
+    - 每次查询受 timeout 限制，超时的连接被丢弃，不会拖住整个校验
+    - 读取完成后用 diff_schemas 在本地比较，生成与 DatabaseValidator 相同格式的MD报告与汇总
+    - connect 可传入自定义的连接工厂（async callable，接收连接参数，返回具有
+      fetchall(sql, args) 与 close() 协程的对象），用于对接本地的 MySQL 协议替身进行测试
+    """
+
+    def __init__(self, *args, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 connect: Optional[Callable[[Dict], Awaitable[Any]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.snapshot is not None:
+            raise ValueError("离线快照校验请使用 DatabaseValidator(snapshot_file=...)")
+        self.max_connections = max_connections
+        self._connect = connect or default_connector()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._idle: List[Any] = []
+
+    async def validate_schema(self, schema_dict: Dict, output_file: str = "database_validation.md",
+                              bulk: bool = True, formats: Optional[List[str]] = None,
+                              summary_only: bool = False, include: Optional[List[str]] = None,
+                              exclude: Optional[List[str]] = None, definitions: Optional[Dict] = None) -> Dict:
+        """
+        校验数据库结构并生成报告
+
+        Args:
+            schema_dict: 预期的数据库结构，字典或 SchemaModel，见 DatabaseValidator.validate_schema
+            output_file: 输出的报告文件名
+            bulk: 为 True 时每个库只查询一次 information_schema.COLUMNS（各库并发）；
+                  为 False 时每个表单独查询（所有表并发）
+            formats、summary_only: 报告格式与是否只输出不一致的对象，见 DatabaseValidator.validate_schema
+            include、exclude: '库.表' 通配模式限定校验范围，见 DatabaseValidator.validate_schema
+            definitions: 预期的表定义，不为空时每个库并发读取表定义一并比较，见 DatabaseValidator.validate_schema
+
+        Returns:
+            Dict: 与 DatabaseValidator.validate_schema 相同格式的校验汇总
+        """
+        self.summary = dict.fromkeys(SUMMARY_KEYS, 0)
+        self.diff = None
+        outputs = report_paths(output_file, formats)
+        scope = SchemaFilter(include, exclude)
+        schema_dict = scope.apply(compact_schema(schema_dict))
+        self.tracker = ProgressTracker(self.progress, self.host, self.port, len(schema_dict),
+                                       sum(len(tables) for tables in schema_dict.values()))
+        self.tracker.stage('connect')
+        self._semaphore = asyncio.Semaphore(self.max_connections)
+        self._idle = []
+
+        live_schema: Dict[str, Dict] = {}
+        live_definitions: Optional[Dict] = None
+        errors: Dict[tuple, str] = {}
+        try:
+            # 先建立一个连接，无法连接时与同步版本一样直接返回
+            try:
+                self._idle.append(await self._wait(self._connect(self._params())))
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                logging.error(f"数据库连接失败: {self.last_error}")
+                return self._result(None, f"无法连接数据库: {self.last_error}")
+
+            self.tracker.stage('fetch')
+            await asyncio.gather(*(
+                self._fetch_database(db_name, tables, bulk, live_schema, errors,
+                                     scoped=scope.active and not scope.covers_database(db_name))
+                for db_name, tables in schema_dict.items()
+            ))
+            if definitions:
+                live_definitions = {}
+                checked = self._definition_tables(schema_dict, definitions, live_schema, errors)
+                await asyncio.gather(*(
+                    self._fetch_definitions(db_name, names, live_definitions, errors)
+                    for db_name, names in checked.items()
+                ))
+        finally:
+            await self._close_connections()
+
+        self.tracker.stage('compare')
+        diff = diff_schemas(schema_dict, compact_schema(live_schema), errors, progress=self.tracker.advance,
+                            definitions=definitions, live_definitions=live_definitions)
+        return self._report(outputs, diff, summary_only)
+
+    async def _fetch_database(self, db_name: str, tables: Dict, bulk: bool, live_schema: Dict, errors: Dict,
+                              scoped: bool = False):
+        """
+        读取单个库的实际结构，结果写入 live_schema（库不存在时不写入），出错的库/表记录到 errors
+        scoped 为 True 时批量查询只读取 tables 中的表
+        """
+        try:
+            rows = await self._query(
+                "SELECT SCHEMA_NAME FROM information_schema.SCHEMATA WHERE SCHEMA_NAME = %s", [db_name]
+            )
+            if not rows:
+                return
+
+            if bulk:
+                condition, args = "TABLE_SCHEMA = %s", [db_name]
+                if scoped:
+                    condition += f" AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})"
+                    args.extend(tables)
+                rows = await self._query(
+                    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS "
+                    f"WHERE {condition} ORDER BY TABLE_NAME, ORDINAL_POSITION",
+                    args
+                )
+                live_tables = {}
+                for row in rows:
+                    live_tables.setdefault(row['TABLE_NAME'], {})[row['COLUMN_NAME']] = row['COLUMN_TYPE']
+                self.tracker.advance(tables=len(live_tables))
+            else:
+                results = await asyncio.gather(*(
+                    self._fetch_table(db_name, table_name, errors) for table_name in tables
+                ))
+                live_tables = {name: columns for name, columns in zip(tables, results) if columns}
+            live_schema[db_name] = live_tables
+        except Exception as e:
+            logging.error(f"校验数据库 {db_name} 时出错: {e}")
+            errors[(db_name,)] = str(e)
+        finally:
+            self.tracker.advance(databases=1)
+
+    async def _fetch_definitions(self, db_name: str, table_names: List[str], live_definitions: Dict,
+                                 errors: Dict):
+        """读取单个库中这些表的定义（各 information_schema 查询并发），出错时这些表记录到 errors"""
+        try:
+            queries = definition_queries([db_name], {db_name: table_names})
+            results = await asyncio.gather(*(self._query(sql, args) for sql, args in queries.values()))
+            fold_live_definitions(dict(zip(queries, results)), live_definitions)
+        except Exception as e:
+            logging.error(f"读取库 {db_name} 的表定义时出错: {e}")
+            errors.update({(db_name, name): f"读取表定义时出错: {e}" for name in table_names})
+
+    async def _fetch_table(self, db_name: str, table_name: str, errors: Dict) -> Optional[Dict]:
+        """读取单个表的字段，表不存在返回空字典，出错时记录到 errors 并返回 None"""
+        try:
+            rows = await self._query(
+                "SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+                [db_name, table_name]
+            )
+            return {row['COLUMN_NAME']: row['COLUMN_TYPE'] for row in rows}
+        except Exception as e:
+            logging.error(f"校验表 {db_name}.{table_name} 时出错: {e}")
+            errors[(db_name, table_name)] = str(e)
+            return None
+        finally:
+            self.tracker.advance(tables=1)
+
+    async def _query(self, sql: str, args: List) -> List[Dict]:
+        """在空闲连接上执行查询，连接不足时新建，总数不超过 max_connections"""
+        async with self._semaphore:
+            connection = self._idle.pop() if self._idle else await self._wait(self._connect(self._params()))
+            try:
+                rows = await self._wait(connection.fetchall(sql, args))
+            except BaseException:
+                # 超时或出错的连接状态未知，直接丢弃
+                await self._close(connection)
+                raise
+            self._idle.append(connection)
+            return rows
+
+    async def _wait(self, awaitable):
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{self.host}:{self.port} 超过 {self.timeout} 秒未响应") from None
+
+    async def _close_connections(self):
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._close(connection) for connection in idle))
+
+    @staticmethod
+    async def _close(connection):
+        try:
+            await connection.close()
+        except Exception:
+            pass
+
+    def _params(self) -> Dict:
+        return {
+            'host': self.host,
+            'user': self.username,
+            'password': self.password,
+            'port': self.port,
+            'charset': 'utf8mb4',
+            'connect_timeout': self.timeout or 10,
+            'timeout': self.timeout
+        }
+
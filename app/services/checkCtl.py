@@ -1,10 +1,38 @@
 import os
+import uuid
+import hashlib
 from app.services.dopEnvcheck import dopEnvcheck
-from app.services.mysqlParser import MySQLSchemaParser
-from app.services.mysqlCheck import DatabaseValidator
-from typing import Dict, Any
+from app.services.mysqlParser import parse_mysql_schemas
+from app.services.mysqlCheck import DEFAULT_HOST_DEADLINE, DatabaseValidator, validate_fleet
+from app.services.asyncMysqlCheck import AsyncDatabaseValidator
+from typing import Dict, Any, List, Optional
 from app.services.sqldictTofile import DictFileConverter
+from app.services.parseCache import ParseCache
+from app.services.snapshotCache import live_snapshots
+from app.services.resultCache import check_results
+from app.services.schemaFilter import SchemaFilter
+from app.services.schemaEvolution import SchemaEvolution, list_migration_files
+from app.services.schemaModel import load_schema_model
 from pathlib import Path
+from datetime import datetime
+
+# 实际结构快照的保存目录
+SNAPSHOT_DIR = 'app/output/snapshots'
+
+# 校验报告目录，每次校验使用独立的子目录，并发请求不会互相覆盖
+REPORT_DIR = 'app/output/reports'
+
+# 表定义（索引、主键、外键、可空、默认值等）目录，与结构文件同名，见 tableDefinitions
+DEFINITION_DIR = 'app/output/definitions'
+
+# 迁移文件目录，按文件名的自然顺序重放，见 schemaEvolution
+MIGRATION_DIR = 'app/sql/migrations'
+
+# 多实例校验的执行方式：thread 每个实例一个线程顺序查询；async 每个实例在多个连接上并发查询库、表
+FLEET_ENGINES = {
+    'thread': DatabaseValidator,
+    'async': AsyncDatabaseValidator,
+}
 
 def envCheck():
     checker = dopEnvcheck()
@@ -72,57 +100,265 @@ def validate_database_direct(schema_dict: Dict, host: str, username: str, passwo
     validator = DatabaseValidator(host=host, username=username, password=password, port=port)
     validator.validate_schema(schema_dict, output_file)
 
+def _list_sql_files(sql_dir: str) -> list:
+    """按文件名排序列出目录下的sql文件，保证合并顺序稳定"""
+    return [os.path.join(sql_dir, f) for f in sorted(os.listdir(sql_dir)) if f.endswith('.sql')]
+
 def sqlCheckDemo():
     '''
-    这里是完整sql处理,将sql放到sql目录,循环文件夹下的sql文件,通过sqlChecker中的parse_sql_file方法解析为字典,然后通过DictFileConverter中的dict_to_file方法保存为json文件
+    这里是完整sql处理,将sql放到sql目录,通过parse_mysql_schemas并行解析文件夹下的所有sql文件(每个文件独立的MySQLSchemaParser),然后通过DictFileConverter中的dict_to_file方法保存为json文件
     在做最终数据校验前,将指定目录的json(或者yaml)解析为dict对象,最后调用mysqlCheck中的sqlCheck,在目标库进行数据校验
     '''
-    sqlChecker = MySQLSchemaParser()
-    sqlPath = 'app/sql'
-    all_items = os.listdir(sqlPath)
-    sql_files = [f for f in all_items if f.endswith('.sql')]
-    for sql_file in sql_files:
-        file_path = os.path.join(sqlPath, sql_file)
-        sqlDict = sqlChecker.parse_sql_file(file_path)
-        DictFileConverter.dict_to_file(
-            data=sqlDict, 
-            file_path=f"app/output/{sql_file[:-4]}.json",
-            file_type='json'
-        )
-        sqlDicte = DictFileConverter.file_to_dict("app/output/1.json")
+    report = sqlprase()
+    for item in report['files']:
+        sqlDicte = DictFileConverter.file_to_dict(item['output'])
         print(sqlDicte)
 
 
-def sqlprase():
-    sqlChecker = MySQLSchemaParser()
-    file_path = 'app/sql/2.sql'
-    sqlDict = sqlChecker.parse_sql_file(file_path)
-    DictFileConverter.dict_to_file(data=sqlDict, file_path="app/output/2.json", file_type='json')
+def sqlprase(sql_dir: str = 'app/sql', output_dir: str = 'app/output', max_workers: int = None,
+             use_cache: bool = True) -> Dict[str, Any]:
+    """
+    并行解析sql目录下的所有sql文件，每个文件输出同名json文件，表定义输出到 definitions 子目录下的同名json文件
+    内容未变化的文件直接使用解析缓存，且已有输出文件时不再重写
+    
+    Returns:
+        Dict: 每个文件的耗时/表数量/输出文件/表定义文件/是否命中缓存、文件间的冲突以及总耗时
+    """
+    cache = ParseCache(os.path.join(output_dir, '.cache')) if use_cache else None
+    result = parse_mysql_schemas(_list_sql_files(sql_dir), max_workers=max_workers, cache=cache)
+    
+    files = []
+    for item in result['files']:
+        output_file = os.path.join(output_dir, f"{Path(item['file']).stem}.json")
+        definition_file = os.path.join(output_dir, 'definitions', f"{Path(item['file']).stem}.json")
+        if not (item['cached'] and os.path.exists(output_file)):
+            DictFileConverter.dict_to_file(data=item['schema'], file_path=output_file, file_type='json')
+        if not (item['cached'] and os.path.exists(definition_file)):
+            os.makedirs(os.path.dirname(definition_file), exist_ok=True)
+            DictFileConverter.dict_to_file(data=item['definitions'], file_path=definition_file, file_type='json')
+        files.append({
+            'file': item['file'],
+            'output': output_file,
+            'definitions': definition_file,
+            'tables': item['tables'],
+            'seconds': item['seconds'],
+            'cached': item['cached']
+        })
+    
+    return {'files': files, 'conflicts': result['conflicts'], 'seconds': result['seconds']}
+
+def sqlMigrate(migration_dir: str = MIGRATION_DIR, output_dir: str = 'app/output', name: str = 'migrations',
+               use_checkpoints: bool = True, default_database: Optional[str] = None) -> Dict[str, Any]:
+    """
+    按顺序重放迁移目录下的sql文件（ALTER/DROP/RENAME 等），最终结构输出为 <name>.json，
+    表定义输出到 definitions 子目录下的同名文件，之后可直接 sqlCheck('<name>.json')
+    未变化的迁移前缀从检查点恢复，不再重放；use_checkpoints 为 False 时从头重放
+    
+    Returns:
+        Dict: 输出文件/表定义文件/表数量/文件数/本次重放的文件数/恢复位置/耗时
+    """
+    evolution = SchemaEvolution(os.path.join(output_dir, '.cache'), default_database=default_database)
+    result = evolution.replay(list_migration_files(migration_dir), use_checkpoints=use_checkpoints)
+    if result is None:
+        raise Exception(f"Migration replay failed: {migration_dir}")
+    
+    output_file = os.path.join(output_dir, f"{name}.json")
+    definition_file = os.path.join(output_dir, 'definitions', f"{name}.json")
+    DictFileConverter.dict_to_file(data=result['schema'], file_path=output_file, file_type='json')
+    os.makedirs(os.path.dirname(definition_file), exist_ok=True)
+    DictFileConverter.dict_to_file(data=result['definitions'], file_path=definition_file, file_type='json')
+    return {
+        'output': output_file,
+        'definitions': definition_file,
+        'tables': sum(len(tables) for tables in result['schema'].values()),
+        'files': result['files'],
+        'replayed': result['replayed'],
+        'resumed_from': result['resumed_from'],
+        'seconds': result['seconds']
+    }
+
+def _resolve_output_file(file_name: str, directory: str = "app/output") -> Path:
+    """定位output目录（或指定目录）下的结构文件，并防止路径遍历"""
+    # 使用 pathlib 更安全的路径处理
+    output_dir = Path(directory)
+    file_path = output_dir / file_name
+    
+    # 安全检查
+    if not file_path.exists():
+        raise FileNotFoundError(f"File {file_path} not found")
+    
+    # 防止路径遍历攻击
+    if not file_path.resolve().parent.samefile(output_dir.resolve()):
+        raise ValueError("Invalid file path")
+    
+    return file_path
+
+def _load_schema(file_path: Path) -> Dict:
+    """加载预期结构为紧凑模型 {库: {表: Table}}，见 schemaModel"""
+    model = load_schema_model(str(file_path))
+    if model is None:
+        raise ValueError(f"Invalid schema file {file_path.name}")
+    return model.databases
+
+def _load_definitions(file_name: str):
+    """
+    读取与结构文件同名的表定义文件，返回 (表定义, 文件哈希)；
+    没有表定义文件（如手工编写的结构文件）时返回 (None, None)，只校验字段类型
+    """
+    definition_path = Path(DEFINITION_DIR) / file_name
+    if not definition_path.is_file() or not definition_path.resolve().parent.samefile(Path(DEFINITION_DIR).resolve()):
+        return None, None
+    return DictFileConverter.file_to_dict(str(definition_path)), _file_digest(definition_path)
+
+def _new_run_dir():
+    """为本次校验创建报告目录 app/output/reports/<时间>-<随机串>，返回 (run_id, 目录)"""
+    run_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    run_dir = Path(REPORT_DIR) / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    return run_id, run_dir
+
+def _file_digest(file_path) -> str:
+    """文件内容的 sha256，作为校验结果缓存键的一部分"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def sqlCheck(file_name: str = "2.json"):
+def sqlCheck(file_name: str = "2.json", refresh: bool = False, snapshot: Optional[str] = None,
+             formats: Optional[List[str]] = None, summary_only: bool = False, progress=None,
+             use_cache: bool = True, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
     """
     这里简单，直接从已经转换的json中获取dict数据进行校验
+    实际结构使用进程内共享的快照缓存，refresh 为 True 时先清除快照强制重新读取
+    指定 snapshot 时与快照目录下的结构快照离线比较，不连接数据库
+    报告写到本次校验独立的目录，formats 可选 md、jsonl、junit，summary_only 时只输出汇总与不一致的对象
+    progress 为进度事件回调，见 DatabaseValidator
+    include、exclude 为 '库.表' 通配模式，只校验范围内的库、表，见 SchemaFilter
+    sqlprase 输出了同名的表定义文件时同时校验索引、主键、外键、可空、默认值等（离线快照模式下不校验）
+
+    校验结果按 (结构文件哈希, 目标实例, 实际结构指纹, 报告选项) 缓存在进程内（见 ResultCache）：
+    指纹只需一次聚合查询，未变化时直接返回上一次的结果与报告，相同的请求同时到达时只校验一次；
+    结果中的 cache 为 hit、coalesced、miss，refresh 或 use_cache 为 False 时不使用缓存（bypass）
     """
+    use_cache = use_cache and not refresh
     try:
-        # 使用 pathlib 更安全的路径处理
-        output_dir = Path("app/output")
-        file_path = output_dir / file_name
-        outputfile = output_dir / "database_validation.md"
-        
-        # 安全检查
-        if not file_path.exists():
-            raise FileNotFoundError(f"File {file_path} not found")
-        
-        # 防止路径遍历攻击
-        if not file_path.resolve().parent.samefile(output_dir.resolve()):
-            raise ValueError("Invalid file path")
+        file_path = _resolve_output_file(file_name)
+        schema = _load_schema(file_path)
+        definitions, definitions_digest = _load_definitions(file_name)
         
-        sql_dict = DictFileConverter.file_to_dict(str(file_path))
+        if snapshot:
+            snapshot_path = _resolve_output_file(snapshot, SNAPSHOT_DIR)
+            validator = DatabaseValidator(snapshot_file=str(snapshot_path), progress=progress)
+            state = ('snapshot', _file_digest(snapshot_path)) if use_cache else None
+        else:
+            if refresh:
+                live_snapshots.invalidate()
+            validator = DatabaseValidator(snapshot_cache=live_snapshots, progress=progress)
+            scoped = SchemaFilter(include, exclude).apply(schema)
+            state = validator.schema_fingerprint(list(scoped), definitions=bool(definitions)) if use_cache else None
         
-        validator = DatabaseValidator()
-        result = validator.validate_schema(sql_dict, str(outputfile))
+        def run():
+            if state is not None and not snapshot:
+                # 指纹已变化（结果缓存未命中），快照可能还在有效期内，先按指纹重新确认再校验
+                live_snapshots.expire(validator.host, validator.port, list(scoped))
+            run_id, run_dir = _new_run_dir()
+            outputfile = run_dir / "database_validation.md"
+            result = validator.validate_schema(schema, str(outputfile), formats=formats, summary_only=summary_only,
+                                               include=include, exclude=exclude, definitions=definitions)
+            result['run_id'] = run_id
+            return result
         
-        return result
+        if state is None:
+            return {**run(), 'cache': 'bypass'}
+        key = (_file_digest(file_path), definitions_digest, validator.host, validator.port, state,
+               tuple(formats or ('md',)), summary_only, tuple(include or ()), tuple(exclude or ()))
+        # 只缓存成功生成报告的结果
+        return check_results.get_or_compute(key, run, cacheable=lambda result: result['error'] is None)
         
     except Exception as e:
-        raise Exception(f"SQL check failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"SQL check failed: {str(e)}")
+
+def sqlCheckFleet(file_name: str = "2.json", aliases: Optional[List[str]] = None,
+                  max_workers: int = 16, timeout: int = 30, refresh: bool = False,
+                  formats: Optional[List[str]] = None, summary_only: bool = False,
+                  progress=None, include: Optional[List[str]] = None,
+                  exclude: Optional[List[str]] = None, engine: str = 'thread',
+                  host_deadline: Optional[float] = DEFAULT_HOST_DEADLINE) -> Dict[str, Any]:
+    """
+    用output目录下的同一份结构文件并发校验配置文件中的多个实例（为空时校验全部别名）
+    include、exclude 限定每个实例校验的库、表，见 sqlCheck
+    engine 为 FLEET_ENGINES 中的执行方式，async 时使用 AsyncDatabaseValidator（不使用快照缓存）
+    host_deadline 为单个实例的总时限（秒），超时的实例在汇总中标记为超时，见 validate_fleet
+    报告写到本次校验独立的目录：每个实例输出 database_validation_<alias>.md，汇总输出 database_validation_fleet.md
+    """
+    file_path = _resolve_output_file(file_name)
+    schema = _load_schema(file_path)
+    definitions, _ = _load_definitions(file_name)
+    if refresh:
+        live_snapshots.invalidate()
+    run_id, run_dir = _new_run_dir()
+    result = validate_fleet(schema, aliases=aliases, output_dir=str(run_dir), max_workers=max_workers,
+                            timeout=timeout, formats=formats, summary_only=summary_only, progress=progress,
+                            include=include, exclude=exclude, definitions=definitions,
+                            validator_class=FLEET_ENGINES[engine], host_deadline=host_deadline)
+    result['run_id'] = run_id
+    return result
+
+def captureSnapshot(alias: str = "default", name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    抓取指定别名实例的实际结构，保存到快照目录，之后 sqlCheck(snapshot=...) 可离线校验
+    name 为空时使用 <alias>-<时间>.json
+    """
+    name = name or f"{alias}-{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    snapshot_path = Path(SNAPSHOT_DIR) / name
+    if snapshot_path.resolve().parent != Path(SNAPSHOT_DIR).resolve() or snapshot_path.suffix not in ('.json', '.yaml'):
+        raise ValueError("Invalid snapshot name")
+    
+    validator = DatabaseValidator(db_alias=alias)
+    live_schema = validator.capture_snapshot(str(snapshot_path), file_type=snapshot_path.suffix[1:])
+    if live_schema is None:
+        raise Exception(f"Snapshot capture failed: {validator.last_error or alias}")
+    return {
+        'snapshot': snapshot_path.name,
+        'databases': len(live_schema),
+        'tables': sum(len(tables) for tables in live_schema.values())
+    }
+
+
+def _job_sqlprase(params: Dict, progress) -> Dict[str, Any]:
+    progress(0, '解析sql文件')
+    return sqlprase()
+
+def _job_sqlmigrate(params: Dict, progress) -> Dict[str, Any]:
+    progress(0, '重放迁移文件')
+    return sqlMigrate(**params)
+
+def _job_sqlcheck(params: Dict, progress) -> Dict[str, Any]:
+    progress(0, f"校验 {params['file_name']}")
+
+    def on_event(event):
+        progress(event['percent'], f"{event['stage']}: 表 {event['tables_done']}/{event['tables']}，"
+                                   f"{event['columns_per_second']} 字段/秒", event)
+
+    result = sqlCheck(**params, progress=on_event)
+    if result['output'] is None:
+        # 未能生成报告（如无法连接数据库）时任务失败
+        raise Exception(result['error'])
+    return result
+
+def _job_sqlcheck_fleet(params: Dict, progress) -> Dict[str, Any]:
+    progress(0, f"多实例校验 {params['file_name']}")
+
+    def on_event(event):
+        progress(event['fleet_percent'], f"{event['hosts_done']}/{event['hosts']} 个实例完成", event)
+
+    return sqlCheckFleet(**params, progress=on_event)
+
+# 后台任务类型 -> 处理函数，参数与对应的同步函数一致
+JOB_HANDLERS = {
+    'sqlprase': _job_sqlprase,
+    'sqlmigrate': _job_sqlmigrate,
+    'sqlcheck': _job_sqlcheck,
+    'sqlcheck_fleet': _job_sqlcheck_fleet,
+}
\ No newline at end of file
@@ -0,0 +1,152 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import pymysql
+
+# 连接池默认配置
+DEFAULT_POOL_SIZE = 8
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_ACQUIRE_TIMEOUT = 30
+
+
+class ConnectionPool:
+    """
+    单个数据库实例的连接池
+
+    - 最多同时借出 max_size 个连接，超出时等待归还，等待超过 acquire_timeout 抛出 TimeoutError
+    - 空闲超过 idle_timeout 秒的连接在借出/归还时关闭
+    - 借出前 ping 检查连接，断开的连接自动重连，重连失败则新建连接
+    """
+
+    def __init__(self, params: Dict, max_size: int = DEFAULT_POOL_SIZE,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT, acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        self.params = params
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        # 空闲连接 (connection, 归还时间)，后进先出，优先复用最近使用过的连接
+        self._idle: List[Tuple[pymysql.connections.Connection, float]] = []
+        self._borrowed = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def acquire(self) -> pymysql.connections.Connection:
+        """借出一个可用连接"""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                self._close_expired()
+                if self._idle or self._borrowed < self.max_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待连接超时: {self.params.get('host')}:{self.params.get('port')}")
+                self._condition.wait(remaining)
+            connection = self._idle.pop()[0] if self._idle else None
+            self._borrowed += 1
+
+        try:
+            return self._checked(connection)
+        except Exception:
+            with self._condition:
+                self._borrowed -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection: pymysql.connections.Connection, discard: bool = False):
+        """归还连接；discard 为 True 或连接已断开时直接关闭"""
+        with self._condition:
+            self._borrowed -= 1
+            if discard or self._closed or not connection.open:
+                self._close(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._close_expired()
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """with pool.connection() as conn: 出现异常时丢弃该连接"""
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            self.release(connection, discard=True)
+            raise
+        else:
+            self.release(connection)
+
+    def close(self):
+        """关闭所有空闲连接，已借出的连接归还时关闭"""
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._close(connection)
+            self._idle.clear()
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {'idle': len(self._idle), 'borrowed': self._borrowed, 'max_size': self.max_size}
+
+    def _checked(self, connection: Optional[pymysql.connections.Connection]) -> pymysql.connections.Connection:
+        """借出前的健康检查：ping 并在断开时重连，仍不可用则新建连接"""
+        if connection is not None:
+            try:
+                connection.ping(reconnect=True)
+                return connection
+            except Exception as e:
+                logging.warning(f"连接健康检查失败，重新建立连接: {e}")
+                self._close(connection)
+        connection = pymysql.connect(**self.params)
+        logging.info(f"新建数据库连接: {self.params.get('host')}:{self.params.get('port')}")
+        return connection
+
+    def _close_expired(self):
+        now = time.monotonic()
+        expired = [item for item in self._idle if now - item[1] > self.idle_timeout]
+        if expired:
+            self._idle = [item for item in self._idle if now - item[1] <= self.idle_timeout]
+            for connection, _ in expired:
+                self._close(connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: str, params: Dict, max_size: int = DEFAULT_POOL_SIZE,
+             idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> ConnectionPool:
+    """
+    返回进程内按 key（一般为配置别名）共享的连接池
+    连接参数变化（如修改了配置文件中的密码）时关闭旧池并重新创建
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.params == params and pool.max_size == max_size \
+                and pool.idle_timeout == idle_timeout:
+            return pool
+        if pool is not None:
+            pool.close()
+        pool = ConnectionPool(params, max_size=max_size, idle_timeout=idle_timeout)
+        _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """关闭进程内的所有连接池"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
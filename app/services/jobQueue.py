@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import socket
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import inspect, text
+from app.models import db, Job
+
+# 默认工作线程数与最多排队的任务数
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_MAX_PENDING_JOBS = 100
+
+# 心跳间隔与租约（秒）：进程每隔 HEARTBEAT_INTERVAL 刷新自己未完成任务的心跳，超过 JOB_LEASE 未刷新视为失联
+HEARTBEAT_INTERVAL = 10
+JOB_LEASE = 60
+
+# 进度写入数据库的最小间隔（秒），进度达到 100 时总是写入
+PROGRESS_INTERVAL = 0.5
+
+# 每个任务在内存中保留的进度事件数，以及保留事件的已结束任务数
+MAX_JOB_EVENTS = 1000
+MAX_FINISHED_JOB_EVENTS = 200
+
+# 任务处理函数：(参数, 进度回调(百分比, 说明, 进度事件)) -> 可序列化为 JSON 的结果
+JobHandler = Callable[[Dict, Callable[..., None]], Any]
+
+
+class QueueFullError(Exception):
+    """排队的任务已达上限"""
+
+
+class JobEvents:
+    """
+    任务进度事件的进程内缓冲，每个事件带递增序号，SSE 等接口按序号增量读取，断线后可从中断处继续
+    每个任务只保留最近 MAX_JOB_EVENTS 个事件，已结束的任务只保留最近 MAX_FINISHED_JOB_EVENTS 个
+    """
+
+    def __init__(self, max_events: int = MAX_JOB_EVENTS, max_finished: int = MAX_FINISHED_JOB_EVENTS):
+        self.max_events = max_events
+        self.max_finished = max_finished
+        # job_id -> {'events': deque[(序号, 事件)], 'next': 下一个序号, 'closed': 是否已结束}
+        self._jobs: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._condition = threading.Condition()
+
+    def publish(self, job_id: str, event: Dict, close: bool = False):
+        with self._condition:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                entry = {'events': deque(maxlen=self.max_events), 'next': 1, 'closed': False}
+                self._jobs[job_id] = entry
+            entry['events'].append((entry['next'], event))
+            entry['next'] += 1
+            if close:
+                entry['closed'] = True
+                self._jobs.move_to_end(job_id)
+                self._evict()
+            self._condition.notify_all()
+
+    def read(self, job_id: str, after: int = 0, timeout: float = 15) -> Optional[Tuple[List, bool]]:
+        """
+        返回 (序号大于 after 的事件列表, 任务是否已结束)；没有新事件时最多等待 timeout 秒
+        任务不在缓冲中（如服务重启前的任务）返回 None
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                entry = self._jobs.get(job_id)
+                if entry is None:
+                    return None
+                events = [item for item in entry['events'] if item[0] > after]
+                if events or entry['closed']:
+                    return events, entry['closed']
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], False
+                self._condition.wait(remaining)
+
+    def _evict(self):
+        finished = [job_id for job_id, entry in self._jobs.items() if entry['closed']]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+class JobQueue:
+    """
+    后台任务队列：提交后立即返回任务 id，由固定大小的线程池执行，
+    状态、进度与结果保存在 Job 表中，请求线程不再等待解析或校验完成
+
+    每个任务记录执行它的进程（主机名:pid），进程在后台线程中定期刷新自己任务的心跳；
+    启动时及每次心跳后，只把进程已退出（同一主机）或租约过期的未完成任务标记为失败，
+    同一数据库上的其他进程正在执行的任务不受影响
+    """
+
+    def __init__(self, app, handlers: Dict[str, JobHandler], max_workers: int = DEFAULT_JOB_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING_JOBS, lease: float = JOB_LEASE,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL):
+        self.app = app
+        self.handlers = handlers
+        self.max_pending = max_pending
+        self.lease = lease
+        self.heartbeat_interval = heartbeat_interval
+        self.hostname = socket.gethostname()
+        self.owner = f"{self.hostname}:{os.getpid()}"
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._events = JobEvents()
+        self._stopped = threading.Event()
+        self._upgrade_table()
+        self._recover()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+
+    def submit(self, kind: str, params: Optional[Dict] = None) -> str:
+        """
+        提交任务，返回任务 id
+
+        Raises:
+            ValueError: 未知的任务类型
+            QueueFullError: 未完成的任务数已达 max_pending
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"未知的任务类型: {kind}")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"排队任务已达上限 {self.max_pending}")
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        try:
+            with self.app.app_context():
+                db.session.add(Job(id=job_id, kind=kind, params=json.dumps(params or {}, ensure_ascii=False),
+                                   owner=self.owner, heartbeat_at=datetime.utcnow()))
+                db.session.commit()
+            self._events.publish(job_id, {'stage': 'queued'})
+            self._executor.submit(self._run, job_id)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        logging.info(f"已提交任务 {kind}: {job_id}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """任务状态，不存在返回 None"""
+        with self.app.app_context():
+            job = db.session.get(Job, job_id)
+            return job.to_dict() if job else None
+
+    def events(self, job_id: str, after: int = 0, timeout: float = 15) -> Optional[Tuple[List, bool]]:
+        """增量读取任务的进度事件，见 JobEvents.read"""
+        return self._events.read(job_id, after, timeout)
+
+    def shutdown(self, wait: bool = True):
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id: str):
+        try:
+            with self.app.app_context():
+                job = db.session.get(Job, job_id)
+                job.status = 'running'
+                job.started_at = job.heartbeat_at = datetime.utcnow()
+                db.session.commit()
+                kind, params = job.kind, json.loads(job.params)
+                self._events.publish(job_id, {'stage': 'running'})
+
+                try:
+                    result = self.handlers[kind](params, self._progress_callback(job_id))
+                    job = db.session.get(Job, job_id)
+                    job.status = 'succeeded'
+                    job.progress = 100
+                    job.result = json.dumps(result, ensure_ascii=False, default=str)
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"任务 {kind} {job_id} 执行失败: {e}")
+                    job = db.session.get(Job, job_id)
+                    job.status = 'failed'
+                    job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+                self._events.publish(job_id, {'stage': 'finished', 'status': job.status, 'error': job.error},
+                                     close=True)
+        except Exception as e:
+            logging.error(f"更新任务 {job_id} 状态时出错: {e}")
+            self._events.publish(job_id, {'stage': 'finished', 'status': 'failed', 'error': str(e)}, close=True)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _progress_callback(self, job_id: str) -> Callable[..., None]:
+        """
+        返回任务的进度回调 progress(百分比, 说明, 进度事件)：
+        进度事件立即发布给事件订阅者，写入数据库按 PROGRESS_INTERVAL 节流，避免频繁提交
+        """
+        last = [0.0]
+        lock = threading.Lock()
+
+        def progress(percent: float, message: str = '', event: Optional[Dict] = None):
+            if event is not None:
+                self._events.publish(job_id, event)
+            # 多实例校验时回调来自各实例的工作线程，写入数据库使用独立的应用上下文
+            with lock:
+                now = time.monotonic()
+                if percent < 100 and now - last[0] < PROGRESS_INTERVAL:
+                    return
+                last[0] = now
+                with self.app.app_context():
+                    try:
+                        job = db.session.get(Job, job_id)
+                        job.progress = max(0, min(100, int(percent)))
+                        job.message = message[:255]
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        logging.warning(f"更新任务 {job_id} 进度失败: {e}")
+
+        return progress
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            self._heartbeat()
+            self._recover()
+
+    def _heartbeat(self):
+        """刷新本进程所有未完成任务的心跳"""
+        with self.app.app_context():
+            try:
+                Job.query.filter(Job.owner == self.owner, Job.status.in_(('queued', 'running'))).update(
+                    {Job.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.warning(f"刷新任务心跳失败: {e}")
+
+    def _owner_alive(self, owner: Optional[str]) -> bool:
+        """同一主机上按 pid 判断进程是否存在；其他主机（及 Windows）无法判断，视为存在，只看租约"""
+        if not owner:
+            return False
+        host, _, pid = owner.rpartition(':')
+        if host != self.hostname or os.name == 'nt':
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except (ValueError, ProcessLookupError):
+            return False
+        except OSError:
+            # 进程存在但无权发送信号
+            return True
+        return True
+
+    def _recover(self):
+        """执行进程已退出或租约过期的未完成任务不会再执行，标记为失败；本进程的任务不处理"""
+        expired_before = datetime.utcnow() - timedelta(seconds=self.lease)
+        with self.app.app_context():
+            try:
+                unfinished = Job.query.filter(Job.status.in_(('queued', 'running'))).all()
+                interrupted = [
+                    job for job in unfinished
+                    if job.owner != self.owner and not (
+                        self._owner_alive(job.owner) and job.heartbeat_at and job.heartbeat_at >= expired_before
+                    )
+                ]
+                for job in interrupted:
+                    job.status = 'failed'
+                    job.error = f'执行任务的进程 {job.owner or "未知"} 已退出或失联，任务中断'
+                    job.finished_at = datetime.utcnow()
+                if interrupted:
+                    db.session.commit()
+                    logging.warning(f"{len(interrupted)} 个未完成的任务因执行进程退出或失联被标记为失败")
+            except Exception as e:
+                db.session.rollback()
+                logging.warning(f"恢复中断的任务失败: {e}")
+
+    def _upgrade_table(self):
+        """create_all 不修改已存在的表，旧版本创建的 job 表补上 owner 与 heartbeat_at 列"""
+        with self.app.app_context():
+            columns = {column['name'] for column in inspect(db.engine).get_columns(Job.__tablename__)}
+            for name, column_type in (('owner', 'VARCHAR(128)'), ('heartbeat_at', 'DATETIME')):
+                if name not in columns:
+                    db.session.execute(text(f"ALTER TABLE {Job.__tablename__} ADD COLUMN {name} {column_type}"))
+                    logging.info(f"job 表添加列 {name}")
+            db.session.commit()
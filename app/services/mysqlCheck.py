@@ -1,9 +1,39 @@
+import os
+import time
+import asyncio
 import yaml
 import pymysql
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
 import logging
-import re
 from datetime import datetime
+from app.services.sqldictTofile import DictFileConverter
+from app.services.connectionPool import DEFAULT_IDLE_TIMEOUT, DEFAULT_POOL_SIZE, get_pool
+from app.services.snapshotCache import FINGERPRINT_QUERIES, SnapshotCache, live_snapshots
+from app.services.schemaDiff import SchemaDiff, diff_schemas
+from app.services.schemaFilter import SchemaFilter
+from app.services.schemaModel import compact_schema, load_schema_model
+from app.services.tableDefinitions import DEFINITION_FINGERPRINT_QUERIES, definition_queries, fold_live_definitions
+from app.services.reportWriters import report_paths, write_reports
+from app.services.progressEvents import FleetProgress, ProgressCallback, ProgressTracker
+
+# 批量模式下每次查询 information_schema 时 IN 列表中的最大库数
+BULK_SCHEMA_BATCH = 100
+
+# 多实例校验时默认的并发数与单实例网络超时（秒）
+DEFAULT_FLEET_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 30
+
+# 多实例校验时单个实例从开始到完成的总时限（秒），超过后该实例记为超时，不再等待
+DEFAULT_HOST_DEADLINE = 600
+
+# 抓取快照时默认排除的系统库
+SYSTEM_SCHEMAS = ('information_schema', 'mysql', 'performance_schema', 'sys')
+
+# 校验结果计数项
+SUMMARY_KEYS = ('databases', 'missing_databases', 'tables', 'missing_tables',
+                'columns', 'missing_columns', 'mismatched_columns', 'errors',
+                'missing_indexes', 'mismatched_definitions')
 
 class DatabaseConfig:
     """数据库配置类"""
@@ -68,15 +98,41 @@ class DatabaseConfig:
 
 class DatabaseValidator:
     def __init__(self, host: str = None, username: str = None, password: str = None, 
-                 port: int = 3306, config_file: str = None, db_alias: str = "default"):
-        """支持多种初始化方式：直接参数或配置文件"""
-        if host and username and password:
+                 port: int = 3306, config_file: str = None, db_alias: str = "default",
+                 timeout: Optional[int] = None, use_pool: bool = True,
+                 snapshot_cache: Optional[SnapshotCache] = None, snapshot_file: Optional[str] = None,
+                 progress: Optional[ProgressCallback] = None):
+        """
+        支持多种初始化方式：直接参数或配置文件
+        timeout 为连接与每次读写的超时秒数；使用配置文件时该别名配置的 timeout 优先
+        use_pool 为 True 时从进程内共享的连接池（按别名区分）借用连接，
+        连接池大小与空闲超时可通过别名配置的 pool_size、pool_idle_timeout 调整
+        snapshot_cache 不为空时批量模式复用其中未过期/未变化的实际结构快照
+        snapshot_file 不为空时为离线模式：以 capture_snapshot 导出的快照文件作为实际结构，不连接数据库
+        progress 不为空时校验过程中按阶段回调进度事件（已完成的库、表，已比较的字段数与吞吐量），见 ProgressTracker
+        """
+        pool_options = {}
+        self.snapshot = None
+        if snapshot_file:
+            # 离线模式
+            snapshot = load_schema_model(snapshot_file)
+            if snapshot is None:
+                raise ValueError(f"无法读取结构快照: {snapshot_file}")
+            self.snapshot = snapshot.databases
+            self.host = snapshot_file
+            self.username = None
+            self.password = None
+            self.port = None
+            self.config_loader = None
+            self.pool_key = None
+        elif host and username and password:
             # 使用直接参数
             self.host = host
             self.username = username
             self.password = password
             self.port = port
             self.config_loader = None
+            self.pool_key = f"{username}@{host}:{port}"
         else:
             # 使用配置文件
             if not config_file:
@@ -88,162 +144,578 @@ class DatabaseValidator:
                 self.username = self.db_config['username']
                 self.password = self.db_config['password']
                 self.port = self.db_config['port']
+                timeout = self.db_config.get('timeout', timeout)
+                self.pool_key = f"{os.path.abspath(config_file)}#{db_alias}"
+                pool_options = self.db_config
             else:
                 raise ValueError("无法获取数据库配置")
         
+        self.timeout = timeout
+        self.use_pool = use_pool
+        self.pool_size = pool_options.get('pool_size', DEFAULT_POOL_SIZE)
+        self.pool_idle_timeout = pool_options.get('pool_idle_timeout', DEFAULT_IDLE_TIMEOUT)
+        self.pool = None
+        self.snapshot_cache = snapshot_cache
         self.connection = None
+        self.last_error = None
+        self.summary = dict.fromkeys(SUMMARY_KEYS, 0)
+        self.diff: Optional[SchemaDiff] = None
+        self.progress = progress
+        self.tracker = ProgressTracker(None, self.host, self.port)
     
     def connect(self):
-        """连接数据库"""
+        """连接数据库（离线模式下无需连接）"""
+        if self.snapshot is not None:
+            return True
+        params = {
+            'host': self.host,
+            'user': self.username,
+            'password': self.password,
+            'port': self.port,
+            'charset': 'utf8mb4',
+            'cursorclass': pymysql.cursors.DictCursor,
+            'connect_timeout': self.timeout or 10,
+            'read_timeout': self.timeout,
+            'write_timeout': self.timeout
+        }
         try:
-            self.connection = pymysql.connect(
-                host=self.host,
-                user=self.username,
-                password=self.password,
-                port=self.port,
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
-            )
+            if self.use_pool:
+                self.pool = get_pool(self.pool_key, params, max_size=self.pool_size,
+                                     idle_timeout=self.pool_idle_timeout)
+                self.connection = self.pool.acquire()
+            else:
+                self.connection = pymysql.connect(**params)
             logging.info(f"数据库连接成功: {self.host}:{self.port}")
             return True
         except Exception as e:
+            self.last_error = str(e)
             logging.error(f"数据库连接失败: {e}")
             return False
     
-    def disconnect(self):
-        """断开数据库连接"""
+    def disconnect(self, discard: bool = False):
+        """断开数据库连接；使用连接池时归还连接，discard 为 True 时关闭该连接不再复用"""
         if self.connection:
-            self.connection.close()
-            logging.info("数据库连接已关闭")
+            if self.pool is not None:
+                self.pool.release(self.connection, discard=discard)
+            else:
+                self.connection.close()
+                logging.info("数据库连接已关闭")
+            self.connection = None
     
-    def validate_schema(self, schema_dict: Dict, output_file: str = "database_validation.md"):
+    def fetch_live_schema(self, db_names: List[str], tables: Optional[Dict[str, Optional[List[str]]]] = None) -> Dict:
         """
-        校验数据库结构并生成MD报告
+        批量读取实际的数据库结构：每批库只查询一次 information_schema.SCHEMATA 与 COLUMNS，
+        往返次数与表的数量无关；配置了快照缓存时，未过期或指纹未变化的库不再读取
         
         Args:
-            schema_dict: 预期的数据库结构字典 {database: {table: {column: type}}}
-            output_file: 输出的MD文件名
+            db_names: 需要读取的数据库名列表
+            tables: {库: 表名列表} 时只读取这些表（条件下推到 COLUMNS 查询，不使用快照缓存），
+                    值为 None 或库不在其中时读取整个库，见 SchemaFilter.table_scope
+            
+        Returns:
+            Dict: {database: {table: {column: column_type}}}，只包含实际存在的数据库
         """
-        if not self.connect():
-            logging.error("无法连接数据库，校验终止")
-            return
+        tables = {db: tables[db] for db in db_names if tables and tables.get(db) is not None}
+        if self.snapshot is not None:
+            return {db: {name: columns for name, columns in self.snapshot[db].items()
+                         if db not in tables or name in tables[db]}
+                    for db in db_names if db in self.snapshot}
         
+        # 实际结构以紧凑模型保存（快照缓存中同样），只有导出快照时才使用字典
+        fetch = lambda names, scope=None: compact_schema(self._query_live_schema(names, scope))
+        whole = [db for db in db_names if db not in tables]
+        live_schema = {}
+        if whole:
+            if self.snapshot_cache is None:
+                live_schema = fetch(whole)
+            else:
+                live_schema = self.snapshot_cache.get_schema(self.host, self.port, whole,
+                                                             self._query_fingerprints, fetch)
+        if tables:
+            live_schema.update(fetch(list(tables), tables))
+        return live_schema
+    
+    def _query_fingerprints(self, db_names: List[str], query: str) -> Dict:
+        """按库聚合的结构指纹 {database: (对象数, 变更时间, 校验和)}，不存在的库不返回"""
+        fingerprints = {}
+        with self.connection.cursor() as cursor:
+            for index in range(0, len(db_names), BULK_SCHEMA_BATCH):
+                batch = db_names[index:index + BULK_SCHEMA_BATCH]
+                cursor.execute(query.format(placeholders=', '.join(['%s'] * len(batch))), batch)
+                for row in cursor.fetchall():
+                    fingerprints[row['TABLE_SCHEMA']] = (
+                        row['object_count'], str(row['changed']), str(row['checksum'])
+                    )
+        return fingerprints
+    
+    def schema_fingerprint(self, db_names: List[str], definitions: bool = False) -> Optional[tuple]:
+        """
+        实际结构的廉价指纹：一次按库聚合的 information_schema 查询（与快照缓存使用相同的指纹类型），
+        用于判断上一次的校验结果是否仍然有效；离线模式、连接或查询失败时返回 None
+        definitions 为 True 时另加索引与字段属性的指纹（校验表定义时使用）
+        """
+        if self.snapshot is not None or not self.connect():
+            return None
+        failed = False
         try:
-            with open(output_file, 'w', encoding='utf-8') as md_file:
-                # 写入MD文件标题
-                md_file.write("# 数据库结构校验报告\n\n")
-                md_file.write(f"**校验时间**: {self._get_current_time()}\n")
-                md_file.write(f"**数据库地址**: {self.host}:{self.port}\n")
-                md_file.write(f"**用户名**: {self.username}\n\n")
-                
-                # 遍历预期的数据库结构
-                for db_name, tables in schema_dict.items():
-                    self._validate_database(md_file, db_name, tables)
-                
-                md_file.write("\n---\n*报告生成完成*")
-            
-            logging.info(f"校验报告已生成: {output_file}")
-            
+            kind = self.snapshot_cache.fingerprint if self.snapshot_cache is not None else 'tables'
+            queries = [FINGERPRINT_QUERIES[kind], *(DEFINITION_FINGERPRINT_QUERIES if definitions else ())]
+            return tuple(tuple(sorted(self._query_fingerprints(db_names, query).items())) for query in queries)
         except Exception as e:
-            logging.error(f"生成校验报告时出错: {e}")
+            failed = True
+            logging.warning(f"读取结构指纹失败: {e}")
+            return None
         finally:
-            self.disconnect()
+            self.disconnect(discard=failed)
     
-    def _validate_database(self, md_file, db_name: str, tables: Dict):
-        """校验单个数据库"""
-        try:
-            # 检查数据库是否存在
-            with self.connection.cursor() as cursor:
-                cursor.execute("SHOW DATABASES")
-                databases = [db['Database'] for db in cursor.fetchall()]
-                
-                if db_name not in databases:
-                    md_file.write(f"## 数据库: {db_name} ❌\n\n")
-                    md_file.write("*数据库不存在*\n\n")
-                    return
-                
-                md_file.write(f"## 数据库: {db_name} ✅\n\n")
+    def _query_live_schema(self, db_names: List[str], tables: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """tables 不为空时每个库只读取其中列出的表"""
+        live_schema = {}
+        with self.connection.cursor() as cursor:
+            for index in range(0, len(db_names), BULK_SCHEMA_BATCH):
+                batch = db_names[index:index + BULK_SCHEMA_BATCH]
+                placeholders = ', '.join(['%s'] * len(batch))
                 
-                # 切换到该数据库
-                cursor.execute(f"USE `{db_name}`")
+                cursor.execute(
+                    f"SELECT SCHEMA_NAME FROM information_schema.SCHEMATA WHERE SCHEMA_NAME IN ({placeholders})",
+                    batch
+                )
+                for row in cursor.fetchall():
+                    live_schema[row['SCHEMA_NAME']] = {}
                 
-                # 获取当前数据库的所有表
-                cursor.execute("SHOW TABLES")
-                existing_tables = [list(table.values())[0] for table in cursor.fetchall()]
-                
-                # 校验表结构
-                for table_name, columns in tables.items():
-                    self._validate_table(md_file, db_name, table_name, columns, existing_tables)
-                    
-        except Exception as e:
-            logging.error(f"校验数据库 {db_name} 时出错: {e}")
-            md_file.write(f"## 数据库: {db_name} ❌\n\n")
-            md_file.write(f"*校验过程中出错: {e}*\n\n")
+                if tables:
+                    # 按库列出表名，MySQL 可以直接定位到这些表的元数据，不扫描整个库
+                    condition = ' OR '.join(
+                        f"(TABLE_SCHEMA = %s AND TABLE_NAME IN ({', '.join(['%s'] * len(tables[db]))}))"
+                        for db in batch
+                    )
+                    args = [arg for db in batch for arg in (db, *tables[db])]
+                else:
+                    condition, args = f"TABLE_SCHEMA IN ({placeholders})", batch
+                cursor.execute(
+                    "SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS "
+                    f"WHERE {condition} "
+                    "ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION",
+                    args
+                )
+                for row in cursor.fetchall():
+                    live_tables = live_schema.setdefault(row['TABLE_SCHEMA'], {})
+                    live_tables.setdefault(row['TABLE_NAME'], {})[row['COLUMN_NAME']] = row['COLUMN_TYPE']
+                self.tracker.advance(databases=len(batch),
+                                     tables=sum(len(live_schema.get(db, ())) for db in batch))
+        
+        return live_schema
     
-    def _validate_table(self, md_file, db_name: str, table_name: str, columns: Dict, existing_tables: list):
-        """校验单个表"""
-        try:
-            if table_name not in existing_tables:
-                md_file.write(f"### 表: {table_name} ❌\n\n")
-                md_file.write("| 字段名 | 预期类型 | 状态 |\n")
-                md_file.write("|-------|---------|------|\n")
-                for column_name, expected_type in columns.items():
-                    md_file.write(f"| `{column_name}` | `{expected_type}` | ❌ 表不存在 |\n")
-                md_file.write("\n")
-                return
+    def fetch_live_definitions(self, tables: Dict[str, List[str]]) -> Dict:
+        """
+        批量读取表定义（字段可空、默认值、自增，索引与主键，外键，存储引擎与字符集）：
+        每批库对 COLUMNS、STATISTICS、KEY_COLUMN_USAGE、TABLES 各查询一次，条件按库、表名下推
+        
+        Args:
+            tables: {库: 表名列表}，只读取这些表的定义
             
-            md_file.write(f"### 表: {table_name} ✅\n\n")
-            md_file.write("| 字段名 | 预期类型 | 实际类型 | 状态 |\n")
-            md_file.write("|-------|---------|---------|------|\n")
+        Returns:
+            Dict: {database: {table: 表定义}}，格式见 tableDefinitions.new_definition
+        """
+        db_names = list(tables)
+        definitions = {}
+        with self.connection.cursor() as cursor:
+            for index in range(0, len(db_names), BULK_SCHEMA_BATCH):
+                batch = db_names[index:index + BULK_SCHEMA_BATCH]
+                rows = {}
+                for name, (query, args) in definition_queries(batch, tables).items():
+                    cursor.execute(query, args)
+                    rows[name] = cursor.fetchall()
+                fold_live_definitions(rows, definitions)
+        return definitions
+    
+    def capture_snapshot(self, output_file: str, db_names: Optional[List[str]] = None,
+                         file_type: str = 'json') -> Optional[Dict]:
+        """
+        读取一次实际结构并导出为快照文件，格式与解析器输出相同 {database: {table: {column: type}}}，
+        之后可用 DatabaseValidator(snapshot_file=...) 离线校验任意多份预期结构
+        
+        Args:
+            output_file: 快照文件路径
+            db_names: 要导出的数据库，为空时导出除系统库外的全部数据库
+            file_type: 'json' 或 'yaml'
             
-            # 获取表的实际结构
-            with self.connection.cursor() as cursor:
-                cursor.execute(f"DESCRIBE `{table_name}`")
-                actual_columns = {col['Field']: col['Type'] for col in cursor.fetchall()}
-                
-                # 校验每个字段
-                for column_name, expected_type in columns.items():
-                    self._validate_column(md_file, column_name, expected_type, actual_columns)
+        Returns:
+            Dict or None: 导出的结构，失败返回None
+        """
+        if self.snapshot is not None:
+            logging.error("离线模式下无法抓取快照")
+            return None
+        if not self.connect():
+            logging.error("无法连接数据库，抓取快照终止")
+            return None
+        
+        failed = False
+        try:
+            if db_names is None:
+                with self.connection.cursor() as cursor:
+                    placeholders = ', '.join(['%s'] * len(SYSTEM_SCHEMAS))
+                    cursor.execute(
+                        "SELECT SCHEMA_NAME FROM information_schema.SCHEMATA "
+                        f"WHERE SCHEMA_NAME NOT IN ({placeholders}) ORDER BY SCHEMA_NAME",
+                        list(SYSTEM_SCHEMAS)
+                    )
+                    db_names = [row['SCHEMA_NAME'] for row in cursor.fetchall()]
             
-            md_file.write("\n")
+            # 快照必须反映当前结构，不使用快照缓存
+            live_schema = self._query_live_schema(db_names)
+            if not DictFileConverter.dict_to_file(live_schema, output_file, file_type):
+                return None
+            logging.info(f"结构快照已导出: {output_file}，共 {len(live_schema)} 个数据库")
+            return live_schema
+        except Exception as e:
+            failed = True
+            logging.error(f"抓取结构快照时出错: {e}")
+            return None
+        finally:
+            self.disconnect(discard=failed)
+    
+    def validate_schema(self, schema_dict: Dict, output_file: str = "database_validation.md",
+                        bulk: bool = True, formats: Optional[List[str]] = None, summary_only: bool = False,
+                        include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                        definitions: Optional[Dict] = None):
+        """
+        校验数据库结构并生成报告
+        
+        Args:
+            schema_dict: 预期的数据库结构，字典 {database: {table: {column: type}}} 或 SchemaModel，
+                         校验前统一转换为紧凑模型
+            output_file: 输出的报告文件名，其他格式使用同名文件、按格式替换扩展名
+            bulk: 是否批量读取 information_schema 后在本地比较（默认）；
+                  为 False 时逐库 SHOW TABLES、逐表 DESCRIBE（离线模式下忽略）
+            formats: 报告格式列表，可选 md、jsonl、junit，默认只输出 md
+            summary_only: 报告只包含汇总与不一致的对象
+            include: 只校验匹配的表，'库.表' 通配模式（如 'hr.emp*'，只写库名表示整个库），见 SchemaFilter
+            exclude: 不校验匹配的表，优先于 include；指定了范围时只读取范围内的表，
+                     整库在范围内的库才会报告多出的表
+            definitions: 解析器输出的表定义 {database: {table: 表定义}}，不为空时同时校验索引、主键、外键、
+                         可空、默认值、存储引擎与字符集（离线模式下快照没有表定义，不校验）
             
+        Returns:
+            Dict: 校验汇总 {host, port, output, outputs, passed, error, 以及 SUMMARY_KEYS 各项计数}，
+                  output 为第一种格式的报告，outputs 为 {格式: 报告文件}；完整的差异明细保存在 self.diff
+        """
+        self.summary = dict.fromkeys(SUMMARY_KEYS, 0)
+        self.diff = None
+        outputs = report_paths(output_file, formats)
+        scope = SchemaFilter(include, exclude)
+        schema_dict = scope.apply(compact_schema(schema_dict))
+        table_scope = scope.table_scope(schema_dict) if scope.active else None
+        self.tracker = ProgressTracker(self.progress, self.host, self.port, len(schema_dict),
+                                       sum(len(tables) for tables in schema_dict.values()))
+        self.tracker.stage('connect')
+        if not self.connect():
+            logging.error("无法连接数据库，校验终止")
+            return self._result(None, f"无法连接数据库: {self.last_error}")
+        
+        failed = False
+        try:
+            diff = self.diff_schema(schema_dict, bulk=bulk, tables=table_scope, definitions=definitions)
         except Exception as e:
-            logging.error(f"校验表 {db_name}.{table_name} 时出错: {e}")
-            md_file.write(f"### 表: {table_name} ❌\n\n")
-            md_file.write(f"*校验过程中出错: {e}*\n\n")
-    
-    def _validate_column(self, md_file, column_name: str, expected_type: str, actual_columns: Dict):
-        """校验单个字段"""
-        if column_name not in actual_columns:
-            # 字段不存在
-            md_file.write(f"| `{column_name}` | `{expected_type}` | - | ❌ 字段不存在 |\n")
-        else:
-            actual_type = actual_columns[column_name]
-            # 简化类型比较（忽略大小写和空格差异）
-            expected_simple = self._simplify_type(expected_type)
-            actual_simple = self._simplify_type(actual_type)
+            failed = True
+            logging.error(f"读取实际结构时出错: {e}")
+            return self._result(None, f"读取实际结构时出错: {e}")
+        finally:
+            self.disconnect(discard=failed)
+        return self._report(outputs, diff, summary_only)
+    
+    def diff_schema(self, schema_dict: Dict, bulk: bool = True,
+                    tables: Optional[Dict[str, Optional[List[str]]]] = None,
+                    definitions: Optional[Dict] = None) -> SchemaDiff:
+        """
+        读取实际结构并与预期结构比较，不生成报告（需已连接）
+        批量读取失败时改为逐库 SHOW TABLES、逐表 DESCRIBE，读取出错的库/表记录在差异的 errors 中
+        tables 限定每个库读取的表，见 fetch_live_schema
+        definitions 不为空时再批量读取实际存在的表的定义一并比较，读取失败时这些表记录为出错
+        """
+        live_schema = None
+        errors = {}
+        self.tracker.stage('fetch')
+        if bulk or self.snapshot is not None:
+            try:
+                live_schema = self.fetch_live_schema(list(schema_dict.keys()), tables)
+            except Exception as e:
+                logging.warning(f"批量读取information_schema失败，改为逐表校验: {e}")
+        if live_schema is None:
+            live_schema, errors = self._describe_live_schema(schema_dict, tables)
+            live_schema = compact_schema(live_schema)
+        
+        live_definitions = None
+        if definitions and self.snapshot is None:
+            checked = self._definition_tables(schema_dict, definitions, live_schema, errors)
+            try:
+                live_definitions = self.fetch_live_definitions(checked)
+            except Exception as e:
+                logging.error(f"读取表定义时出错: {e}")
+                errors.update({(db, name): f"读取表定义时出错: {e}"
+                               for db, names in checked.items() for name in names})
+        self.tracker.stage('compare')
+        return diff_schemas(schema_dict, live_schema, errors, progress=self.tracker.advance,
+                            definitions=definitions, live_definitions=live_definitions)
+    
+    def _definition_tables(self, schema_dict: Dict, definitions: Dict, live_schema: Dict,
+                           errors: Dict) -> Dict[str, List[str]]:
+        """需要读取表定义的表 {库: 表名列表}：有预期定义、实际存在且读取结构时没有出错的表"""
+        checked = {}
+        for db_name, tables in schema_dict.items():
+            if (db_name,) in errors:
+                continue
+            expected = definitions.get(db_name, {})
+            live_tables = live_schema.get(db_name, {})
+            names = [name for name in tables
+                     if name in expected and name in live_tables and (db_name, name) not in errors]
+            if names:
+                checked[db_name] = names
+        return checked
+    
+    def _describe_live_schema(self, schema_dict: Dict, scope: Optional[Dict[str, Optional[List[str]]]] = None):
+        """
+        逐库 SHOW TABLES、逐表 DESCRIBE 读取预期中存在的表，返回 (实际结构, 读取出错的对象)
+        scope 中列出表名的库只保留这些表
+        """
+        live_schema = {}
+        errors = {}
+        with self.connection.cursor() as cursor:
+            try:
+                cursor.execute("SHOW DATABASES")
+                databases = {db['Database'] for db in cursor.fetchall()}
+            except Exception as e:
+                logging.error(f"读取数据库列表时出错: {e}")
+                return live_schema, {(db_name,): str(e) for db_name in schema_dict}
             
-            if expected_simple == actual_simple:
-                md_file.write(f"| `{column_name}` | `{expected_type}` | `{actual_type}` | ✅ |\n")
-            else:
-                md_file.write(f"| `{column_name}` | `{expected_type}` | `{actual_type}` | ⚠️ 类型不匹配 |\n")
+            for db_name, tables in schema_dict.items():
+                if db_name not in databases:
+                    continue
+                try:
+                    cursor.execute(f"USE `{db_name}`")
+                    cursor.execute("SHOW TABLES")
+                    # 只 DESCRIBE 预期中的表，其余表只记录表名
+                    live_tables = {list(table.values())[0]: {} for table in cursor.fetchall()}
+                    if scope and scope.get(db_name) is not None:
+                        live_tables = {name: {} for name in scope[db_name] if name in live_tables}
+                except Exception as e:
+                    logging.error(f"校验数据库 {db_name} 时出错: {e}")
+                    errors[(db_name,)] = str(e)
+                    continue
+                
+                for table_name in tables:
+                    if table_name not in live_tables:
+                        continue
+                    try:
+                        cursor.execute(f"DESCRIBE `{table_name}`")
+                        live_tables[table_name] = {col['Field']: col['Type'] for col in cursor.fetchall()}
+                    except Exception as e:
+                        logging.error(f"校验表 {db_name}.{table_name} 时出错: {e}")
+                        errors[(db_name, table_name)] = str(e)
+                    self.tracker.advance(tables=1)
+                live_schema[db_name] = live_tables
+                self.tracker.advance(databases=1)
+        
+        return live_schema, errors
     
-    def _simplify_type(self, data_type: str) -> str:
-        """简化数据类型以便比较"""
-        if not data_type:
-            return ""
+    def _report(self, outputs: Dict[str, str], diff: SchemaDiff, summary_only: bool = False) -> Dict:
+        """根据差异一次写出各格式的报告并返回校验汇总"""
+        self.diff = diff
+        summary = diff.summary()
+        self.summary = {key: summary[key] for key in SUMMARY_KEYS}
+        self.tracker.stage('report')
         
-        # 转换为小写，移除空格和括号内的空格
-        simplified = data_type.lower().strip()
-        # 移除多余的空格
-        simplified = re.sub(r'\s+', ' ', simplified)
-        # 统一处理括号内的空格
-        simplified = re.sub(r'\(\s+', '(', simplified)
-        simplified = re.sub(r'\s+\)', ')', simplified)
-        simplified = re.sub(r',\s+', ',', simplified)
+        if self.snapshot is not None:
+            meta = {'time': self._get_current_time(), 'snapshot': self.host}
+        else:
+            meta = {'time': self._get_current_time(), 'host': self.host, 'port': self.port,
+                    'username': self.username}
         
-        return simplified
+        error = None
+        try:
+            write_reports(diff, meta, outputs, summary_only=summary_only)
+            logging.info(f"校验报告已生成: {', '.join(outputs.values())}")
+        except Exception as e:
+            error = f"生成校验报告时出错: {e}"
+            logging.error(error)
+        self.tracker.stage('done')
+        return self._result(outputs, error)
+    
+    def _result(self, outputs: Optional[Dict[str, str]], error: Optional[str] = None) -> Dict:
+        """校验汇总；有错误或任何缺失、不匹配时 passed 为 False"""
+        failed = any(self.summary[key] for key in SUMMARY_KEYS if key not in ('databases', 'tables', 'columns'))
+        return {
+            'host': self.host,
+            'port': self.port,
+            'output': next(iter(outputs.values())) if outputs else None,
+            'outputs': outputs or {},
+            'passed': error is None and not failed,
+            'error': error,
+            **self.summary
+        }
     
     def _get_current_time(self):
         """获取当前时间字符串"""
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
\ No newline at end of file
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _validate_alias(schema_dict: Dict, config_file: str, alias: str, output_file: str,
+                    timeout: Optional[int], bulk: bool, snapshot_cache: Optional[SnapshotCache],
+                    formats: Optional[List[str]], summary_only: bool, fleet_progress: FleetProgress,
+                    include: Optional[List[str]], exclude: Optional[List[str]],
+                    definitions: Optional[Dict], validator_class, started_at: Dict[str, float]) -> Dict:
+    """线程池任务：校验单个实例，任何异常都转换为该实例的错误结果；开始时间记录到 started_at"""
+    started = started_at[alias] = time.perf_counter()
+    try:
+        validator = validator_class(config_file=config_file, db_alias=alias, timeout=timeout,
+                                    snapshot_cache=snapshot_cache, progress=fleet_progress.for_alias(alias))
+        result = validator.validate_schema(schema_dict, output_file, bulk=bulk, formats=formats,
+                                           summary_only=summary_only, include=include, exclude=exclude,
+                                           definitions=definitions)
+        if asyncio.iscoroutine(result):
+            # 异步校验器，每个工作线程各自运行一个事件循环
+            result = asyncio.run(result)
+    except Exception as e:
+        logging.error(f"校验实例 {alias} 时出错: {e}")
+        result = {'host': None, 'port': None, 'output': None, 'outputs': {}, 'passed': False, 'error': str(e),
+                  **dict.fromkeys(SUMMARY_KEYS, 0)}
+    result['alias'] = alias
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    result['timed_out'] = False
+    fleet_progress.host_done(alias, result)
+    return result
+
+
+def _wait_alias(future, alias: str, config_file: str, started_at: Dict[str, float],
+                host_deadline: Optional[float], fleet_progress: FleetProgress) -> Dict:
+    """等待单个实例的校验结果；从该实例开始校验起超过 host_deadline 秒时返回超时结果"""
+    while True:
+        if host_deadline is None:
+            return future.result()
+        started = started_at.get(alias)
+        # 还在排队时按较短的间隔检查是否已开始
+        remaining = 1.0 if started is None else started + host_deadline - time.perf_counter()
+        try:
+            return future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            if started is not None:
+                break
+    
+    logging.error(f"校验实例 {alias} 超过 {host_deadline} 秒未完成")
+    db_config = DatabaseConfig(config_file).get_database_config(alias) or {}
+    result = {'host': db_config.get('host'), 'port': db_config.get('port'), 'output': None, 'outputs': {},
+              'passed': False, 'error': f"超过 {host_deadline} 秒未完成", **dict.fromkeys(SUMMARY_KEYS, 0),
+              'alias': alias, 'seconds': round(time.perf_counter() - started, 3), 'timed_out': True}
+    fleet_progress.host_done(alias, result)
+    return result
+
+
+def validate_fleet(schema_dict: Dict, aliases: Optional[List[str]] = None,
+                   config_file: str = "app/config/database_config.yaml", output_dir: str = "app/output",
+                   max_workers: int = DEFAULT_FLEET_CONCURRENCY, timeout: Optional[int] = DEFAULT_TIMEOUT,
+                   bulk: bool = True, snapshot_cache: Optional[SnapshotCache] = live_snapshots,
+                   formats: Optional[List[str]] = None, summary_only: bool = False,
+                   progress: Optional[ProgressCallback] = None, include: Optional[List[str]] = None,
+                   exclude: Optional[List[str]] = None, definitions: Optional[Dict] = None,
+                   validator_class=None, host_deadline: Optional[float] = DEFAULT_HOST_DEADLINE) -> Dict:
+    """
+    用同一份预期结构并发校验多个实例（分片、从库等）
+    每个实例输出 database_validation_<alias>.md（及 formats 中的其他格式），另输出汇总报告 database_validation_fleet.md
+    
+    Args:
+        schema_dict: 预期的数据库结构字典
+        aliases: 要校验的配置别名，为空时校验 databases 下的全部别名
+        config_file: 配置文件路径
+        output_dir: 报告输出目录
+        max_workers: 最大并发实例数
+        timeout: 单个实例连接与每次读写的超时秒数，别名配置中的 timeout 优先
+        bulk: 是否使用批量 information_schema 校验
+        snapshot_cache: 实际结构快照缓存，默认使用进程内共享的缓存，为 None 时每次都重新读取
+        formats: 每个实例的报告格式，见 DatabaseValidator.validate_schema
+        summary_only: 每个实例的报告只包含汇总与不一致的对象
+        progress: 进度回调，接收每个实例的进度事件（附加 alias、hosts_done、fleet_percent）与
+                  实例完成时的 stage=host_done 事件，见 FleetProgress
+        include, exclude: 限定每个实例校验的库、表，见 DatabaseValidator.validate_schema
+        definitions: 预期的表定义，不为空时同时校验索引、主键等，见 DatabaseValidator.validate_schema
+        validator_class: 每个实例使用的校验器，默认 DatabaseValidator；传入 AsyncDatabaseValidator 时
+                         在工作线程中用 asyncio.run 执行，单个实例的库、表查询在多个连接上并发
+        host_deadline: 单个实例从开始校验到完成的总时限（秒），timeout 只限制每次读写，
+                       表很多或每次查询都接近超时的实例可能远超该值；超过时限的实例记为超时
+                       （timed_out 为 True），汇总报告不再等待它，为 None 时不限制
+        
+    Returns:
+        Dict: {'hosts': 每个实例的校验汇总, 'passed', 'failed': 未通过的别名, 'timed_out': 超时的别名,
+               'totals', 'seconds', 'output'}
+    """
+    started = time.perf_counter()
+    # 各实例共用同一份紧凑模型
+    schema_dict = compact_schema(schema_dict)
+    available = DatabaseConfig(config_file).list_databases()
+    if aliases:
+        unknown = [alias for alias in aliases if alias not in available]
+        if unknown:
+            logging.error(f"配置文件中未找到数据库别名: {unknown}")
+        aliases = [alias for alias in aliases if alias in available]
+    else:
+        aliases = available
+    
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = [os.path.join(output_dir, f"database_validation_{alias}.md") for alias in aliases]
+    workers = max(1, min(max_workers, len(aliases)))
+    fleet_progress = FleetProgress(progress, aliases)
+    started_at: Dict[str, float] = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fleet-check')
+    try:
+        futures = [
+            executor.submit(_validate_alias, schema_dict, config_file, alias, output, timeout, bulk,
+                            snapshot_cache, formats, summary_only, fleet_progress, include, exclude,
+                            definitions, validator_class or DatabaseValidator, started_at)
+            for alias, output in zip(aliases, outputs)
+        ]
+        hosts = [_wait_alias(future, alias, config_file, started_at, host_deadline, fleet_progress)
+                 for alias, future in zip(aliases, futures)]
+    finally:
+        # 超时实例的线程可能仍在等待数据库响应，不阻塞汇总
+        executor.shutdown(wait=False)
+    
+    totals = {key: sum(host[key] for host in hosts) for key in SUMMARY_KEYS}
+    failed = [host['alias'] for host in hosts if not host['passed']]
+    timed_out = [host['alias'] for host in hosts if host['timed_out']]
+    output_file = os.path.join(output_dir, "database_validation_fleet.md")
+    _write_fleet_report(output_file, hosts, totals)
+    
+    return {
+        'hosts': hosts,
+        'passed': not failed and bool(hosts),
+        'failed': failed,
+        'timed_out': timed_out,
+        'totals': totals,
+        'seconds': round(time.perf_counter() - started, 3),
+        'output': output_file
+    }
+
+
+def _write_fleet_report(output_file: str, hosts: List[Dict], totals: Dict):
+    """多实例校验的汇总报告，每个实例一行"""
+    with open(output_file, 'w', encoding='utf-8') as md_file:
+        md_file.write("# 多实例数据库结构校验汇总\n\n")
+        md_file.write(f"**校验时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        md_file.write(f"**实例数**: {len(hosts)}，**未通过**: {sum(1 for host in hosts if not host['passed'])}\n\n")
+        md_file.write("| 别名 | 地址 | 状态 | 缺失库 | 缺失表 | 缺失字段 | 类型不匹配 | 耗时(s) | 报告 |\n")
+        md_file.write("|-----|-----|-----|-------|-------|---------|----------|--------|-----|\n")
+        for host in hosts:
+            if host['timed_out']:
+                status = f"⏱️ 超时 {host['error']}"
+            else:
+                status = '✅' if host['passed'] else f"❌ {host['error']}" if host['error'] else '⚠️'
+            address = f"{host['host']}:{host['port']}" if host['host'] else '-'
+            md_file.write(
+                f"| {host['alias']} | {address} | {status} | {host['missing_databases']} | "
+                f"{host['missing_tables']} | {host['missing_columns']} | {host['mismatched_columns']} | "
+                f"{host['seconds']} | {os.path.basename(host['output']) if host['output'] else '-'} |\n"
+            )
+        md_file.write(
+            f"| **合计** | | | {totals['missing_databases']} | {totals['missing_tables']} | "
+            f"{totals['missing_columns']} | {totals['mismatched_columns']} | | |\n"
+        )
+        md_file.write("\n---\n*报告生成完成*")
@@ -1,33 +1,123 @@
+import os
 import re
+import copy
+import mmap
+import time
+import hashlib
 import logging
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.services.sqlLexer import SQLLexer, find_paren_end, normalize_statement, split_top_level
+from app.services.schemaModel import scan_column_type
+from app.services.tableDefinitions import new_definition, normalize_default
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 解析器版本，解析结果的格式或语义变化时递增，使已有的解析缓存失效
+PARSER_VERSION = "5"
+
+# 流式读取时每次读取的字符数
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# 并行解析单个文件时每个分段的最小字节数，更小的文件直接串行解析
+MIN_RANGE_SIZE = 32 * 1024 * 1024
+
+# 候选分段边界：分号后紧跟换行（mysqldump 的每条语句都以此结尾）
+_BOUNDARY_HINT = re.compile(rb';\r?\n')
+
+# 只有这些语句需要完整解析，其余语句无需做注释清理
+_DDL_PREFIX = re.compile(r'(?:USE|CREATE|ALTER|DROP|RENAME)\s', re.IGNORECASE)
+_DDL_PREFIX_BYTES = re.compile(_DDL_PREFIX.pattern.encode('ascii'), re.IGNORECASE)
+
+# 字段定义开头的字段名（可带反引号或双引号）
+_COLUMN_NAME = re.compile(r'([`"]?)(\w+)\1\s+')
+
+# 表定义中的索引与约束子句：[CONSTRAINT [名称]] 类型 [索引名] [USING 方法] (字段, ...)
+_TABLE_CONSTRAINT = re.compile(
+    r'(?:CONSTRAINT(?:\s+(?!(?:PRIMARY|UNIQUE|FOREIGN|CHECK)\b)(?P<sq>[`"]?)(?P<symbol>[\w$]+)(?P=sq))?\s*)?'
+    r'(?P<kind>PRIMARY\s+KEY|UNIQUE(?:\s+(?:KEY|INDEX))?|(?:FULLTEXT|SPATIAL)(?:\s+(?:KEY|INDEX))?'
+    r'|KEY|INDEX|FOREIGN\s+KEY|CHECK)(?![\w$])'
+    r'(?:\s+(?!USING\b)(?P<nq>[`"]?)(?P<name>[\w$]+)(?P=nq))?(?:\s+USING\s+\w+)?\s*',
+    re.IGNORECASE
+)
+# 索引中的一个字段：字段名[(前缀长度)] [ASC|DESC]，函数索引的表达式不匹配
+_KEY_PART = re.compile(r'([`"]?)([\w$]+)\1(?:\s*\(\s*\d+\s*\))?(?:\s+(?:ASC|DESC))?$', re.IGNORECASE)
+_REFERENCES = re.compile(
+    r'\s*REFERENCES\s+(?:([`"]?)([\w$]+)\1\s*\.\s*)?([`"]?)([\w$]+)\3\s*', re.IGNORECASE
+)
+# 表选项：引号内的文本先去掉，避免 COMMENT 中的内容被误认
+_QUOTED_TEXT = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_TABLE_ENGINE = re.compile(r'\bENGINE\s*=?\s*([`"]?)(\w+)\1', re.IGNORECASE)
+_TABLE_CHARSET = re.compile(r'\b(?:CHARSET|CHARACTER\s+SET)\s*=?\s*(\w+)', re.IGNORECASE)
+_TABLE_COLLATE = re.compile(r'\bCOLLATE\s*=?\s*(\w+)', re.IGNORECASE)
+
+# 标识符：反引号、双引号或不带引号
+_IDENTIFIER = re.compile(r'\s*(?:`((?:[^`]|``)+)`|"((?:[^"]|"")+)"|([\w$]+))')
+_QUALIFIER_DOT = re.compile(r'\s*\.')
+# 迁移语句的开头，其后为表名（或库名、索引名）
+_ALTER_TABLE = re.compile(r'ALTER\s+(?:(?:ONLINE|IGNORE)\s+)*TABLE\s', re.IGNORECASE)
+_DROP_TABLE = re.compile(r'DROP\s+(TEMPORARY\s+)?TABLES?\s+(?:IF\s+EXISTS\s)?', re.IGNORECASE)
+_CREATE_TABLE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s)?', re.IGNORECASE)
+_CREATE_DATABASE = re.compile(r'CREATE\s+(?:DATABASE|SCHEMA)\s+(?:IF\s+NOT\s+EXISTS\s)?', re.IGNORECASE)
+_DROP_DATABASE = re.compile(r'DROP\s+(?:DATABASE|SCHEMA)\s+(?:IF\s+EXISTS\s)?', re.IGNORECASE)
+_RENAME_TABLE = re.compile(r'RENAME\s+TABLES?\s', re.IGNORECASE)
+_CREATE_INDEX = re.compile(r'CREATE\s+(?:(UNIQUE|FULLTEXT|SPATIAL)\s+)?INDEX\s', re.IGNORECASE)
+_DROP_INDEX = re.compile(r'DROP\s+INDEX\s', re.IGNORECASE)
+# ALTER TABLE 中以逗号分隔的每个操作
+_ALTER_ACTION = re.compile(r'(ADD|MODIFY|CHANGE|ALTER|DROP|RENAME)(?:\s+(COLUMN))?(?![\w$])\s*', re.IGNORECASE)
+_ALTER_DROP_KEY = re.compile(r'(PRIMARY\s+KEY|FOREIGN\s+KEY|INDEX|KEY|CHECK|CONSTRAINT)(?![\w$])', re.IGNORECASE)
+_ALTER_DEFAULT = re.compile(r'\s*(?:SET\s+DEFAULT\s+(.+)|DROP\s+DEFAULT)\s*$', re.IGNORECASE | re.DOTALL)
+_TABLE_OPTION = re.compile(r'(?:DEFAULT\s+)?(?:ENGINE|CHARSET|CHARACTER\s+SET|COLLATE|CONVERT\s+TO)(?![\w$])',
+                           re.IGNORECASE)
+_KEYWORD_TO = re.compile(r'\s+(?:TO|AS)(?![\w$])', re.IGNORECASE)
+_USING_ON = re.compile(r'(?:\s+USING\s+\w+)?\s+ON(?![\w$])', re.IGNORECASE)
+# 字段定义末尾的位置子句
+_COLUMN_POSITION = re.compile(r'\s+(?:(FIRST)|AFTER\s+[`"]?([\w$]+)[`"]?)\s*$', re.IGNORECASE)
+
+
 class MySQLSchemaParser:
+    # 需要解析的语句前缀，schema_only 模式下其余语句直接跳过
+    STATEMENT_KEYWORDS = ('USE', 'CREATE', 'ALTER', 'DROP', 'RENAME')
+
     def __init__(self):
         self.current_database = None
         self.schema_dict = {}
+        # {database: {table: 表定义}}，索引、主键、外键、可空、默认值等，见 tableDefinitions
+        self.table_definitions = {}
         
-    def parse_sql_file(self, file_path: str) -> Dict:
+    def parse_sql_file(self, file_path: str, streaming: bool = False,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, schema_only: bool = True,
+                       use_mmap: bool = False) -> Dict:
         """
         解析SQL文件，返回数据库结构字典
+
+        Args:
+            file_path: SQL文件路径
+            streaming: 是否按块流式读取（适用于GB级的dump文件）
+            chunk_size: 流式读取时每块的字符数
+            schema_only: 只切分建库建表相关语句，INSERT 等数据语句直接扫描跳过
+            use_mmap: 以只读方式 mmap 文件并直接在字节上切分语句，
+                      只有需要解析的 USE/CREATE 语句才解码为 str
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                sql_content = file.read()
-            
-            # 预处理：移除注释和多余的空格
-            cleaned_sql = self._preprocess_sql(sql_content)
-            
-            # 分割SQL语句
-            statements = self._split_sql_statements(cleaned_sql)
+            if use_mmap:
+                statements = self.iter_mmap_statements(file_path, schema_only)
+            elif streaming:
+                statements = self.iter_sql_statements(file_path, chunk_size, schema_only)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    sql_content = file.read()
+                
+                # 分割SQL语句（按区间惰性切片，不额外保存整份语句列表）
+                lexer = self._create_lexer(schema_only)
+                statements = (sql_content[start:end] for start, end in lexer.split(sql_content))
             
             # 解析每个语句
             for statement in statements:
-                self._parse_statement(statement.strip())
+                self._parse_statement(statement)
             
             return self.schema_dict
             
@@ -38,192 +128,1004 @@ class MySQLSchemaParser:
             logger.error(f"解析SQL文件时出错: {e}")
             return {}
     
-    def _preprocess_sql(self, sql_content: str) -> str:
+    def iter_sql_statements(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            schema_only: bool = False) -> Iterator[str]:
         """
-        预处理SQL内容，移除注释和多余空格
+        按块读取SQL文件，逐条产出完整语句（原始文本，不含分隔符）
+        schema_only 时只产出 STATEMENT_KEYWORDS 开头的语句
         """
-        # 移除单行注释
-        sql_content = re.sub(r'--.*$', '', sql_content, flags=re.MULTILINE)
-        # 移除多行注释
-        sql_content = re.sub(r'/\*.*?\*/', '', sql_content, flags=re.DOTALL)
-        # 移除多余的空格和换行
-        sql_content = re.sub(r'\s+', ' ', sql_content)
-        return sql_content
+        lexer = self._create_lexer(schema_only)
+        with open(file_path, 'r', encoding='utf-8') as file:
+            while True:
+                # 超长语句跨多块时按缓冲区大小扩大读取量，避免反复拼接缓冲区
+                chunk = file.read(max(chunk_size, lexer.buffered))
+                if not chunk:
+                    break
+                for _, _, statement in lexer.feed(chunk):
+                    yield statement
+        for _, _, statement in lexer.close():
+            yield statement
     
-    def _split_sql_statements(self, sql_content: str) -> List[str]:
+    def iter_mmap_statements(self, file_path: str, schema_only: bool = True) -> Iterator[str]:
         """
-        分割SQL语句，以分号作为分隔符
+        mmap 方式读取SQL文件，在字节上切分语句，只解码需要解析的语句
         """
-        # 使用分号分割，但要注意避免分割字符串中的分号
-        statements = []
-        current_statement = ""
-        in_string = False
-        string_char = None
+        if os.path.getsize(file_path) == 0:
+            return
         
-        for char in sql_content:
-            if char in ['"', "'", '`']:
-                if not in_string:
-                    in_string = True
-                    string_char = char
-                elif char == string_char:
-                    in_string = False
-                    string_char = None
+        lexer = self._create_lexer(schema_only, binary=True)
+        with open(file_path, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from self._decode_statements(data, lexer, schema_only)
+    
+    def parse_sql_file_incremental(self, file_path: str,
+                                   statement_index: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+        """
+        增量解析：记录每条建库建表语句的偏移与指纹，再次解析时指纹未变化的语句直接复用
+        上一次的解析事件，只有新增或修改的语句才重新执行 _parse_create_table 等解析，
+        然后按顺序重放事件修补结构字典（语句的删除、移动同样生效）
+        
+        Args:
+            file_path: SQL文件路径
+            statement_index: 上一次返回的语句指纹索引
             
-            current_statement += char
+        Returns:
+            Tuple[Dict, Dict]: 结构字典, 新的语句指纹索引
+                {'version': 解析器版本, 'statements': [{'start', 'end', 'hash', 'event'}]}
+        """
+        previous = {}
+        if statement_index and statement_index.get('version') == PARSER_VERSION:
+            previous = {item['hash']: item['event'] for item in statement_index.get('statements', [])}
+        
+        statements = []
+        reused = 0
+        try:
+            if os.path.getsize(file_path) > 0:
+                lexer = self._create_lexer(True, binary=True)
+                with open(file_path, 'rb') as file, \
+                        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    for start, end in lexer.split(data):
+                        raw = data[start:end]
+                        digest = hashlib.sha1(raw).hexdigest()
+                        if digest in previous:
+                            event = previous[digest]
+                            reused += 1
+                        else:
+                            event = self._statement_event(raw.decode('utf-8'))
+                        statements.append({'start': start, 'end': end, 'hash': digest, 'event': event})
+                        if event:
+                            self._apply_event(event)
+            
+            logger.info(f"增量解析 {file_path}: 共 {len(statements)} 条语句，复用 {reused} 条")
+            return self.schema_dict, {'version': PARSER_VERSION, 'statements': statements}
             
-            if char == ';' and not in_string:
-                statements.append(current_statement.strip())
-                current_statement = ""
+        except FileNotFoundError:
+            logger.error(f"文件未找到: {file_path}")
+            return {}, {}
+        except Exception as e:
+            logger.error(f"解析SQL文件时出错: {e}")
+            return {}, {}
+    
+    def parse_sql_file_parallel(self, file_path: str, max_workers: Optional[int] = None,
+                                schema_only: bool = True, min_range_size: int = MIN_RANGE_SIZE) -> Dict:
+        """
+        将单个大文件按语句边界切成多个字节区间，分发到进程池并行解析
         
-        # 添加最后一个语句（如果没有分号结尾）
-        if current_statement.strip():
-            statements.append(current_statement.strip())
+        各区间只产出与上下文无关的事件（USE/建表/迁移），归并时按区间顺序重放事件，
+        从 USE 语句重建 current_database，结果与串行解析完全一致。
+        候选边界取分号+换行处，并用前一区间实际扫描到的位置校验；
+        若候选边界落在字符串或 DELIMITER 块内，则从实际位置串行重新解析该区间
         
-        return statements
+        Args:
+            file_path: SQL文件路径
+            max_workers: 进程数，默认为CPU核数
+            schema_only: 同 parse_sql_file
+            min_range_size: 每个区间的最小字节数
+        """
+        try:
+            size = os.path.getsize(file_path)
+            workers = min(max_workers or os.cpu_count() or 1, size // max(min_range_size, 1))
+            if workers <= 1:
+                return self.parse_sql_file(file_path, schema_only=schema_only, use_mmap=True)
+            
+            boundaries = self._plan_ranges(file_path, workers)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    _parse_range_worker, repeat(file_path), boundaries[:-1], boundaries[1:],
+                    repeat(';'), repeat(schema_only)
+                ))
+            
+            result = results[0]
+            self.apply_events(result['events'])
+            for index in range(1, len(results)):
+                if result['position'] == boundaries[index] and result['delimiter'] == ';':
+                    result = results[index]
+                else:
+                    logger.warning(
+                        f"分段边界 {boundaries[index]} 不在语句之间，"
+                        f"从 {result['position']} 起串行重新解析该分段"
+                    )
+                    result = _parse_range_worker(
+                        file_path, result['position'], boundaries[index + 1],
+                        result['delimiter'], schema_only
+                    )
+                self.apply_events(result['events'])
+            
+            return self.schema_dict
+            
+        except FileNotFoundError:
+            logger.error(f"文件未找到: {file_path}")
+            return {}
+        except Exception as e:
+            logger.error(f"解析SQL文件时出错: {e}")
+            return {}
+    
+    def _plan_ranges(self, file_path: str, parts: int) -> List[int]:
+        """
+        按字节均分文件，并把每个切点后移到最近的候选语句边界，返回 [0, b1, ..., size]
+        """
+        with open(file_path, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            boundaries = [0]
+            for index in range(1, parts):
+                nominal = max(size * index // parts, boundaries[-1])
+                match = _BOUNDARY_HINT.search(data, nominal)
+                if not match:
+                    break
+                boundary = match.start() + 1
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+            boundaries.append(size)
+        return boundaries
+    
+    def apply_events(self, events: List[Tuple]):
+        """按顺序应用 statement_events 等产出的事件"""
+        for event in events:
+            self._apply_event(event)
+    
+    def statement_events(self, file_path: str) -> List[Tuple]:
+        """
+        只把文件中的建库建表与迁移语句解析为事件，不应用到结构字典；
+        事件与上下文无关，可在进程池中提取后再按文件顺序 apply_events
+        """
+        if os.path.getsize(file_path) == 0:
+            return []
+        lexer = self._create_lexer(True, binary=True)
+        with open(file_path, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            events = [self._statement_event(statement) for statement in self._decode_statements(data, lexer, True)]
+        return [event for event in events if event]
+    
+    def _decode_statements(self, data, lexer: SQLLexer, schema_only: bool,
+                           start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        for begin, end in lexer.split(data, start, stop):
+            if schema_only or _DDL_PREFIX_BYTES.match(data, begin, end):
+                yield data[begin:end].decode('utf-8')
+    
+    def _create_lexer(self, schema_only: bool, binary: bool = False, delimiter: str = ';') -> SQLLexer:
+        return SQLLexer(
+            delimiter=delimiter,
+            keywords=self.STATEMENT_KEYWORDS if schema_only else None,
+            binary=binary
+        )
+    
+    def _split_sql_statements(self, sql_content: str) -> List[str]:
+        """
+        分割SQL语句，按当前分隔符切分并跳过字符串、标识符和注释中的分隔符
+        """
+        return [sql_content[start:end] for start, end in SQLLexer().split(sql_content)]
     
     def _parse_statement(self, statement: str):
         """
         解析单个SQL语句
         """
+        event = self._statement_event(statement)
+        if event:
+            self._apply_event(event)
+    
+    def _statement_event(self, statement: str) -> Optional[Tuple]:
+        """
+        把语句解析为与上下文无关的事件，由 _apply_event 按顺序应用到结构字典：
+            ('use', database)
+            ('create_database', database)
+            ('table', 表, {column: type}, 表定义)
+            ('alter', 表, [操作, ...])      ALTER TABLE、CREATE INDEX、DROP INDEX
+            ('drop_table', [表, ...])
+            ('rename_table', [(旧表, 新表), ...])
+            ('drop_database', database)
+        其中 表 为 (库名, 表名)，未限定库名（不是 db.table 写法）时库名为 None，应用时取当前数据库
+        ALTER 的操作只切分为 (种类, 文本...)，字段与索引定义在应用时才解析（未命名索引的名称取决于表中已有的索引）
+        并行解析时各分段只产出事件，归并时再按顺序重建 current_database
+        """
+        if not _DDL_PREFIX.match(statement):
+            return None
+        
+        statement = normalize_statement(statement)
         statement_upper = statement.upper()
         
         # 解析 USE 语句
         if statement_upper.startswith('USE '):
-            self._parse_use_statement(statement)
+            return self._parse_use_statement(statement)
         
         # 解析 CREATE TABLE 语句
         elif statement_upper.startswith('CREATE TABLE'):
-            self._parse_create_table(statement)
+            return self._parse_create_table(statement)
+        
+        # 解析 CREATE DATABASE 语句：只登记数据库，不切换当前数据库
+        elif _CREATE_DATABASE.match(statement):
+            name = _read_identifier(statement, _CREATE_DATABASE.match(statement).end())
+            return ('create_database', name[0]) if name else None
+        
+        # 迁移语句：按顺序重放到结构字典上
+        elif _ALTER_TABLE.match(statement):
+            return self._parse_alter_table(statement)
+        elif _DROP_TABLE.match(statement):
+            return self._parse_drop_table(statement)
+        elif _RENAME_TABLE.match(statement):
+            return self._parse_rename_table(statement)
+        elif _DROP_DATABASE.match(statement):
+            name = _read_identifier(statement, _DROP_DATABASE.match(statement).end())
+            return ('drop_database', name[0]) if name else None
+        elif _CREATE_INDEX.match(statement) or _DROP_INDEX.match(statement):
+            return self._parse_index_statement(statement)
         
-        # 其他语句（如数据初始化）可以在这里添加处理逻辑
-        # 但根据要求，我们只关注建库建表语句
+        # 其他语句（如数据初始化）无需处理
+        return None
     
-    def _parse_use_statement(self, statement: str):
+    def _apply_event(self, event: Tuple):
         """
-        解析 USE database 语句
+        将事件应用到当前结构字典
         """
-        match = re.match(r'USE\s+([`"]?)(\w+)\1', statement, re.IGNORECASE)
-        if match:
-            self.current_database = match.group(2)
+        if event[0] == 'use':
+            self.current_database = event[1]
             logger.info(f"切换到数据库: {self.current_database}")
             
             # 初始化数据库结构
             if self.current_database not in self.schema_dict:
                 self.schema_dict[self.current_database] = {}
+        
+        elif event[0] == 'create_database':
+            self.schema_dict.setdefault(event[1], {})
+            logger.info(f"创建数据库: {event[1]}")
+        
+        elif event[0] == 'table':
+            _, (database, table_name), columns, definition = event
+            database = database or self.current_database
+            if not database:
+                logger.warning("发现 CREATE TABLE 语句但未指定数据库，跳过处理")
+                return
+            
+            # 初始化表结构；限定了库名的表所在的库不需要先 USE
+            tables = self.schema_dict.setdefault(database, {})
+            if table_name not in tables:
+                tables[table_name] = {}
+            tables[table_name].update(columns)
+            
+            definitions = self.table_definitions.setdefault(database, {})
+            if table_name not in definitions:
+                definitions[table_name] = new_definition()
+            # 事件可能被增量解析的语句索引复用，之后的 ALTER 会原地修改表定义，因此合并副本
+            _merge_definition(definitions[table_name], copy.deepcopy(definition))
+            
+            logger.info(f"解析表 {database}.{table_name} 完成")
+        
+        elif event[0] == 'alter':
+            self._apply_alter(event[1], event[2])
+        
+        elif event[0] == 'drop_table':
+            for table_ref in event[1]:
+                database = self._resolve_database(table_ref, 'DROP TABLE')
+                if database is None:
+                    continue
+                if self.schema_dict.get(database, {}).pop(table_ref[1], None) is not None:
+                    logger.info(f"删除表 {database}.{table_ref[1]}")
+                self.table_definitions.get(database, {}).pop(table_ref[1], None)
+        
+        elif event[0] == 'rename_table':
+            for old_ref, new_ref in event[1]:
+                database = self._resolve_database(old_ref, 'RENAME TABLE')
+                if database is not None:
+                    self._rename_table(database, old_ref[1], new_ref)
+        
+        elif event[0] == 'drop_database':
+            self.schema_dict.pop(event[1], None)
+            self.table_definitions.pop(event[1], None)
+            if self.current_database == event[1]:
+                self.current_database = None
+            logger.info(f"删除数据库 {event[1]}")
+    
+    def _resolve_database(self, table_ref, statement_name: str) -> Optional[str]:
+        """表所在的库：限定的库名或当前数据库，都没有时返回 None"""
+        database = table_ref[0] or self.current_database
+        if not database:
+            logger.warning(f"发现 {statement_name} 语句但未指定数据库，跳过处理")
+        return database
+    
+    def _rename_table(self, database: str, old_name: str, new_ref):
+        """重命名表，新表名限定了其他库时移动到该库"""
+        tables = self.schema_dict.get(database, {})
+        if old_name not in tables:
+            logger.warning(f"重命名的表 {database}.{old_name} 不存在，跳过处理")
+            return
+        new_database = new_ref[0] or self.current_database or database
+        new_name = new_ref[1]
+        definitions = self.table_definitions.get(database, {})
+        if new_database == database:
+            _rename_key(tables, old_name, new_name)
+            if old_name in definitions:
+                _rename_key(definitions, old_name, new_name)
         else:
-            logger.warning(f"无法解析 USE 语句: {statement}")
+            self.schema_dict.setdefault(new_database, {})[new_name] = tables.pop(old_name)
+            if old_name in definitions:
+                self.table_definitions.setdefault(new_database, {})[new_name] = definitions.pop(old_name)
+        logger.info(f"重命名表 {database}.{old_name} -> {new_database}.{new_name}")
     
-    def _parse_create_table(self, statement: str):
+    def _apply_alter(self, table_ref, operations: List):
+        """按顺序把 ALTER TABLE 的各个操作应用到表的字段与表定义"""
+        database = self._resolve_database(table_ref, 'ALTER TABLE')
+        if database is None:
+            return
+        table_name = table_ref[1]
+        tables = self.schema_dict.get(database, {})
+        if table_name not in tables:
+            logger.warning(f"修改的表 {database}.{table_name} 不存在，跳过处理")
+            return
+        columns = tables[table_name]
+        definitions = self.table_definitions.setdefault(database, {})
+        definition = definitions.setdefault(table_name, new_definition())
+        
+        rename_to = None
+        for operation in operations:
+            action = operation[0]
+            if action == 'add':
+                # ADD 后不是索引或约束时为字段
+                constraint = _TABLE_CONSTRAINT.match(operation[1])
+                if constraint and self._parse_constraint(constraint, operation[1], table_name, definition):
+                    _primary_key_not_null(definition)
+                else:
+                    self._alter_column(columns, definition, None, operation[1])
+            elif action == 'add_column':
+                self._alter_column(columns, definition, None, operation[1])
+            elif action == 'modify_column':
+                name = _read_identifier(operation[1])
+                if name:
+                    self._alter_column(columns, definition, name[0], operation[1])
+            elif action == 'change_column':
+                self._alter_column(columns, definition, operation[1], operation[2])
+            elif action == 'rename_column':
+                old_name = _find_name(columns, operation[1])
+                if old_name is None:
+                    logger.warning(f"重命名的字段 {table_name}.{operation[1]} 不存在，跳过处理")
+                    continue
+                _rename_key(columns, old_name, operation[2])
+                if old_name in definition['columns']:
+                    _rename_key(definition['columns'], old_name, operation[2])
+                _rename_key_column(definition, old_name, operation[2])
+            elif action == 'drop_column':
+                column_name = _find_name(columns, operation[1])
+                if column_name is None:
+                    logger.warning(f"删除的字段 {table_name}.{operation[1]} 不存在，跳过处理")
+                    continue
+                del columns[column_name]
+                definition['columns'].pop(column_name, None)
+                _drop_key_column(definition, column_name)
+            elif action == 'set_default':
+                column_name = _find_name(definition['columns'], operation[1])
+                if column_name is not None:
+                    definition['columns'][column_name]['default'] = normalize_default(operation[2])
+            elif action == 'drop_primary_key':
+                definition['primary_key'] = []
+            elif action in ('drop_index', 'drop_foreign_key', 'drop_constraint'):
+                if action == 'drop_index' and operation[1].upper() == 'PRIMARY':
+                    definition['primary_key'] = []
+                    continue
+                groups = {'drop_index': ('indexes',), 'drop_foreign_key': ('foreign_keys',),
+                          'drop_constraint': ('foreign_keys', 'indexes')}[action]
+                for group in groups:
+                    name = _find_name(definition[group], operation[1])
+                    if name is not None:
+                        del definition[group][name]
+                        break
+                else:
+                    logger.warning(f"删除的索引或约束 {table_name}.{operation[1]} 不存在，跳过处理")
+            elif action == 'rename_index':
+                name = _find_name(definition['indexes'], operation[1])
+                if name is not None:
+                    _rename_key(definition['indexes'], name, operation[2])
+            elif action == 'options':
+                self._parse_table_options(operation[1], definition)
+            elif action == 'rename_table':
+                rename_to = operation[1]
+        
+        logger.info(f"修改表 {database}.{table_name} 完成")
+        # 与 MySQL 一致，RENAME 在其他操作之后生效
+        if rename_to is not None:
+            self._rename_table(database, table_name, rename_to)
+    
+    def _alter_column(self, columns: Dict, definition: Dict, old_name: Optional[str], column_def: str):
         """
-        解析 CREATE TABLE 语句
+        ADD（old_name 为 None）、MODIFY、CHANGE 字段：按新的定义替换类型与属性，
+        FIRST/AFTER 调整字段位置，未指定时新增的字段在最后、修改的字段保持原位置
         """
-        if not self.current_database:
-            logger.warning("发现 CREATE TABLE 语句但未指定数据库，跳过处理")
+        if old_name is not None:
+            found = _find_name(columns, old_name)
+            if found is None:
+                logger.warning(f"修改的字段 {old_name} 不存在，跳过处理")
+                return
+            old_name = found
+        
+        position = _COLUMN_POSITION.search(column_def)
+        if position:
+            column_def = column_def[:position.start()]
+        parsed = self._parse_column(column_def, definition)
+        if parsed is None:
             return
+        new_name, column_type = parsed
         
-        # 提取表名
-        table_match = re.search(
-            r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([`"]?)(\w+)\1',
-            statement, 
-            re.IGNORECASE
-        )
+        if old_name is not None and old_name != new_name:
+            definition['columns'].pop(old_name, None)
+            _rename_key_column(definition, old_name, new_name)
+        _primary_key_not_null(definition)
         
-        if not table_match:
-            logger.warning(f"无法解析表名: {statement[:100]}...")
+        if position is None and old_name is not None:
+            # 原位置替换
+            items = [(new_name, column_type) if name == old_name else (name, value) for name, value in columns.items()]
+        elif position is None:
+            columns[new_name] = column_type
             return
+        else:
+            items = [(name, value) for name, value in columns.items() if name not in (old_name, new_name)]
+            if position.group(1):
+                items.insert(0, (new_name, column_type))
+            else:
+                after = next((index for index, (name, _) in enumerate(items)
+                              if name.lower() == position.group(2).lower()), len(items) - 1)
+                items.insert(after + 1, (new_name, column_type))
+        columns.clear()
+        columns.update(items)
+    
+    def _parse_use_statement(self, statement: str) -> Optional[Tuple]:
+        """
+        解析 USE database 语句
+        """
+        name = _read_identifier(statement, 3)
+        if name:
+            return ('use', name[0])
+        
+        logger.warning(f"无法解析 USE 语句: {statement}")
+        return None
+    
+    def _parse_create_table(self, statement: str) -> Optional[Tuple]:
+        """
+        解析 CREATE TABLE 语句
+        """
+        # 提取表名，可以是 db.table
+        table = _read_table_name(statement, _CREATE_TABLE.match(statement).end())
         
-        table_name = table_match.group(2)
+        if not table:
+            logger.warning(f"无法解析表名: {statement[:100]}...")
+            return None
         
-        # 初始化表结构
-        if table_name not in self.schema_dict[self.current_database]:
-            self.schema_dict[self.current_database][table_name] = {}
+        table_ref, table_end = table
+        table_name = table_ref[1]
         
-        # 提取字段定义部分
-        column_section_match = re.search(
-            r'\((.*)\)',
-            statement, 
-            re.IGNORECASE | re.DOTALL
-        )
+        # 提取字段定义部分（与表名后第一个左括号匹配的括号内），其后为 ENGINE、CHARSET 等表选项
+        open_at = statement.find('(', table_end)
+        close_at = find_paren_end(statement, open_at) if open_at != -1 else -1
         
-        if not column_section_match:
+        if close_at == -1:
             logger.warning(f"无法找到字段定义部分: {table_name}")
-            return
+            return ('table', table_ref, {}, new_definition())
         
-        column_section = column_section_match.group(1)
+        column_section = statement[open_at + 1:close_at - 1]
         
         # 解析字段
-        self._parse_columns(column_section, table_name)
-        
-        logger.info(f"解析表 {self.current_database}.{table_name} 完成")
+        columns, definition = self._parse_columns(column_section, table_name)
+        self._parse_table_options(statement[close_at:], definition)
+        return ('table', table_ref, columns, definition)
     
-    def _parse_columns(self, column_section: str, table_name: str):
+    def _parse_columns(self, column_section: str, table_name: str) -> Tuple[Dict[str, str], Dict]:
         """
-        解析字段定义
+        解析字段定义，返回 ({column: type}, 表定义)；索引、主键、外键等子句写入表定义
         """
+        columns = {}
+        definition = new_definition()
+        
         # 分割字段定义，考虑嵌套括号（如约束等）
         column_definitions = self._split_column_definitions(column_section)
         
         for col_def in column_definitions:
             col_def = col_def.strip()
-            if not col_def or col_def.upper().startswith(('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY', 'INDEX', 'KEY', 'CONSTRAINT')):
+            if not col_def:
                 continue
             
-            # 解析字段名和类型
-            column_match = re.match(
-                r'([`"]?)(\w+)\1\s+([^(]+?(?:\([^)]+\))?[^,]*)(?:,|$)',
-                col_def, 
-                re.IGNORECASE
-            )
+            constraint = _TABLE_CONSTRAINT.match(col_def)
+            if constraint and self._parse_constraint(constraint, col_def, table_name, definition):
+                continue
             
-            if column_match:
-                column_name = column_match.group(2)
-                column_type = column_match.group(3).split(' ')[0].strip()
-                
-                # 清理类型定义中的额外空格
-                column_type = re.sub(r'\s+', ' ', column_type)
-                
-                self.schema_dict[self.current_database][table_name][column_name] = column_type
-            else:
-                logger.warning(f"无法解析字段定义: {col_def[:50]}...")
+            parsed = self._parse_column(col_def, definition)
+            if parsed is not None:
+                columns[parsed[0]] = parsed[1]
+        
+        _primary_key_not_null(definition)
+        return columns, definition
     
-    def _split_column_definitions(self, column_section: str) -> List[str]:
+    def _parse_column(self, col_def: str, definition: Dict) -> Optional[Tuple[str, str]]:
+        """
+        解析一个字段定义，返回 (字段名, 类型)，字段属性写入表定义；无法解析时返回 None
+        类型只解析一次并统一为规范文本（如 DECIMAL(10,2)、ENUM('a','b')）
+        """
+        column_match = _COLUMN_NAME.match(col_def)
+        scanned = scan_column_type(col_def[column_match.end():]) if column_match else None
+        if scanned is None:
+            logger.warning(f"无法解析字段定义: {col_def[:50]}...")
+            return None
+        column_type, type_end = scanned
+        self._parse_column_attributes(column_match.group(2), col_def[column_match.end() + type_end:], definition)
+        return column_match.group(2), column_type.text
+    
+    def _parse_column_attributes(self, column_name: str, attributes: str, definition: Dict):
         """
-        分割字段定义，处理嵌套括号
+        解析类型之后的字段属性：NOT NULL/NULL、DEFAULT、AUTO_INCREMENT，
+        以及字段上直接声明的 PRIMARY KEY、UNIQUE（与表级子句一样生成主键、唯一索引）
         """
-        definitions = []
-        current_def = ""
-        paren_count = 0
+        column = {'nullable': True, 'default': None, 'auto_increment': False}
+        tokens = [token for token in split_top_level(attributes, ' ') if token]
+        previous = None
+        index = 0
+        while index < len(tokens):
+            word = tokens[index].upper()
+            if word == 'NOT' and index + 1 < len(tokens) and tokens[index + 1].upper() == 'NULL':
+                column['nullable'] = False
+                index += 1
+            elif word == 'NULL':
+                column['nullable'] = True
+            elif word == 'DEFAULT' and index + 1 < len(tokens):
+                index += 1
+                column['default'] = normalize_default(tokens[index])
+            elif word == 'AUTO_INCREMENT':
+                column['auto_increment'] = True
+            elif word == 'PRIMARY' or (word == 'KEY' and previous not in ('PRIMARY', 'UNIQUE')):
+                definition['primary_key'] = [column_name]
+            elif word == 'UNIQUE':
+                name = _index_name(definition, column_name)
+                definition['indexes'][name] = {'columns': [column_name], 'unique': True, 'type': 'BTREE'}
+            previous = word
+            index += 1
+        definition['columns'][column_name] = column
+    
+    def _parse_constraint(self, match, clause: str, table_name: str, definition: Dict) -> bool:
+        """
+        解析表级的 PRIMARY KEY、UNIQUE/KEY/INDEX/FULLTEXT/SPATIAL 索引与 FOREIGN KEY，CHECK 约束忽略；
+        关键字后没有字段列表时（如名为 spatial 的字段）返回 False，按字段定义解析
+        """
+        kind = ' '.join(match.group('kind').upper().split())
+        if kind == 'CHECK':
+            return True
+        if clause[match.end():match.end() + 1] != '(':
+            return False
+        columns_end = find_paren_end(clause, match.end())
+        if columns_end == -1:
+            logger.warning(f"无法解析索引定义: {clause[:50]}...")
+            return True
+        columns = [self._key_column(part) for part in split_top_level(clause[match.end() + 1:columns_end - 1])]
         
-        for char in column_section:
-            if char == '(':
-                paren_count += 1
-            elif char == ')':
-                paren_count -= 1
-            elif char == ',' and paren_count == 0:
-                definitions.append(current_def.strip())
-                current_def = ""
-                continue
-            
-            current_def += char
+        if kind == 'PRIMARY KEY':
+            definition['primary_key'] = columns
+        elif kind == 'FOREIGN KEY':
+            references = _REFERENCES.match(clause, columns_end)
+            ref_end = find_paren_end(clause, references.end()) if references else -1
+            if ref_end == -1:
+                logger.warning(f"无法解析外键定义: {clause[:50]}...")
+                return True
+            # 未命名的外键由 MySQL 按顺序命名为 <表名>_ibfk_<序号>
+            generated = sum(1 for name in definition['foreign_keys'] if name.startswith(f"{table_name}_ibfk_"))
+            name = match.group('symbol') or f"{table_name}_ibfk_{generated + 1}"
+            definition['foreign_keys'][name] = {
+                'columns': columns,
+                'ref_database': references.group(2),
+                'ref_table': references.group(4),
+                'ref_columns': [self._key_column(part)
+                                for part in split_top_level(clause[references.end() + 1:ref_end - 1])],
+            }
+        else:
+            # 未命名的索引由 MySQL 以第一个字段命名，重名时加 _2、_3 后缀
+            name = match.group('name') or match.group('symbol') or _index_name(definition, columns[0])
+            index_type = kind.split()[0] if kind.startswith(('FULLTEXT', 'SPATIAL')) else 'BTREE'
+            definition['indexes'][name] = {'columns': columns, 'unique': kind.startswith('UNIQUE'),
+                                           'type': index_type}
+        return True
+    
+    def _key_column(self, part: str) -> Optional[str]:
+        """索引中的字段名，忽略前缀长度与排序方向；函数索引的表达式返回 None"""
+        match = _KEY_PART.match(part.strip())
+        return match.group(2) if match else None
+    
+    def _parse_table_options(self, options: str, definition: Dict):
+        """解析字段定义之后的 ENGINE 与默认字符集（未写 CHARSET 时由 COLLATE 推断）"""
+        options = _QUOTED_TEXT.sub("''", options)
+        engine = _TABLE_ENGINE.search(options)
+        charset = _TABLE_CHARSET.search(options)
+        collate = _TABLE_COLLATE.search(options)
+        if engine:
+            definition['engine'] = engine.group(2)
+        if charset:
+            definition['charset'] = charset.group(1)
+        elif collate:
+            definition['charset'] = collate.group(1).split('_')[0]
+    
+    def _parse_alter_table(self, statement: str) -> Optional[Tuple]:
+        """解析 ALTER TABLE 语句，按顶层逗号切分为操作列表"""
+        table = _read_table_name(statement, _ALTER_TABLE.match(statement).end())
+        if not table:
+            logger.warning(f"无法解析表名: {statement[:100]}...")
+            return None
+        table_ref, end = table
+        operations = []
+        for clause in split_top_level(statement[end:]):
+            operations.extend(self._parse_alter_operation(clause.strip()))
+        return ('alter', table_ref, operations)
+    
+    def _parse_alter_operation(self, clause: str) -> List[Tuple]:
+        """
+        解析 ALTER TABLE 的一个操作，返回 [(种类, 参数...)]；
+        ALGORITHM、LOCK、COMMENT、分区等不影响结构的操作返回空列表
+        """
+        match = _ALTER_ACTION.match(clause)
+        if not match:
+            return [('options', clause)] if _TABLE_OPTION.match(clause) else []
+        action = match.group(1).upper()
+        column = match.group(2) is not None
+        rest = clause[match.end():]
+        
+        if action == 'ADD':
+            if rest.startswith('('):
+                # ADD (字段定义, ...)
+                end = find_paren_end(rest, 0)
+                return [('add_column', part.strip()) for part in split_top_level(rest[1:end - 1])] if end != -1 else []
+            return [('add_column' if column else 'add', rest)]
+        if action == 'MODIFY':
+            return [('modify_column', rest)]
         
-        # 添加最后一个定义
-        if current_def.strip():
-            definitions.append(current_def.strip())
+        if action == 'DROP' and not column:
+            key = _ALTER_DROP_KEY.match(rest)
+            if key:
+                kind = ' '.join(key.group(1).upper().split())
+                if kind == 'PRIMARY KEY':
+                    return [('drop_primary_key',)]
+                name = _read_identifier(rest, key.end())
+                if not name:
+                    return []
+                if kind == 'FOREIGN KEY':
+                    return [('drop_foreign_key', name[0])]
+                return [('drop_index' if kind in ('INDEX', 'KEY') else 'drop_constraint', name[0])]
+        if action == 'RENAME' and not column:
+            key = re.match(r'(?:INDEX|KEY)(?![\w$])', rest, re.IGNORECASE)
+            if not key:
+                # RENAME [TO | AS] 新表名
+                to = re.match(r'(?:TO|AS)(?![\w$])', rest, re.IGNORECASE)
+                table = _read_table_name(rest, to.end() if to else 0)
+                return [('rename_table', table[0])] if table else []
+            rest = rest[key.end():]
         
-        return definitions
+        name = _read_identifier(rest)
+        if not name:
+            return []
+        if action == 'CHANGE':
+            return [('change_column', name[0], rest[name[1]:].strip())]
+        if action == 'DROP':
+            return [('drop_column', name[0])]
+        if action == 'ALTER':
+            default = _ALTER_DEFAULT.match(rest, name[1])
+            return [('set_default', name[0], default.group(1))] if default else []
+        # RENAME COLUMN / INDEX 旧名称 TO 新名称
+        to = _KEYWORD_TO.match(rest, name[1])
+        new_name = _read_identifier(rest, to.end()) if to else None
+        if not new_name:
+            return []
+        return [('rename_column' if column else 'rename_index', name[0], new_name[0])]
+    
+    def _parse_drop_table(self, statement: str) -> Optional[Tuple]:
+        """DROP TABLE [IF EXISTS] a, b；临时表不在结构中，忽略"""
+        match = _DROP_TABLE.match(statement)
+        if match.group(1):
+            return None
+        tables = [_read_table_name(part) for part in split_top_level(statement[match.end():])]
+        return ('drop_table', [table[0] for table in tables if table])
+    
+    def _parse_rename_table(self, statement: str) -> Optional[Tuple]:
+        """RENAME TABLE a TO b, c TO d"""
+        renames = []
+        for part in split_top_level(statement[_RENAME_TABLE.match(statement).end():]):
+            old_name = _read_table_name(part)
+            to = _KEYWORD_TO.match(part, old_name[1]) if old_name else None
+            new_name = _read_table_name(part, to.end()) if to else None
+            if not new_name:
+                logger.warning(f"无法解析 RENAME TABLE 语句: {statement[:100]}...")
+                return None
+            renames.append((old_name[0], new_name[0]))
+        return ('rename_table', renames)
+    
+    def _parse_index_statement(self, statement: str) -> Optional[Tuple]:
+        """CREATE [UNIQUE|FULLTEXT|SPATIAL] INDEX 名称 ON 表 (...) 与 DROP INDEX 名称 ON 表，转换为 ALTER 事件"""
+        create = _CREATE_INDEX.match(statement)
+        header = create or _DROP_INDEX.match(statement)
+        index_name = _read_identifier(statement, header.end())
+        on = _USING_ON.match(statement, index_name[1]) if index_name else None
+        table_name = _read_table_name(statement, on.end()) if on else None
+        if not table_name:
+            logger.warning(f"无法解析索引语句: {statement[:100]}...")
+            return None
+        if create is None:
+            return ('alter', table_name[0], [('drop_index', index_name[0])])
+        clause = f"{create.group(1) or ''} INDEX `{index_name[0]}` {statement[table_name[1]:].strip()}"
+        return ('alter', table_name[0], [('add', clause.strip())])
+    
+    def _split_column_definitions(self, column_section: str) -> List[str]:
+        """
+        分割字段定义，处理嵌套括号与引号
+        """
+        return split_top_level(column_section, ',')
+
+def _index_name(definition: Dict, column_name: Optional[str]) -> str:
+    """未命名索引的名称：第一个字段名，已存在时依次加 _2、_3 后缀（函数索引为 functional_index）"""
+    base = column_name or 'functional_index'
+    name = base
+    suffix = 2
+    while name in definition['indexes']:
+        name = f"{base}_{suffix}"
+        suffix += 1
+    return name
 
-def parse_mysql_schema(sql_file_path: str) -> Dict:
+def _read_identifier(text: str, pos: int = 0) -> Optional[Tuple[str, int]]:
+    """读取 pos 处（可有前导空白）的标识符，返回 (名称, 结束位置)，引号内的转义引号还原"""
+    match = _IDENTIFIER.match(text, pos)
+    if not match:
+        return None
+    if match.group(1) is not None:
+        return match.group(1).replace('``', '`'), match.end()
+    if match.group(2) is not None:
+        return match.group(2).replace('""', '"'), match.end()
+    return match.group(3), match.end()
+
+def _read_table_name(text: str, pos: int = 0) -> Optional[Tuple[Tuple[Optional[str], str], int]]:
+    """读取表名（可以是 db.table），返回 ((库名或 None, 表名), 结束位置)"""
+    name = _read_identifier(text, pos)
+    if not name:
+        return None
+    dot = _QUALIFIER_DOT.match(text, name[1])
+    qualified = _read_identifier(text, dot.end()) if dot else None
+    if qualified:
+        return (name[0], qualified[0]), qualified[1]
+    return (None, name[0]), name[1]
+
+def _find_name(items: Dict, name: str) -> Optional[str]:
+    """字段、索引名不区分大小写，返回字典中实际的键"""
+    if name in items:
+        return name
+    lowered = name.lower()
+    return next((key for key in items if key.lower() == lowered), None)
+
+def _rename_key(items: Dict, old_name: str, new_name: str):
+    """原位置重命名字典的键，保持其余键的顺序"""
+    renamed = [(new_name if key == old_name else key, value) for key, value in items.items()]
+    items.clear()
+    items.update(renamed)
+
+def _rename_key_column(definition: Dict, old_name: str, new_name: str):
+    """字段改名后同步主键、索引与外键中的字段名"""
+    rename = lambda columns: [new_name if column == old_name else column for column in columns]
+    definition['primary_key'] = rename(definition['primary_key'])
+    for index in definition['indexes'].values():
+        index['columns'] = rename(index['columns'])
+    for foreign_key in definition['foreign_keys'].values():
+        foreign_key['columns'] = rename(foreign_key['columns'])
+
+def _drop_key_column(definition: Dict, column_name: str):
+    """与 MySQL 一致，删除字段时从主键与索引中去掉该字段，不再包含任何字段的索引随之删除"""
+    definition['primary_key'] = [column for column in definition['primary_key'] if column != column_name]
+    for name, index in list(definition['indexes'].items()):
+        index['columns'] = [column for column in index['columns'] if column != column_name]
+        if not index['columns']:
+            del definition['indexes'][name]
+    for name, foreign_key in list(definition['foreign_keys'].items()):
+        if column_name in foreign_key['columns']:
+            del definition['foreign_keys'][name]
+
+def _primary_key_not_null(definition: Dict):
+    """主键字段隐含 NOT NULL"""
+    for column_name in definition['primary_key']:
+        if column_name in definition['columns']:
+            definition['columns'][column_name]['nullable'] = False
+
+def _merge_definition(target: Dict, source: Dict):
+    """同一张表的多条 CREATE TABLE：与字段一样按顺序合并，后出现的定义覆盖同名的字段属性、索引与外键"""
+    target['columns'].update(source['columns'])
+    target['indexes'].update(source['indexes'])
+    target['foreign_keys'].update(source['foreign_keys'])
+    for key in ('primary_key', 'engine', 'charset'):
+        if source[key]:
+            target[key] = source[key]
+
+def parse_mysql_schema(sql_file_path: str, streaming: bool = False) -> Dict:
     """
     主函数：解析MySQL SQL文件并返回数据库结构
     
     Args:
         sql_file_path: SQL文件路径
+        streaming: 是否按块流式读取
         
     Returns:
         Dict: 数据库结构字典，格式为 {database: {table: {column: type}}}
     """
     parser = MySQLSchemaParser()
-    return parser.parse_sql_file(sql_file_path)
+    return parser.parse_sql_file(sql_file_path, streaming=streaming)
+
+def _parse_range_worker(sql_file_path: str, start: int, stop: int, delimiter: str,
+                        schema_only: bool) -> Dict:
+    """
+    进程池任务：解析文件的一个字节区间，返回该区间的事件以及实际停止位置和分隔符，
+    供归并时校验与下一区间的衔接
+    """
+    parser = MySQLSchemaParser()
+    lexer = parser._create_lexer(schema_only, binary=True, delimiter=delimiter)
+    events = []
+    with open(sql_file_path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for statement in parser._decode_statements(data, lexer, schema_only, start, stop):
+            event = parser._statement_event(statement)
+            if event:
+                events.append(event)
+    return {'events': events, 'position': lexer.position, 'delimiter': lexer.delimiter.decode('utf-8')}
+
+def _file_events_worker(sql_file_path: str) -> List[Tuple]:
+    """进程池任务：提取一个文件的事件"""
+    return MySQLSchemaParser().statement_events(sql_file_path)
+
+def _parse_file_worker(sql_file_path: str, options: Dict,
+                       statement_index: Optional[Dict] = None) -> Tuple[Dict, Dict, float, Optional[Dict]]:
+    """
+    进程池任务：每个文件使用独立的解析器，避免 current_database 等状态在文件间串扰
+    传入 statement_index 时走增量解析，并返回新的语句指纹索引
+    返回 (结构, 表定义, 耗时, 语句指纹索引)
+    """
+    started = time.perf_counter()
+    parser = MySQLSchemaParser()
+    if statement_index is None:
+        schema, new_index = parser.parse_sql_file(sql_file_path, **options), None
+    else:
+        schema, new_index = parser.parse_sql_file_incremental(sql_file_path, statement_index)
+    return schema, parser.table_definitions, time.perf_counter() - started, new_index
+
+def merge_schemas(named_schemas: List[Tuple[str, Dict]]) -> Tuple[Dict, List[Dict]]:
+    """
+    按顺序合并多个文件的数据库结构，并检测冲突
+    
+    同一张表在多个文件中定义且字段不一致时记录冲突，保留最先出现的定义
+    （与按顺序执行 CREATE TABLE IF NOT EXISTS 的结果一致）
+    
+    Args:
+        named_schemas: [(文件名, {database: {table: {column: type}}}), ...]
+        
+    Returns:
+        Tuple[Dict, List[Dict]]: 合并后的结构, 冲突列表
+    """
+    merged = {}
+    origins = {}
+    conflicts = []
+    
+    for name, schema in named_schemas:
+        for db_name, tables in schema.items():
+            merged_tables = merged.setdefault(db_name, {})
+            for table_name, columns in tables.items():
+                key = (db_name, table_name)
+                if key not in origins:
+                    origins[key] = name
+                    merged_tables[table_name] = dict(columns)
+                    continue
+                
+                existing = merged_tables[table_name]
+                if existing == columns:
+                    continue
+                
+                differing = sorted(
+                    column for column in set(existing) | set(columns)
+                    if existing.get(column) != columns.get(column)
+                )
+                conflicts.append({
+                    'database': db_name,
+                    'table': table_name,
+                    'kept_from': origins[key],
+                    'ignored_from': name,
+                    'columns': differing
+                })
+                logger.warning(
+                    f"表 {db_name}.{table_name} 在 {origins[key]} 与 {name} 中定义不一致，"
+                    f"保留 {origins[key]} 的定义，差异字段: {differing}"
+                )
+    
+    return merged, conflicts
+
+def merge_definitions(definitions_list: List[Dict]) -> Dict:
+    """按顺序合并多个文件的表定义，与 merge_schemas 一致保留最先出现的表"""
+    merged = {}
+    for definitions in definitions_list:
+        for db_name, tables in definitions.items():
+            merged_tables = merged.setdefault(db_name, {})
+            for table_name, definition in tables.items():
+                merged_tables.setdefault(table_name, definition)
+    return merged
+
+def parse_mysql_schemas(sql_file_paths: List[str], max_workers: Optional[int] = None,
+                        cache=None, **options) -> Dict:
+    """
+    批量解析多个SQL文件：文件分发到进程池并行解析，每个进程使用独立的解析器
+    
+    Args:
+        sql_file_paths: SQL文件路径列表，合并时按此顺序
+        max_workers: 进程数，默认为CPU核数
+        cache: 解析缓存（ParseCache），命中的文件不再解析；
+               未命中的文件使用缓存中的语句指纹索引做增量解析
+        **options: 透传给 parse_sql_file 的参数（streaming/use_mmap 等，增量解析时不使用）
+        
+    Returns:
+        Dict: {
+            'schema': 合并后的结构 {database: {table: {column: type}}},
+            'definitions': 合并后的表定义 {database: {table: 表定义}}，见 tableDefinitions,
+            'files': [{'file': 路径, 'schema': 该文件的结构, 'definitions': 该文件的表定义,
+                       'seconds': 耗时, 'tables': 表数量, 'cached': 是否命中缓存}],
+            'conflicts': 冲突列表,
+            'seconds': 总耗时
+        }
+    """
+    started = time.perf_counter()
+    
+    results = {}
+    if cache is not None:
+        for path in sql_file_paths:
+            lookup_started = time.perf_counter()
+            entry = cache.get(path)
+            if entry is not None:
+                results[path] = (entry['schema'], entry['definitions'],
+                                 time.perf_counter() - lookup_started, True)
+    
+    pending = [path for path in sql_file_paths if path not in results]
+    indexes = [cache.get_statement_index(path) if cache is not None else None for path in pending]
+    workers = min(max_workers or os.cpu_count() or 1, len(pending)) or 1
+    
+    if workers == 1:
+        parsed = [_parse_file_worker(path, options, index) for path, index in zip(pending, indexes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(_parse_file_worker, pending, repeat(options), indexes))
+    
+    for path, (schema, definitions, seconds, statement_index) in zip(pending, parsed):
+        results[path] = (schema, definitions, seconds, False)
+        # 解析失败时返回空字典，不写入缓存
+        if cache is not None and schema:
+            cache.put(path, {'schema': schema, 'definitions': definitions})
+            cache.put_statement_index(path, statement_index)
+    
+    files = []
+    for path in sql_file_paths:
+        schema, definitions, seconds, cached = results[path]
+        tables = sum(len(tables) for tables in schema.values())
+        files.append({
+            'file': path, 'schema': schema, 'definitions': definitions, 'seconds': round(seconds, 3),
+            'tables': tables, 'cached': cached
+        })
+        logger.info(f"解析文件 {path} 完成{'（缓存）' if cached else ''}: {tables} 张表，耗时 {seconds:.3f}s")
+    
+    merged, conflicts = merge_schemas([(item['file'], item['schema']) for item in files])
+    
+    return {
+        'schema': merged,
+        'definitions': merge_definitions([item['definitions'] for item in files]),
+        'files': files,
+        'conflicts': conflicts,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
 
 def print_schema(schema_dict: Dict, indent: int = 0):
     """
@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from app.services.mysqlParser import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# 计算文件哈希时每次读取的字节数
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ParseCache:
+    """
+    SQL解析结果的持久化缓存
+
+    - 以文件内容的 sha256 + 解析器版本作为键，内容不变的文件不会被重复解析
+    - 额外记录 路径 -> (大小, mtime, 哈希) 索引，大小和 mtime 未变化时直接复用哈希，
+      无需重新读取文件；变化时才重新计算哈希
+    - 缓存条目为 json 文件，命中时更新其 mtime，总大小超过上限时按 mtime 淘汰最久未使用的条目
+    - 同时按文件路径保存最近一次解析的语句指纹索引，文件内容变化后用于增量解析
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str = "app/output/.cache", max_bytes: int = 512 * 1024 * 1024,
+                 version: str = PARSER_VERSION):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, file_path: str) -> Optional[Dict]:
+        """返回缓存的解析结果 {'schema': 结构, 'definitions': 表定义}，未命中返回 None"""
+        try:
+            entry = self._entry_path(self.file_hash(file_path))
+            with open(entry, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(entry)
+            return result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取解析缓存失败: {file_path}: {e}")
+            return None
+
+    def put(self, file_path: str, result: Dict):
+        """写入解析结果，并在超过容量上限时淘汰旧条目"""
+        try:
+            entry = self._entry_path(self.file_hash(file_path))
+            self._write_json(entry, result)
+            self._evict()
+        except Exception as e:
+            logger.warning(f"写入解析缓存失败: {file_path}: {e}")
+
+    def get_statement_index(self, file_path: str) -> Dict:
+        """返回该路径上一次解析的语句指纹索引，没有时返回空字典"""
+        try:
+            with open(self._statement_index_path(file_path), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def put_statement_index(self, file_path: str, statement_index: Optional[Dict]):
+        """保存该路径最近一次解析的语句指纹索引"""
+        if not statement_index:
+            return
+        try:
+            self._write_json(self._statement_index_path(file_path), statement_index)
+        except Exception as e:
+            logger.warning(f"写入语句指纹索引失败: {file_path}: {e}")
+
+    def file_hash(self, file_path: str) -> str:
+        """文件内容哈希；大小与 mtime 未变化时直接使用索引中记录的哈希"""
+        return self.file_hashes([file_path])[0]
+
+    def file_hashes(self, file_paths: List[str]) -> List[str]:
+        """批量计算文件哈希，索引只读写一次，适合迁移目录等大量小文件"""
+        with self._lock:
+            index = self._load_index()
+
+        hashes = []
+        updates = {}
+        for file_path in file_paths:
+            stat = os.stat(file_path)
+            key = os.path.realpath(file_path)
+            signature = [stat.st_size, stat.st_mtime_ns]
+            cached = index.get(key)
+            if cached and cached['signature'] == signature:
+                hashes.append(cached['sha256'])
+                continue
+
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+            updates[key] = {'signature': signature, 'sha256': digest.hexdigest()}
+            hashes.append(updates[key]['sha256'])
+
+        if updates:
+            with self._lock:
+                index = self._load_index()
+                index.update(updates)
+                self._write_json(os.path.join(self.cache_dir, self.INDEX_FILE), index)
+        return hashes
+
+    def _entry_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, f"{sha256}-v{self.version}.json")
+
+    def _statement_index_path(self, file_path: str) -> str:
+        key = hashlib.sha1(os.path.realpath(file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"statements-{key}-v{self.version}.json")
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_json(self, path: str, data: Dict):
+        # 先写临时文件再替换，避免并发读取到写了一半的文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name == self.INDEX_FILE or not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                logger.info(f"淘汰解析缓存: {path}")
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,160 @@
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+# 同一阶段内两次进度事件的最小间隔（秒），阶段切换时总是发出
+PROGRESS_EVENT_INTERVAL = 0.5
+
+# 各阶段在总进度中的区间：读取实际结构通常占绝大部分耗时
+STAGE_PERCENT = {
+    'connect': (0, 0),
+    'fetch': (0, 80),
+    'compare': (80, 90),
+    'report': (90, 100),
+    'done': (100, 100),
+}
+
+ProgressCallback = Callable[[Dict], None]
+
+
+class ProgressTracker:
+    """
+    单个实例校验的进度：按阶段（connect → fetch → compare → report → done）统计当前阶段
+    已完成的库、表数与已比较的字段数，计算吞吐量并回调进度事件
+
+    事件为字典 {stage, host, port, databases, tables, databases_done, tables_done,
+    columns_compared, elapsed, tables_per_second, columns_per_second, percent}，
+    databases_done/tables_done 与吞吐量都针对当前阶段（读取或比较）；callback 为空时不做任何事
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback], host: str, port: Optional[int],
+                 databases: int = 0, tables: int = 0, interval: float = PROGRESS_EVENT_INTERVAL):
+        self.callback = callback
+        self.host = host
+        self.port = port
+        self.databases = databases
+        self.tables = tables
+        self.interval = interval
+        self.current = 'connect'
+        self.databases_done = 0
+        self.tables_done = 0
+        self.columns_compared = 0
+        self._started = time.monotonic()
+        self._stage_started = self._started
+        self._stage_columns = 0
+        self._last_event = 0.0
+        # 异步校验中各协程共用，多实例校验中由不同线程的校验器各自持有
+        self._lock = threading.Lock()
+
+    def stage(self, name: str):
+        """进入新阶段，计数清零并立即发出事件"""
+        if self.callback is None:
+            return
+        with self._lock:
+            self.current = name
+            self.databases_done = 0
+            self.tables_done = 0
+            self._stage_started = time.monotonic()
+            self._stage_columns = self.columns_compared
+        self._emit(force=True)
+
+    def advance(self, databases: int = 0, tables: int = 0, columns: int = 0):
+        """当前阶段又完成了若干库、表、字段"""
+        if self.callback is None:
+            return
+        with self._lock:
+            self.databases_done += databases
+            self.tables_done += tables
+            self.columns_compared += columns
+        self._emit()
+
+    def event(self) -> Dict:
+        now = time.monotonic()
+        # 吞吐量按当前阶段计算
+        stage_elapsed = max(now - self._stage_started, 1e-6)
+        low, high = STAGE_PERCENT[self.current]
+        if self.tables:
+            ratio = self.tables_done / self.tables
+        else:
+            ratio = self.databases_done / self.databases if self.databases else 1
+        return {
+            'stage': self.current,
+            'host': self.host,
+            'port': self.port,
+            'databases': self.databases,
+            'tables': self.tables,
+            'databases_done': self.databases_done,
+            'tables_done': self.tables_done,
+            'columns_compared': self.columns_compared,
+            'elapsed': round(now - self._started, 3),
+            'tables_per_second': round(self.tables_done / stage_elapsed, 1),
+            'columns_per_second': round((self.columns_compared - self._stage_columns) / stage_elapsed, 1),
+            'percent': round(low + (high - low) * min(ratio, 1), 1),
+        }
+
+    def _emit(self, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_event < self.interval:
+                return
+            self._last_event = now
+            event = self.event()
+        try:
+            self.callback(event)
+        except Exception:
+            # 进度只用于观察，回调出错不影响校验
+            pass
+
+
+class FleetProgress:
+    """
+    多实例校验的进度：转发每个实例的事件（附加 alias 与整体进度），
+    实例完成时发出 stage=host_done 事件，整体进度为各实例进度的平均值
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback], aliases):
+        self.callback = callback
+        self.hosts = len(aliases)
+        self.hosts_done = 0
+        self._percent = dict.fromkeys(aliases, 0.0)
+        self._done = set()
+        self._lock = threading.Lock()
+
+    def for_alias(self, alias: str) -> Optional[ProgressCallback]:
+        """单个实例校验器使用的回调"""
+        if self.callback is None:
+            return None
+        return lambda event: self._forward(alias, event)
+
+    def host_done(self, alias: str, result: Dict):
+        """每个实例只报告一次完成；超时的实例之后的事件与完成通知都忽略"""
+        if self.callback is None:
+            return
+        with self._lock:
+            if alias in self._done:
+                return
+            self._done.add(alias)
+            self._percent[alias] = 100.0
+            self.hosts_done += 1
+            event = {'stage': 'host_done', 'alias': alias, 'host': result['host'], 'port': result['port'],
+                     'passed': result['passed'], 'error': result['error'], 'seconds': result.get('seconds'),
+                     'hosts': self.hosts, 'hosts_done': self.hosts_done, 'fleet_percent': self._overall()}
+        self._send(event)
+
+    def _forward(self, alias: str, event: Dict):
+        with self._lock:
+            if alias in self._done:
+                return
+            self._percent[alias] = event['percent']
+            event = {**event, 'alias': alias, 'hosts': self.hosts, 'hosts_done': self.hosts_done,
+                     'fleet_percent': self._overall()}
+        self._send(event)
+
+    def _overall(self) -> float:
+        return round(sum(self._percent.values()) / self.hosts, 1) if self.hosts else 100.0
+
+    def _send(self, event: Dict):
+        try:
+            self.callback(event)
+        except Exception:
+            pass
@@ -0,0 +1,435 @@
+import os
+import json
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+from app.services.schemaDiff import SchemaDiff
+from app.services.tableDefinitions import DEFINITION_KINDS, format_definition_value
+
+# 文件缓冲区大小，以及累计多少行后合并写入一次
+WRITE_BUFFER_SIZE = 1 << 20
+FLUSH_LINES = 4096
+
+# 复用同一个编码器，避免每条记录都经过 json.dumps 的参数处理
+_json_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class ReportWriter:
+    """
+    报告输出的基类
+
+    write_reports 按预期结构的顺序依次调用
+    begin → database → table → column → definition → end_table → end_database → end，
+    definition 为该表的表定义差异（索引、主键等，只有比较了表定义时才有），
+    子类只处理当前对象，不持有整份报告；输出先累计到行缓冲，批量写入带大缓冲区的文件
+    summary_only 为 True 时只输出汇总与不一致的对象，省略全部通过的表与字段
+    """
+
+    extension = ''
+
+    def __init__(self, output_file: str, summary_only: bool = False):
+        self.output_file = output_file
+        self.summary_only = summary_only
+        self._file = None
+        self._lines: List[str] = []
+
+    def open(self):
+        self._file = open(self.output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+    def close(self):
+        if self._file is not None:
+            self._flush()
+            self._file.close()
+            self._file = None
+
+    def _emit(self, line: str):
+        self._lines.append(line)
+        if len(self._lines) >= FLUSH_LINES:
+            self._flush()
+
+    def _flush(self):
+        if self._lines:
+            self._file.write(''.join(self._lines))
+            self._lines = []
+
+    def begin(self, meta: Dict, diff: SchemaDiff):
+        pass
+
+    def database(self, db_name: str, status: str, error: Optional[str]):
+        pass
+
+    def table(self, db_name: str, table_name: str, status: str, error: Optional[str]):
+        pass
+
+    def column(self, db_name: str, table_name: str, column_name: str, expected: str,
+               actual: Optional[str], status: str):
+        pass
+
+    def definition(self, db_name: str, table_name: str, kind: str, name: str, status: str,
+                   expected, actual):
+        pass
+
+    def end_table(self, db_name: str, table_name: str):
+        pass
+
+    def end_database(self, db_name: str):
+        pass
+
+    def end(self, summary: Dict):
+        pass
+
+
+def _definition_problem(kind: str, status: str) -> str:
+    """表定义差异的说明，缺失的索引作为性能风险提示"""
+    if kind == 'index' and status == 'missing':
+        return '索引缺失（性能风险）'
+    return f"{DEFINITION_KINDS[kind]}{'缺失' if status == 'missing' else '不一致'}"
+
+
+# summary_only 时MD报告标题下汇总表的列：(汇总项, 列名, 分隔线宽度)，表定义两列只在比较了表定义时输出
+_SUMMARY_COLUMNS = (
+    ('databases', '库', 3), ('missing_databases', '缺失库', 7), ('tables', '表', 3),
+    ('missing_tables', '缺失表', 7), ('columns', '字段', 5), ('missing_columns', '缺失字段', 9),
+    ('mismatched_columns', '类型不匹配', 10), ('missing_indexes', '缺失索引', 9),
+    ('mismatched_definitions', '定义不一致', 10), ('errors', '出错', 5),
+)
+_DEFINITION_SUMMARY_KEYS = ('missing_indexes', 'mismatched_definitions')
+
+
+def _summary_table(summary: Dict, definitions_checked: bool) -> str:
+    """汇总表的MD文本：表头、分隔线与一行计数"""
+    columns = [column for column in _SUMMARY_COLUMNS
+               if definitions_checked or column[0] not in _DEFINITION_SUMMARY_KEYS]
+    return (f"| {' | '.join(label for _, label, _ in columns)} |\n"
+            f"|{'|'.join('-' * width for _, _, width in columns)}|\n"
+            f"| {' | '.join(str(summary[key]) for key, _, _ in columns)} |\n\n")
+
+
+class MarkdownReportWriter(ReportWriter):
+    """MD校验报告；summary_only 时在标题下输出汇总表，库、表标题在出现第一个不一致的对象时才写出"""
+
+    extension = '.md'
+
+    def begin(self, meta: Dict, diff: SchemaDiff):
+        self._emit("# 数据库结构校验报告\n\n")
+        self._emit(f"**校验时间**: {meta['time']}\n")
+        if meta.get('snapshot'):
+            self._emit(f"**结构快照**: {meta['snapshot']}\n\n")
+        else:
+            self._emit(f"**数据库地址**: {meta['host']}:{meta['port']}\n")
+            self._emit(f"**用户名**: {meta['username']}\n\n")
+        if self.summary_only:
+            self._emit(_summary_table(diff.summary(), diff.definitions_checked))
+        self._pending_database = None
+        self._pending_table = None
+        self._table_written = False
+        self._definitions_written = False
+
+    def database(self, db_name: str, status: str, error: Optional[str]):
+        if status == 'error':
+            self._emit(f"## 数据库: {db_name} ❌\n\n")
+            self._emit(f"*校验过程中出错: {error}*\n\n")
+        elif status == 'missing':
+            self._emit(f"## 数据库: {db_name} ❌\n\n")
+            self._emit("*数据库不存在*\n\n")
+        elif self.summary_only:
+            self._pending_database = f"## 数据库: {db_name} ✅\n\n"
+        else:
+            self._emit(f"## 数据库: {db_name} ✅\n\n")
+
+    def table(self, db_name: str, table_name: str, status: str, error: Optional[str]):
+        if status == 'error':
+            self._write_pending()
+            self._emit(f"### 表: {table_name} ❌\n\n")
+            self._emit(f"*校验过程中出错: {error}*\n\n")
+        elif status == 'missing':
+            self._write_pending()
+            self._emit(f"### 表: {table_name} ❌\n\n")
+            self._emit("| 字段名 | 预期类型 | 状态 |\n")
+            self._emit("|-------|---------|------|\n")
+            self._table_written = True
+        else:
+            self._pending_table = f"### 表: {table_name} ✅\n\n"
+            self._pending_columns = ("| 字段名 | 预期类型 | 实际类型 | 状态 |\n"
+                                     "|-------|---------|---------|------|\n")
+            if not self.summary_only:
+                self._write_pending()
+
+    def column(self, db_name: str, table_name: str, column_name: str, expected: str,
+               actual: Optional[str], status: str):
+        if status == 'no_table':
+            self._emit(f"| `{column_name}` | `{expected}` | ❌ 表不存在 |\n")
+        elif status == 'missing':
+            self._write_pending()
+            self._emit(f"| `{column_name}` | `{expected}` | - | ❌ 字段不存在 |\n")
+        elif status == 'mismatch':
+            self._write_pending()
+            self._emit(f"| `{column_name}` | `{expected}` | `{actual}` | ⚠️ 类型不匹配 |\n")
+        elif not self.summary_only:
+            self._emit(f"| `{column_name}` | `{expected}` | `{actual}` | ✅ |\n")
+
+    def definition(self, db_name: str, table_name: str, kind: str, name: str, status: str,
+                   expected, actual):
+        # 表定义差异在字段表格之后单独成表，只列出不一致的项；主键、外键的差异为错误，其余为警告
+        # summary_only 下字段全部一致时不输出空的字段表格
+        columns_written = self._pending_table is None
+        self._write_pending(columns=False)
+        mark = '❌' if kind in ('primary_key', 'foreign_key') else '⚠️'
+        if not self._definitions_written:
+            self._emit("\n" if columns_written else "")
+            self._emit("| 类型 | 名称 | 预期 | 实际 | 状态 |\n")
+            self._emit("|-----|-----|-----|-----|-----|\n")
+            self._definitions_written = True
+        self._emit(f"| {DEFINITION_KINDS[kind]} | `{name}` | `{format_definition_value(kind, expected)}` | "
+                   f"`{format_definition_value(kind, actual)}` | {mark} {_definition_problem(kind, status)} |\n")
+
+    def end_table(self, db_name: str, table_name: str):
+        # 字段表格后空一行；summary_only 下全部通过而未写出的表不输出
+        if self._table_written:
+            self._emit("\n")
+        self._pending_table = None
+        self._table_written = False
+        self._definitions_written = False
+
+    def end_database(self, db_name: str):
+        self._pending_database = None
+
+    def end(self, summary: Dict):
+        self._emit("\n---\n*报告生成完成*")
+
+    def _write_pending(self, columns: bool = True):
+        if self._pending_database is not None:
+            self._emit(self._pending_database)
+            self._pending_database = None
+        if self._pending_table is not None:
+            self._emit(self._pending_table)
+            if columns:
+                self._emit(self._pending_columns)
+            self._pending_table = None
+            self._table_written = True
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """
+    每行一个 JSON 对象，便于 CI 或日志系统逐行处理：
+    首行 type=run，随后 type=database/table/column/definition，多出的表与字段 status=extra，末行 type=summary
+    definition 为表定义差异（kind 为 index、primary_key、foreign_key、nullable、default 等，status 为 missing/mismatch）
+    summary_only 时只输出状态不是 ok 的对象
+    """
+
+    extension = '.jsonl'
+
+    def begin(self, meta: Dict, diff: SchemaDiff):
+        self._diff = diff
+        self._write({'type': 'run', **meta})
+
+    def database(self, db_name: str, status: str, error: Optional[str]):
+        if status != 'ok' or not self.summary_only:
+            self._write({'type': 'database', 'database': db_name, 'status': status, 'error': error})
+
+    def table(self, db_name: str, table_name: str, status: str, error: Optional[str]):
+        if status != 'ok' or not self.summary_only:
+            self._write({'type': 'table', 'database': db_name, 'table': table_name, 'status': status,
+                         'error': error})
+
+    def column(self, db_name: str, table_name: str, column_name: str, expected: str,
+               actual: Optional[str], status: str):
+        # 表不存在时已有 table 记录，不再逐个字段输出
+        if status == 'no_table' or (status == 'ok' and self.summary_only):
+            return
+        self._write({'type': 'column', 'database': db_name, 'table': table_name, 'column': column_name,
+                     'expected': expected, 'actual': actual, 'status': status})
+
+    def definition(self, db_name: str, table_name: str, kind: str, name: str, status: str,
+                   expected, actual):
+        self._write({'type': 'definition', 'database': db_name, 'table': table_name, 'kind': kind, 'name': name,
+                     'expected': expected, 'actual': actual, 'status': status})
+
+    def end(self, summary: Dict):
+        diff = self._diff
+        for db_name in diff.extra_databases:
+            self._write({'type': 'database', 'database': db_name, 'status': 'extra', 'error': None})
+        for db_name, table_name in diff.extra_tables:
+            self._write({'type': 'table', 'database': db_name, 'table': table_name, 'status': 'extra',
+                         'error': None})
+        for db_name, table_name, column_name in diff.extra_columns:
+            self._write({'type': 'column', 'database': db_name, 'table': table_name, 'column': column_name,
+                         'expected': None, 'actual': diff.actual[db_name][table_name][column_name],
+                         'status': 'extra'})
+        self._write({'type': 'summary', 'passed': diff.passed, **summary})
+
+    def _write(self, record: Dict):
+        self._emit(_json_encode(record) + "\n")
+
+
+class JUnitReportWriter(ReportWriter):
+    """
+    JUnit XML，CI 可直接展示：每个库一个 testsuite，每个表一个 testcase，
+    缺失/类型不匹配的字段与表定义差异汇总为该表的 failure，读取出错为 error；库不存在或出错时该库只有一个 testcase
+    """
+
+    extension = '.xml'
+
+    def begin(self, meta: Dict, diff: SchemaDiff):
+        # testsuite 的计数写在开始标签上，预先按库统计，避免缓存整份报告
+        self._counts: Dict[str, List[int]] = {}
+        failed_tables = set(diff.missing_tables)
+        failed_tables.update(key[:2] for key in diff.missing_columns)
+        failed_tables.update(key[:2] for key in diff.mismatched_columns)
+        failed_tables.update(issue[:2] for issue in diff.definition_issues)
+        for db_name, tables in diff.expected.items():
+            if diff.error(db_name) is not None:
+                self._counts[db_name] = [1, 0, 1]
+            elif not diff.database_exists(db_name):
+                self._counts[db_name] = [1, 1, 0]
+            else:
+                self._counts[db_name] = [len(tables), 0, 0]
+        for db_name, table_name in failed_tables:
+            self._counts[db_name][1] += 1
+        for key in diff.errors:
+            if len(key) == 2:
+                self._counts[key[0]][2] += 1
+
+        self._hostname = meta.get('snapshot') or f"{meta['host']}:{meta['port']}"
+        self._timestamp = meta['time'].replace(' ', 'T')
+        totals = [sum(counts[index] for counts in self._counts.values()) for index in range(3)]
+        self._emit('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self._emit(f'<testsuites name="数据库结构校验" tests="{totals[0]}" failures="{totals[1]}" '
+                   f'errors="{totals[2]}">\n')
+        self._failures: List[str] = []
+        self._definition_failures = 0
+
+    def database(self, db_name: str, status: str, error: Optional[str]):
+        tests, failures, errors = self._counts[db_name]
+        self._emit(f'  <testsuite name={quoteattr(db_name)} tests="{tests}" failures="{failures}" '
+                   f'errors="{errors}" hostname={quoteattr(self._hostname)} timestamp="{self._timestamp}">\n')
+        if status == 'error':
+            self._emit(f'    <testcase classname={quoteattr(db_name)} name={quoteattr(db_name)}>\n'
+                       f'      <error message={quoteattr(error)}/>\n    </testcase>\n')
+        elif status == 'missing':
+            self._emit(f'    <testcase classname={quoteattr(db_name)} name={quoteattr(db_name)}>\n'
+                       f'      <failure message="数据库不存在"/>\n    </testcase>\n')
+
+    def table(self, db_name: str, table_name: str, status: str, error: Optional[str]):
+        self._emit(f'    <testcase classname={quoteattr(db_name)} name={quoteattr(table_name)}')
+        if status == 'error':
+            self._emit(f'>\n      <error message={quoteattr(error)}/>\n    </testcase>\n')
+        elif status == 'missing':
+            self._emit('>\n      <failure message="表不存在"/>\n    </testcase>\n')
+        self._table_status = status
+
+    def column(self, db_name: str, table_name: str, column_name: str, expected: str,
+               actual: Optional[str], status: str):
+        if status == 'missing':
+            self._failures.append(f"字段 {column_name} 不存在，预期类型 {expected}")
+        elif status == 'mismatch':
+            self._failures.append(f"字段 {column_name} 类型不匹配: 预期 {expected}，实际 {actual}")
+
+    def definition(self, db_name: str, table_name: str, kind: str, name: str, status: str,
+                   expected, actual):
+        self._failures.append(f"{_definition_problem(kind, status)} {name}: "
+                              f"预期 {format_definition_value(kind, expected)}，"
+                              f"实际 {format_definition_value(kind, actual)}")
+        self._definition_failures += 1
+
+    def end_table(self, db_name: str, table_name: str):
+        if self._table_status != 'ok':
+            return
+        if self._failures:
+            columns = len(self._failures) - self._definition_failures
+            if not self._definition_failures:
+                message = f"{columns} 个字段不一致"
+            elif not columns:
+                message = f"{self._definition_failures} 处表定义不一致"
+            else:
+                message = f"{columns} 个字段、{self._definition_failures} 处表定义不一致"
+            self._emit(f'>\n      <failure message="{message}">'
+                       f'{escape(chr(10).join(self._failures))}</failure>\n    </testcase>\n')
+            self._failures = []
+            self._definition_failures = 0
+        else:
+            self._emit('/>\n')
+
+    def end_database(self, db_name: str):
+        self._emit('  </testsuite>\n')
+
+    def end(self, summary: Dict):
+        self._emit('</testsuites>\n')
+
+
+# 报告格式 -> 输出类
+REPORT_WRITERS = {
+    'md': MarkdownReportWriter,
+    'jsonl': JsonLinesReportWriter,
+    'junit': JUnitReportWriter,
+}
+
+
+def report_paths(output_file: str, formats: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    各格式的输出文件：与 output_file 同名、扩展名按格式替换，如 database_validation.md/.jsonl/.xml
+    formats 为空时只输出 md
+    """
+    formats = formats or ['md']
+    unknown = [fmt for fmt in formats if fmt not in REPORT_WRITERS]
+    if unknown:
+        raise ValueError(f"不支持的报告格式: {unknown}，支持 {list(REPORT_WRITERS)}")
+    base = os.path.splitext(output_file)[0]
+    return {fmt: base + REPORT_WRITERS[fmt].extension for fmt in formats}
+
+
+def write_reports(diff: SchemaDiff, meta: Dict, outputs: Dict[str, str], summary_only: bool = False):
+    """
+    遍历一次差异结果，同时输出多种格式的报告
+
+    Args:
+        diff: diff_schemas 的结果
+        meta: 本次校验的信息 {time, host, port, username} 或 {time, snapshot}
+        outputs: {格式: 输出文件}，见 report_paths
+        summary_only: 只输出汇总与不一致的对象
+    """
+    writers = [REPORT_WRITERS[fmt](path, summary_only) for fmt, path in outputs.items()]
+    try:
+        for writer in writers:
+            writer.open()
+            writer.begin(meta, diff)
+
+        for db_name, tables in diff.expected.items():
+            error = diff.error(db_name)
+            status = 'error' if error is not None else 'ok' if diff.database_exists(db_name) else 'missing'
+            for writer in writers:
+                writer.database(db_name, status, error)
+
+            if status == 'ok':
+                live_tables = diff.actual[db_name]
+                for table_name, columns in tables.items():
+                    error = diff.error(db_name, table_name)
+                    actual_columns = live_tables.get(table_name)
+                    table_status = 'error' if error is not None else 'missing' if actual_columns is None else 'ok'
+                    for writer in writers:
+                        writer.table(db_name, table_name, table_status, error)
+
+                    if table_status != 'error':
+                        actual_columns = actual_columns or {}
+                        for column_name, expected_type in columns.items():
+                            column_status = 'no_table' if table_status == 'missing' \
+                                else diff.column_status(db_name, table_name, column_name)
+                            actual_type = actual_columns.get(column_name)
+                            for writer in writers:
+                                writer.column(db_name, table_name, column_name, expected_type, actual_type,
+                                              column_status)
+                        for issue in diff.table_definition_issues(db_name, table_name):
+                            for writer in writers:
+                                writer.definition(*issue)
+
+                    for writer in writers:
+                        writer.end_table(db_name, table_name)
+
+            for writer in writers:
+                writer.end_database(db_name)
+
+        summary = diff.summary()
+        for writer in writers:
+            writer.end(summary)
+    finally:
+        for writer in writers:
+            writer.close()
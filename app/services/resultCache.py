@@ -0,0 +1,91 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# 校验结果默认有效期（秒）与最多保留的结果数
+DEFAULT_RESULT_TTL = 60
+DEFAULT_RESULT_ENTRIES = 128
+
+
+class ResultCache:
+    """
+    校验结果缓存，键由调用方组合（预期结构文件的哈希、目标实例、实际结构指纹、报告选项等）
+
+    - 有效期(ttl)内相同的键直接返回上一次的结果（报告文件沿用上一次的目录）
+    - 最多保留 max_entries 个结果，超出时淘汰最久未使用的
+    - 相同的键正在计算时，后来的请求等待同一次计算的结果，不再重复访问数据库
+    - 计算抛出异常或结果不可缓存时不保存，等待中的请求得到同样的异常或结果
+    """
+
+    def __init__(self, ttl: float = DEFAULT_RESULT_TTL, max_entries: int = DEFAULT_RESULT_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (保存时间, 结果)
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        # key -> 正在进行的计算
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'coalesced': 0, 'misses': 0}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Dict],
+                       cacheable: Optional[Callable[[Dict], bool]] = None) -> Dict:
+        """
+        返回键对应的结果，结果中附加 cache 字段：hit（缓存命中）、coalesced（等待了同时进行的相同计算）或 miss
+
+        Args:
+            compute: 未命中时执行的计算，返回结果字典
+            cacheable: 判断结果能否缓存，为空时全部缓存
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return {**entry[1], 'cache': 'hit'}
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return {**future.result(), 'cache': 'coalesced'}
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            if cacheable is None or cacheable(result):
+                self._entries[key] = (time.monotonic(), result)
+                self._entries.move_to_end(key)
+                self._evict(now)
+        future.set_result(result)
+        return {**result, 'cache': 'miss'}
+
+    def invalidate(self):
+        """清除全部结果，正在进行的计算不受影响"""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, now: float):
+        for key in [key for key, (saved, _) in self._entries.items() if now - saved >= self.ttl]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            logging.debug(f"淘汰校验结果缓存: {evicted}")
+
+
+# 进程内共享的校验结果缓存，供 Flask 路由与后台任务使用
+check_results = ResultCache()
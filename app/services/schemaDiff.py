@@ -0,0 +1,194 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from app.services.schemaModel import ColumnType
+from app.services.tableDefinitions import compare_definitions
+
+# 对象定位：(库,)、(库, 表) 或 (库, 表, 字段)
+TableKey = Tuple[str, str]
+ColumnKey = Tuple[str, str, str]
+# 表定义差异：(库, 表, 种类, 名称, 'missing' 或 'mismatch', 预期, 实际)，见 tableDefinitions.compare_definitions
+DefinitionIssue = Tuple[str, str, str, str, str, object, object]
+
+
+class SchemaDiff:
+    """
+    预期结构与实际结构的差异
+
+    各差异列表按预期结构中的顺序排列；同时保存两份结构的引用（不复制），
+    报告输出时可按原顺序列出全部字段并查询每个对象的状态
+    errors 为读取实际结构时失败的对象 {(库,) 或 (库, 表): 错误信息}，这些对象不参与比较
+    definition_issues 为索引、主键、外键、可空、默认值等表定义的差异，只有比较了表定义
+    （definitions_checked）时才有；缺失的索引单独计数，作为性能风险报告
+    """
+
+    __slots__ = ('expected', 'actual', 'missing_databases', 'extra_databases', 'missing_tables',
+                 'extra_tables', 'missing_columns', 'extra_columns', 'mismatched_columns', 'errors',
+                 'column_count', 'definition_issues', 'definitions_checked',
+                 '_missing_column_set', '_mismatched_column_set', '_issues_by_table')
+
+    def __init__(self, expected: Dict, actual: Dict, errors: Optional[Dict] = None):
+        self.expected = expected
+        self.actual = actual
+        self.missing_databases: List[str] = []
+        self.extra_databases: List[str] = []
+        self.missing_tables: List[TableKey] = []
+        self.extra_tables: List[TableKey] = []
+        self.missing_columns: List[ColumnKey] = []
+        self.extra_columns: List[ColumnKey] = []
+        self.mismatched_columns: List[ColumnKey] = []
+        self.errors: Dict[Tuple, str] = errors or {}
+        self.column_count = 0
+        self.definition_issues: List[DefinitionIssue] = []
+        self.definitions_checked = False
+        self._missing_column_set = None
+        self._mismatched_column_set = None
+        self._issues_by_table = None
+
+    @property
+    def passed(self) -> bool:
+        return not (self.missing_databases or self.missing_tables or self.missing_columns
+                    or self.mismatched_columns or self.definition_issues or self.errors)
+
+    def database_exists(self, db_name: str) -> bool:
+        return db_name in self.actual
+
+    def table_exists(self, db_name: str, table_name: str) -> bool:
+        return table_name in self.actual.get(db_name, {})
+
+    def error(self, db_name: str, table_name: Optional[str] = None) -> Optional[str]:
+        key = (db_name,) if table_name is None else (db_name, table_name)
+        return self.errors.get(key)
+
+    def column_status(self, db_name: str, table_name: str, column_name: str) -> str:
+        """返回 'ok'、'missing' 或 'mismatch'"""
+        if self._missing_column_set is None:
+            self._missing_column_set = set(self.missing_columns)
+            self._mismatched_column_set = set(self.mismatched_columns)
+        key = (db_name, table_name, column_name)
+        if key in self._missing_column_set:
+            return 'missing'
+        if key in self._mismatched_column_set:
+            return 'mismatch'
+        return 'ok'
+
+    def table_definition_issues(self, db_name: str, table_name: str) -> List[DefinitionIssue]:
+        """该表的表定义差异，按 compare_definitions 的顺序"""
+        if self._issues_by_table is None:
+            self._issues_by_table = {}
+            for issue in self.definition_issues:
+                self._issues_by_table.setdefault(issue[:2], []).append(issue)
+        return self._issues_by_table.get((db_name, table_name), [])
+
+    def summary(self) -> Dict:
+        """与 DatabaseValidator 校验汇总一致的计数，另含多出的库/表/字段数"""
+        missing_indexes = sum(1 for issue in self.definition_issues if issue[2] == 'index' and issue[4] == 'missing')
+        return {
+            'databases': len(self.expected),
+            'missing_databases': len(self.missing_databases),
+            'tables': sum(len(tables) for db_name, tables in self.expected.items()
+                          if db_name in self.actual and (db_name,) not in self.errors),
+            'missing_tables': len(self.missing_tables),
+            'columns': self.column_count,
+            'missing_columns': len(self.missing_columns),
+            'mismatched_columns': len(self.mismatched_columns),
+            'missing_indexes': missing_indexes,
+            'mismatched_definitions': len(self.definition_issues) - missing_indexes,
+            'errors': len(self.errors),
+            'extra_databases': len(self.extra_databases),
+            'extra_tables': len(self.extra_tables),
+            'extra_columns': len(self.extra_columns),
+        }
+
+    def to_dict(self) -> Dict:
+        """可序列化为 JSON 的差异明细，字段类型附带预期与实际值"""
+        def column_types(key: ColumnKey) -> Dict:
+            db_name, table_name, column_name = key
+            return {
+                'database': db_name, 'table': table_name, 'column': column_name,
+                'expected': self.expected.get(db_name, {}).get(table_name, {}).get(column_name),
+                'actual': self.actual.get(db_name, {}).get(table_name, {}).get(column_name),
+            }
+
+        return {
+            'passed': self.passed,
+            'summary': self.summary(),
+            'missing_databases': self.missing_databases,
+            'extra_databases': self.extra_databases,
+            'missing_tables': [{'database': db, 'table': table} for db, table in self.missing_tables],
+            'extra_tables': [{'database': db, 'table': table} for db, table in self.extra_tables],
+            'missing_columns': [column_types(key) for key in self.missing_columns],
+            'extra_columns': [column_types(key) for key in self.extra_columns],
+            'mismatched_columns': [column_types(key) for key in self.mismatched_columns],
+            'definition_issues': [
+                {'database': db, 'table': table, 'kind': kind, 'name': name, 'status': status,
+                 'expected': expected, 'actual': actual}
+                for db, table, kind, name, status, expected, actual in self.definition_issues
+            ],
+            'errors': [{'object': '.'.join(key), 'error': error} for key, error in self.errors.items()],
+        }
+
+
+def diff_schemas(expected: Dict, actual: Dict, errors: Optional[Dict] = None,
+                 progress: Optional[Callable[..., None]] = None, definitions: Optional[Dict] = None,
+                 live_definitions: Optional[Dict] = None) -> SchemaDiff:
+    """
+    比较两份 {database: {table: {column: type}}} 结构，每一层用字典键视图做集合运算，
+    只在两边都存在的字段上比较类型（类型对象已 intern，比较为哈希相等），整体为线性时间
+
+    Args:
+        expected: 预期结构
+        actual: 实际结构（在线读取或快照）
+        errors: 读取失败的对象 {(库,) 或 (库, 表): 错误信息}，不参与比较
+        progress: 每比较完一个库调用一次 progress(databases=1, tables=表数, columns=字段数)
+        definitions: 预期的表定义 {database: {table: 表定义}}，为空时不比较表定义
+        live_definitions: 实际的表定义，与 definitions 同时传入；只比较两边都存在的表和字段
+
+    Returns:
+        SchemaDiff
+    """
+    diff = SchemaDiff(expected, actual, errors)
+    errors = diff.errors
+    intern = ColumnType.intern
+    definitions = definitions if live_definitions is not None else None
+    diff.definitions_checked = definitions is not None
+
+    expected_databases = expected.keys()
+    diff.missing_databases = [db for db in expected if db not in actual and (db,) not in errors]
+    diff.extra_databases = [db for db in actual if db not in expected_databases]
+
+    # 按预期结构中的顺序遍历，多出的表、字段按实际结构中的顺序，报告与进度事件的顺序稳定
+    for db_name in expected:
+        if db_name not in actual or (db_name,) in errors:
+            continue
+        column_count = diff.column_count
+        expected_tables = expected[db_name]
+        actual_tables = actual[db_name]
+        diff.extra_tables.extend((db_name, table) for table in actual_tables if table not in expected_tables)
+
+        for table_name, expected_columns in expected_tables.items():
+            if (db_name, table_name) in errors:
+                continue
+            actual_columns = actual_tables.get(table_name)
+            if actual_columns is None:
+                diff.missing_tables.append((db_name, table_name))
+                continue
+
+            diff.column_count += len(expected_columns)
+            missing = expected_columns.keys() - actual_columns.keys()
+            for column_name, expected_type in expected_columns.items():
+                if column_name in missing:
+                    diff.missing_columns.append((db_name, table_name, column_name))
+                elif intern(expected_type) != intern(actual_columns[column_name]):
+                    diff.mismatched_columns.append((db_name, table_name, column_name))
+            diff.extra_columns.extend(
+                (db_name, table_name, column) for column in actual_columns if column not in expected_columns
+            )
+            expected_definition = definitions.get(db_name, {}).get(table_name) if definitions else None
+            if expected_definition is not None:
+                diff.definition_issues.extend(compare_definitions(
+                    db_name, table_name, expected_definition,
+                    live_definitions.get(db_name, {}).get(table_name, {}), actual_columns
+                ))
+        if progress is not None:
+            progress(databases=1, tables=len(expected_tables), columns=diff.column_count - column_count)
+
+    return diff
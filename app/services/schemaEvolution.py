@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from app.services.mysqlParser import PARSER_VERSION, MySQLSchemaParser, _file_events_worker
+from app.services.parseCache import ParseCache
+
+logger = logging.getLogger(__name__)
+
+# 文件名中的数字按数值排序：V2__x.sql 在 V10__y.sql 之前
+_NUMBER = re.compile(r'(\d+)')
+
+
+def _natural_key(name: str) -> List:
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part.lower()) for part in _NUMBER.split(name)]
+
+
+def list_migration_files(migration_dir: str) -> List[str]:
+    """按文件名的自然顺序列出迁移目录下的sql文件（001_、V2__、20240101_ 等前缀均适用）"""
+    names = [name for name in os.listdir(migration_dir) if name.endswith('.sql')]
+    return [os.path.join(migration_dir, name) for name in sorted(names, key=_natural_key)]
+
+
+class SchemaEvolution:
+    """
+    按顺序重放迁移文件（CREATE/ALTER/DROP/RENAME 等），得到迁移链最终的数据库结构与表定义
+
+    - 各文件的语句在进程池中并行解析为事件（与上下文无关），再按文件顺序应用到同一个解析器
+    - 每个位置的链哈希 = sha256(上一位置的链哈希 + 文件内容哈希)，每隔 checkpoint_every 个文件
+      以及结束时把结构保存为检查点 <链哈希>.json；再次重放时从最后一个链哈希仍然存在的检查点继续，
+      只追加了新迁移时只重放新文件，修改了中间某个文件时从它之前最近的检查点重放
+    - 检查点按 mtime 只保留最近使用的 max_checkpoints 个
+    - default_database 不为空时每个文件开始时先切换到该库，适用于不写 USE 的迁移工具
+    """
+
+    def __init__(self, cache_dir: str = "app/output/.cache", checkpoint_every: int = 100,
+                 max_checkpoints: int = 10, max_workers: Optional[int] = None,
+                 default_database: Optional[str] = None):
+        self.cache = ParseCache(cache_dir)
+        self.checkpoint_dir = os.path.join(cache_dir, 'checkpoints')
+        self.checkpoint_every = max(checkpoint_every, 1)
+        self.max_checkpoints = max_checkpoints
+        self.max_workers = max_workers
+        self.default_database = default_database
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+    def replay(self, file_paths: List[str], use_checkpoints: bool = True) -> Optional[Dict]:
+        """
+        重放迁移文件
+
+        Returns:
+            Optional[Dict]: {'schema': 结构, 'definitions': 表定义, 'files': 文件数,
+                            'replayed': 本次重放的文件数, 'resumed_from': 起始检查点之前的文件数, 'seconds': 耗时}，
+                            失败返回 None
+        """
+        started = time.perf_counter()
+        try:
+            chain = self._chain_hashes(file_paths)
+            parser = MySQLSchemaParser()
+            start = self._restore(parser, chain) if use_checkpoints else 0
+            if start:
+                logger.info(f"从检查点恢复：跳过前 {start} 个迁移文件")
+
+            pending = file_paths[start:]
+            for offset, events in enumerate(self._iter_events(pending), start + 1):
+                if self.default_database:
+                    parser.apply_events([('use', self.default_database)])
+                parser.apply_events(events)
+                if offset % self.checkpoint_every == 0 or offset == len(file_paths):
+                    self._save_checkpoint(parser, chain[offset], offset)
+
+            seconds = round(time.perf_counter() - started, 3)
+            logger.info(f"重放迁移 {len(pending)}/{len(file_paths)} 个文件，耗时 {seconds}s")
+            return {
+                'schema': parser.schema_dict,
+                'definitions': parser.table_definitions,
+                'files': len(file_paths),
+                'replayed': len(pending),
+                'resumed_from': start,
+                'seconds': seconds
+            }
+        except Exception as e:
+            logger.error(f"重放迁移文件时出错: {e}")
+            return None
+
+    def _chain_hashes(self, file_paths: List[str]) -> List[str]:
+        """chain[i] 标识前 i 个文件的内容与顺序，chain[0] 只与解析器版本和默认库有关"""
+        chain = [hashlib.sha256(f"{PARSER_VERSION}:{self.default_database or ''}".encode('utf-8')).hexdigest()]
+        for sha256 in self.cache.file_hashes(file_paths):
+            chain.append(hashlib.sha256(f"{chain[-1]}:{sha256}".encode('utf-8')).hexdigest())
+        return chain
+
+    def _iter_events(self, file_paths: List[str]):
+        """按文件顺序产出各文件的事件，文件较多时在进程池中并行解析"""
+        workers = min(self.max_workers or os.cpu_count() or 1, len(file_paths))
+        if workers <= 1:
+            for file_path in file_paths:
+                yield _file_events_worker(file_path)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map 按提交顺序返回结果，前面的文件解析完成即可开始应用
+            yield from executor.map(_file_events_worker, file_paths,
+                                    chunksize=max(1, len(file_paths) // (workers * 4)))
+
+    def _checkpoint_path(self, chain_hash: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{chain_hash}.json")
+
+    def _restore(self, parser: MySQLSchemaParser, chain: List[str]) -> int:
+        """从链哈希仍然有效的最后一个检查点恢复解析器状态，返回已应用的文件数"""
+        for index in range(len(chain) - 1, 0, -1):
+            path = self._checkpoint_path(chain[index])
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    checkpoint = json.load(f)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning(f"读取检查点失败: {path}: {e}")
+                continue
+            os.utime(path)
+            parser.schema_dict = checkpoint['schema']
+            parser.table_definitions = checkpoint['definitions']
+            parser.current_database = checkpoint['current_database']
+            return index
+        return 0
+
+    def _save_checkpoint(self, parser: MySQLSchemaParser, chain_hash: str, index: int):
+        path = self._checkpoint_path(chain_hash)
+        checkpoint = {
+            'index': index,
+            'current_database': parser.current_database,
+            'schema': parser.schema_dict,
+            'definitions': parser.table_definitions
+        }
+        try:
+            # 先写临时文件再替换，避免并发读取到写了一半的文件
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+        except Exception as e:
+            logger.warning(f"写入检查点失败: {path}: {e}")
+
+    def _evict(self):
+        entries: List[Tuple[float, str]] = []
+        for name in os.listdir(self.checkpoint_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.checkpoint_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        for _, path in sorted(entries, reverse=True)[self.max_checkpoints:]:
+            try:
+                os.remove(path)
+                logger.info(f"淘汰迁移检查点: {path}")
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,62 @@
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+
+
+def _parse_pattern(pattern: str) -> Tuple[str, str]:
+    """'库.表' 通配模式拆分为 (库模式, 表模式)，只写库名时表示该库的全部表"""
+    db_pattern, _, table_pattern = pattern.strip().partition('.')
+    return db_pattern or '*', table_pattern or '*'
+
+
+class SchemaFilter:
+    """
+    按 '库.表' 通配模式（*、?、[seq]，区分大小写）限定校验范围
+
+    - include 为空时包含全部表，否则只包含匹配任一 include 模式的表
+    - 匹配任一 exclude 模式的表被排除，exclude 优先
+    - 只写库名（如 'hr'）等同于 'hr.*'
+    """
+
+    def __init__(self, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
+        self.include = [_parse_pattern(pattern) for pattern in include or () if pattern.strip()]
+        self.exclude = [_parse_pattern(pattern) for pattern in exclude or () if pattern.strip()]
+
+    @property
+    def active(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    def matches(self, db_name: str, table_name: str) -> bool:
+        if self.include and not any(fnmatchcase(db_name, db) and fnmatchcase(table_name, table)
+                                    for db, table in self.include):
+            return False
+        return not any(fnmatchcase(db_name, db) and fnmatchcase(table_name, table) for db, table in self.exclude)
+
+    def covers_database(self, db_name: str) -> bool:
+        """该库的任何表（包括预期结构中没有的表）都在范围内，此时可以读取整个库"""
+        if self.include and not any(fnmatchcase(db_name, db) and table == '*' for db, table in self.include):
+            return False
+        return not any(fnmatchcase(db_name, db) for db, _ in self.exclude)
+
+    def apply(self, schema_dict: Dict) -> Dict:
+        """
+        返回范围内的预期结构：只保留匹配的表；没有匹配的表、且不是整库在范围内的库被去掉
+        """
+        if not self.active:
+            return schema_dict
+        scoped = {}
+        for db_name, tables in schema_dict.items():
+            kept = {name: columns for name, columns in tables.items() if self.matches(db_name, name)}
+            if kept or self.covers_database(db_name):
+                scoped[db_name] = kept
+        return scoped
+
+    def table_scope(self, schema_dict: Dict) -> Dict[str, Optional[List[str]]]:
+        """
+        {库: 需要读取的表名列表}，整库在范围内的库为 None（读取全部表，可以发现多出的表）；
+        schema_dict 应为 apply 之后的预期结构
+        """
+        return {db_name: None if self.covers_database(db_name) else list(tables)
+                for db_name, tables in schema_dict.items()}
+
+    def __repr__(self):
+        return f'<SchemaFilter include={self.include} exclude={self.exclude}>'
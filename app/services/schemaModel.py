@@ -0,0 +1,351 @@
+import re
+import sys
+import logging
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.services.sqlLexer import find_quoted_end, normalize_statement, split_top_level
+from app.services.sqldictTofile import DictFileConverter
+
+logger = logging.getLogger(__name__)
+
+# 类型名：一个单词，或少数由两个单词组成的类型（DOUBLE PRECISION、CHARACTER VARYING 等）
+_TYPE_NAME = re.compile(
+    r'\s*(DOUBLE\s+PRECISION|(?:CHARACTER|CHAR)\s+VARYING|NATIONAL\s+(?:VARCHAR|CHARACTER|CHAR)'
+    r'|LONG\s+(?:VARCHAR|VARBINARY)|[A-Za-z]\w*)(?!\w)',
+    re.IGNORECASE
+)
+# 写在类型之后的数值修饰
+_TYPE_MODIFIER = re.compile(r'\s+(UNSIGNED|SIGNED|ZEROFILL)(?!\w)', re.IGNORECASE)
+_PAREN_OR_QUOTE = re.compile(r"""[()'"]""")
+
+# 同义类型统一为 MySQL 实际存储的类型名
+_TYPE_ALIASES = {
+    'integer': 'int',
+    'dec': 'decimal',
+    'numeric': 'decimal',
+    'fixed': 'decimal',
+    'double precision': 'double',
+    'real': 'double',
+    'character': 'char',
+    'nchar': 'char',
+    'national char': 'char',
+    'national character': 'char',
+    'character varying': 'varchar',
+    'char varying': 'varchar',
+    'nvarchar': 'varchar',
+    'national varchar': 'varchar',
+    'long': 'mediumtext',
+    'long varchar': 'mediumtext',
+    'long varbinary': 'mediumblob',
+}
+_INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint')
+_TEMPORAL_TYPES = ('datetime', 'timestamp', 'time')
+
+
+def _scan_type(text: str, pos: int = 0) -> Optional[Tuple[str, Tuple[str, ...], List[str], int]]:
+    """
+    从 pos 处扫描一个类型定义，返回 (类型名, 参数元组, 修饰列表, 结束位置)
+    括号不完整时返回 None；括号内的引号字符串（如 ENUM 值中的逗号、括号）原样保留
+    """
+    match = _TYPE_NAME.match(text, pos)
+    if not match:
+        return None
+    name = ' '.join(match.group(1).split())
+    pos = match.end()
+    args = ()
+
+    open_at = pos + len(text[pos:]) - len(text[pos:].lstrip())
+    if text[open_at:open_at + 1] == '(':
+        depth = 0
+        at = open_at
+        while True:
+            token = _PAREN_OR_QUOTE.search(text, at)
+            if not token:
+                return None
+            if token.group() == '(':
+                depth += 1
+            elif token.group() == ')':
+                depth -= 1
+                if depth == 0:
+                    break
+            else:
+                end = find_quoted_end(text, token.start())
+                if end == -1:
+                    return None
+                at = end
+                continue
+            at = token.end()
+        args = tuple(split_top_level(text[open_at + 1:token.start()]))
+        pos = token.end()
+
+    modifiers = []
+    while True:
+        match = _TYPE_MODIFIER.match(text, pos)
+        if not match:
+            break
+        modifiers.append(match.group(1).upper())
+        pos = match.end()
+    return name, args, modifiers, pos
+
+
+def _normalize_type(name: str, args: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...]]:
+    """按 MySQL 的存储语义归一类型名与参数，用于类型比较"""
+    base = name.lower()
+    if base in ('bool', 'boolean'):
+        return 'tinyint', ('1',)
+    base = _TYPE_ALIASES.get(base, base)
+    if base in _INTEGER_TYPES:
+        # 整数的显示宽度不影响存储（MySQL 8.0 起也不再显示），tinyint(1) 常用作布尔值，予以保留
+        return base, args if (base, args) == ('tinyint', ('1',)) else ()
+    if base == 'decimal':
+        precision = args[0] if args else '10'
+        return base, (precision, args[1] if len(args) > 1 else '0')
+    if base in ('char', 'binary', 'bit') and not args:
+        return base, ('1',)
+    if base in _TEMPORAL_TYPES and args == ('0',):
+        return base, ()
+    if base == 'year':
+        return base, ()
+    return base, args
+
+
+class ColumnType:
+    """
+    列类型描述，同一类型文本全局只解析、只创建一次（intern）
+
+    创建时即解析出 基础类型、参数、unsigned/zerofill，并按 MySQL 的存储语义归一
+    （同义类型、整数显示宽度、DECIMAL 默认精度等），相等性与哈希只比较归一后的字段，
+    因此 'INT(11)'、'integer' 与 'int' 视为同一类型
+    """
+
+    __slots__ = ('text', 'base', 'args', 'unsigned', 'zerofill', 'type_id', '_key')
+
+    # 类型 id -> 类型对象；表中的列以 id 数组保存
+    _registry: List['ColumnType'] = []
+    # 规范化文本（去注释、压缩引号外的空白）-> 类型对象，只是空白不同的写法共用一个对象，不会重复登记
+    _by_text: Dict[str, 'ColumnType'] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, text: str, base: str, args: Tuple[str, ...], unsigned: bool, zerofill: bool):
+        self.text = text
+        self.base = base
+        self.args = args
+        self.unsigned = unsigned
+        self.zerofill = zerofill
+        self.type_id = -1
+        self._key = (base, args, unsigned, zerofill)
+
+    @classmethod
+    def intern(cls, text: str) -> 'ColumnType':
+        """返回该类型文本对应的唯一类型对象；多线程同时登记同一类型时只创建一次"""
+        column_type = cls._by_text.get(text)
+        if column_type is not None:
+            return column_type
+        text = normalize_statement(text)
+        column_type = cls._by_text.get(text)
+        if column_type is None:
+            with cls._lock:
+                column_type = cls._by_text.get(text)
+                if column_type is None:
+                    column_type = cls._parse(text)
+                    column_type.type_id = len(cls._registry)
+                    cls._registry.append(column_type)
+                    cls._by_text[column_type.text] = column_type
+        return column_type
+
+    @classmethod
+    def from_id(cls, type_id: int) -> 'ColumnType':
+        return cls._registry[type_id]
+
+    @classmethod
+    def _parse(cls, text: str) -> 'ColumnType':
+        text = sys.intern(text)
+        scanned = _scan_type(text)
+        if scanned is None or text[scanned[3]:].strip():
+            # 无法完整识别的类型（如旧版本解析出的 'DECIMAL(10'）只与自身相等
+            return cls(text, ' '.join(text.lower().split()), (), False, False)
+        name, args, modifiers, _ = scanned
+        base, args = _normalize_type(name, args)
+        return cls(text, base, args, 'UNSIGNED' in modifiers, 'ZEROFILL' in modifiers)
+
+    @property
+    def length(self) -> Optional[int]:
+        """长度/精度（首个参数），非数字参数返回 None"""
+        return int(self.args[0]) if self.args and self.args[0].isdigit() else None
+
+    @property
+    def scale(self) -> Optional[int]:
+        """小数位数（DECIMAL(M,D) 的 D）"""
+        return int(self.args[1]) if len(self.args) > 1 and self.args[1].isdigit() else None
+
+    def key(self) -> Tuple:
+        return self._key
+
+    def __eq__(self, other):
+        if not isinstance(other, ColumnType):
+            return NotImplemented
+        return self is other or self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"ColumnType({self.text!r})"
+
+
+def scan_column_type(definition: str) -> Optional[Tuple[ColumnType, int]]:
+    """
+    从字段定义中字段名之后的部分提取类型，如 "DECIMAL(10, 2) NOT NULL DEFAULT 0" 得到 DECIMAL(10,2)，
+    并返回类型之后的位置，其后为 NOT NULL、DEFAULT 等字段属性；
+    类型文本统一为 大写类型名 + 紧凑参数 + 大写修饰，无法识别返回 None
+    """
+    scanned = _scan_type(definition)
+    if scanned is None:
+        return None
+    name, args, modifiers, end = scanned
+    text = name.upper()
+    if args:
+        text += '(' + ','.join(args) + ')'
+    for modifier in modifiers:
+        text += ' ' + modifier
+    return ColumnType.intern(text), end
+
+
+class Column:
+    """表中的一列，仅在遍历时临时创建"""
+
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name: str, column_type: ColumnType):
+        self.name = name
+        self.type = column_type
+
+    def __repr__(self):
+        return f"Column({self.name!r}, {self.type.text!r})"
+
+
+class Table(Mapping):
+    """
+    表结构：列名列表 + 类型 id 数组（array），
+    不为每一列保留 dict 与类型字符串
+
+    作为只读映射 {列名: 类型文本} 使用，校验、比较与报告可以直接接收 {库: {表: Table}}
+    """
+
+    __slots__ = ('name', '_names', '_type_ids', '_positions')
+
+    def __init__(self, name: str):
+        self.name = sys.intern(name)
+        self._names: List[str] = []
+        self._type_ids = array('I')
+        self._positions: Optional[Dict[str, int]] = None
+
+    def add_column(self, name: str, type_text: str):
+        self._names.append(sys.intern(name))
+        self._type_ids.append(ColumnType.intern(type_text).type_id)
+        self._positions = None
+
+    def column_type(self, name: str) -> Optional[ColumnType]:
+        """按列名查找类型，不存在返回 None"""
+        if self._positions is None:
+            self._positions = {column: index for index, column in enumerate(self._names)}
+        index = self._positions.get(name)
+        return None if index is None else ColumnType.from_id(self._type_ids[index])
+
+    def columns(self) -> Iterator[Column]:
+        for name, type_id in zip(self._names, self._type_ids):
+            yield Column(name, ColumnType.from_id(type_id))
+
+    def __getitem__(self, name: str) -> str:
+        column_type = self.column_type(name)
+        if column_type is None:
+            raise KeyError(name)
+        return column_type.text
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return self.column_type(name) is not None
+
+    def __repr__(self):
+        return f"Table({self.name!r}, {len(self)} columns)"
+
+
+class SchemaModel:
+    """
+    紧凑的数据库结构模型，可与解析器输出的字典格式
+    {database: {table: {column: type}}} 互相转换
+    """
+
+    __slots__ = ('databases',)
+
+    def __init__(self):
+        self.databases: Dict[str, Dict[str, Table]] = {}
+
+    @classmethod
+    def from_dict(cls, schema: Dict) -> 'SchemaModel':
+        model = cls()
+        for database, tables in schema.items():
+            model_tables = model.databases.setdefault(sys.intern(database), {})
+            for table_name, columns in tables.items():
+                if isinstance(columns, Table):
+                    model_tables[columns.name] = columns
+                    continue
+                table = Table(table_name)
+                for column_name, type_text in columns.items():
+                    table.add_column(column_name, type_text)
+                model_tables[table.name] = table
+        return model
+
+    def to_dict(self) -> Dict:
+        return {
+            database: {
+                table.name: {column.name: column.type.text for column in table.columns()}
+                for table in tables.values()
+            }
+            for database, tables in self.databases.items()
+        }
+
+    def table(self, database: str, table_name: str) -> Optional[Table]:
+        return self.databases.get(database, {}).get(table_name)
+
+    def tables(self) -> Iterator[Tuple[str, Table]]:
+        for database, tables in self.databases.items():
+            for table in tables.values():
+                yield database, table
+
+    def column_count(self) -> int:
+        return sum(len(table) for _, table in self.tables())
+
+    def __repr__(self):
+        return f"SchemaModel({len(self.databases)} databases, {self.column_count()} columns)"
+
+
+def compact_schema(schema) -> Dict[str, Dict[str, Table]]:
+    """
+    {库: {表: Table}} 形式的结构，校验与比较统一使用；传入 SchemaModel 或已是该形式时不再转换，
+    只有写文件（DictFileConverter）时才通过 SchemaModel.to_dict 转回字典
+    """
+    if isinstance(schema, SchemaModel):
+        return schema.databases
+    if all(isinstance(table, Table) for tables in schema.values() for table in tables.values()):
+        return schema
+    return SchemaModel.from_dict(schema).databases
+
+
+def load_schema_model(file_path: str) -> Optional[SchemaModel]:
+    """从 DictFileConverter 支持的 json/yaml 文件加载结构模型，失败返回 None"""
+    schema = DictFileConverter.file_to_dict(file_path)
+    if schema is None:
+        logger.error(f"加载结构文件失败: {file_path}")
+        return None
+    return SchemaModel.from_dict(schema)
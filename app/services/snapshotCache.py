@@ -0,0 +1,112 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 快照默认有效期（秒）
+DEFAULT_SNAPSHOT_TTL = 300
+
+# 快照过期后用于判断结构是否变化的指纹查询，按库聚合，每个存在的库返回一行（不存在的库没有结果）
+# tables: 表数量 + 最晚创建时间 + 表名校验和。重建表的 ALTER 会刷新 CREATE_TIME，
+#         INSTANT 方式的 ALTER 不会，这类变更在 ttl 到期前不可见；
+#         不使用 UPDATE_TIME，任何 DML 都会刷新它，导致快照频繁失效
+# columns: 所有字段名与类型的校验和，能发现任何字段变更，服务端开销更大
+FINGERPRINT_QUERIES = {
+    'tables': (
+        "SELECT s.SCHEMA_NAME AS TABLE_SCHEMA, COUNT(t.TABLE_NAME) AS object_count, "
+        "MAX(t.CREATE_TIME) AS changed, SUM(CRC32(t.TABLE_NAME)) AS checksum "
+        "FROM information_schema.SCHEMATA s "
+        "LEFT JOIN information_schema.TABLES t ON t.TABLE_SCHEMA = s.SCHEMA_NAME "
+        "WHERE s.SCHEMA_NAME IN ({placeholders}) GROUP BY s.SCHEMA_NAME"
+    ),
+    'columns': (
+        "SELECT s.SCHEMA_NAME AS TABLE_SCHEMA, COUNT(c.COLUMN_NAME) AS object_count, NULL AS changed, "
+        "SUM(CRC32(CONCAT_WS(' ', c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE))) AS checksum "
+        "FROM information_schema.SCHEMATA s "
+        "LEFT JOIN information_schema.COLUMNS c ON c.TABLE_SCHEMA = s.SCHEMA_NAME "
+        "WHERE s.SCHEMA_NAME IN ({placeholders}) GROUP BY s.SCHEMA_NAME"
+    ),
+}
+
+
+class SnapshotCache:
+    """
+    实际数据库结构的快照缓存，按 (host, port, database) 保存
+
+    - 有效期(ttl)内直接使用快照，不访问数据库
+    - 过期后先用一次聚合查询取得各库的指纹，指纹未变化的库续期，只有变化的库才重新读取结构
+    - 不存在的库同样缓存，避免重复查询
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SNAPSHOT_TTL, fingerprint: str = 'tables'):
+        if fingerprint not in FINGERPRINT_QUERIES:
+            raise ValueError(f"不支持的指纹类型: {fingerprint}，支持 {list(FINGERPRINT_QUERIES)}")
+        self.ttl = ttl
+        self.fingerprint = fingerprint
+        # (host, port, database) -> {'tables': 结构或 None(库不存在), 'fingerprint', 'checked_at'}
+        self._entries: Dict[Tuple[str, int, str], Dict] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'fetched': 0}
+
+    def get_schema(self, host: str, port: int, db_names: List[str],
+                   fetch_fingerprints: Callable[[List[str], str], Dict],
+                   fetch_schema: Callable[[List[str]], Dict]) -> Dict:
+        """
+        返回 {database: {table: {column: type}}}，只包含实际存在的数据库
+
+        Args:
+            fetch_fingerprints: (库名列表, 指纹查询SQL模板) -> {database: 指纹}
+            fetch_schema: 库名列表 -> 这些库的实际结构
+        """
+        now = time.monotonic()
+        # 条目与计数的读写都在锁内完成，数据库查询在锁外进行
+        with self._lock:
+            entries = {db: self._entries.get((host, port, db)) for db in db_names}
+            stale = [db for db, entry in entries.items() if entry is None or now - entry['checked_at'] >= self.ttl]
+            self.stats['hits'] += len(db_names) - len(stale)
+
+        if stale:
+            # 先取指纹再取结构：两次查询之间发生的变更会在下一次检查时被发现
+            fingerprints = fetch_fingerprints(stale, FINGERPRINT_QUERIES[self.fingerprint])
+            changed = []
+            with self._lock:
+                for db in stale:
+                    entry = entries[db]
+                    if entry is not None and entry['fingerprint'] == fingerprints.get(db):
+                        entry['checked_at'] = now
+                        self.stats['revalidated'] += 1
+                    else:
+                        changed.append(db)
+
+            if changed:
+                fetched = fetch_schema(changed)
+                for db in changed:
+                    entries[db] = {'tables': fetched.get(db), 'fingerprint': fingerprints.get(db), 'checked_at': now}
+                logging.info(f"刷新结构快照 {host}:{port}: {changed}")
+
+            with self._lock:
+                self.stats['fetched'] += len(changed)
+                for db in stale:
+                    self._entries[(host, port, db)] = entries[db]
+
+        return {db: entry['tables'] for db, entry in entries.items() if entry['tables'] is not None}
+
+    def expire(self, host: str, port: int, db_names: List[str]):
+        """使这些库的快照立即过期：下一次读取时先比较指纹，未变化的库续期，变化的库重新读取"""
+        with self._lock:
+            for db in db_names:
+                entry = self._entries.get((host, port, db))
+                if entry is not None:
+                    entry['checked_at'] = float('-inf')
+
+    def invalidate(self, host: Optional[str] = None, port: Optional[int] = None, database: Optional[str] = None):
+        """清除匹配的快照，参数为空表示不限"""
+        with self._lock:
+            for key in list(self._entries):
+                if (host is None or key[0] == host) and (port is None or key[1] == port) \
+                        and (database is None or key[2] == database):
+                    del self._entries[key]
+
+
+# 进程内共享的快照缓存，供 Flask 路由与批量校验使用
+live_snapshots = SnapshotCache()
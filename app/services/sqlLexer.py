@@ -0,0 +1,367 @@
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# 语句区间 (start, end)，end 为分隔符起始位置（不含分隔符）
+Span = Tuple[int, int]
+
+# 完整的字符串/标识符（展开循环写法，未闭合时回溯为线性）；
+# 重复次数有上限，防止超长字符串撑大正则引擎的回溯栈
+_QUOTED = (r"'[^'\\]*(?:(?:\\.|'')[^'\\]*){0,1024}'"
+           r'|"[^"\\]*(?:(?:\\.|"")[^"\\]*){0,1024}"'
+           r"|`[^`]*(?:``[^`]*){0,1024}`")
+_COMMENT_OR_QUOTE = re.compile(
+    r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`)"""
+    r"""|(?:\s|--(?=\s)[^\n]*|#[^\n]*|/\*.*?\*/)+""",
+    re.DOTALL
+)
+
+
+class _Syntax:
+    """同一套词法记号分别对应 str 与 bytes 两种文本类型，bytes 版本可直接扫描 mmap"""
+
+    def __init__(self, kind: type):
+        self.kind = kind
+        self.empty = self.literal('')
+        self.hash = self.literal('#')
+        self.dash = self.literal('--')
+        self.block_open = self.literal('/*')
+        self.block_close = self.literal('*/')
+        self.newline = self.literal('\n')
+        self.quotes = tuple(self.literal(q) for q in ("'", '"', '`'))
+        self.partial_comments = tuple(self.literal(t) for t in ('-', '--', '/'))
+        self.delimiter_word = self.literal('DELIMITER ')
+        self.leading_space = re.compile(self.literal(r'\s*'))
+        self.delimiter_prefix = re.compile(self.literal(r'DELIMITER[ \t]'), re.IGNORECASE)
+        self.delimiter_command = re.compile(self.literal(r'DELIMITER[ \t]+(\S+)'), re.IGNORECASE)
+        self.quoted = self.literal(_QUOTED)
+        # 标识符字符；bytes 下把非ASCII字节都视为标识符的一部分，与 str 的 \w 保持一致
+        self.word_char = r'[\w$]' if kind is str else r'[\w$\x80-\xff]'
+
+    def literal(self, text: str):
+        return text if self.kind is str else text.encode('ascii')
+
+    def unique(self, chars):
+        """去重并排序，用于拼接正则字符类"""
+        if self.kind is str:
+            return ''.join(sorted(set(chars)))
+        return bytes(sorted(set(chars)))
+
+
+_SYNTAX = {str: _Syntax(str), bytes: _Syntax(bytes)}
+
+
+class SQLLexer:
+    """
+    单遍扫描SQL文本，以 (start, end) 区间的形式产出语句
+
+    - 正确跳过单/双引号字符串（支持 \\' 与 '' 转义）和反引号标识符
+    - 识别 --、# 与 /* */ 注释，语句起始处的注释不计入区间
+    - 支持客户端 DELIMITER 命令切换分隔符
+    - 既可一次性扫描完整文本(split)，也可逐块喂入(feed)
+    - 指定 keywords 时只产出以这些关键字开头的语句，其余语句（如大段 INSERT）
+      直接扫描到分隔符跳过，不切片也不保留在缓冲区中
+    - binary=True 时直接扫描 bytes/mmap，区间为字节偏移
+    """
+
+    def __init__(self, delimiter: str = ';', keywords: Optional[Sequence[str]] = None,
+                 binary: bool = False):
+        self._syntax = _SYNTAX[bytes if binary else str]
+        self._set_delimiter(self._syntax.literal(delimiter))
+        self._buffer = self._syntax.empty
+        self._offset = 0
+        self._pos = 0
+        self._start = None
+        self._skipping = False
+        if keywords:
+            pattern = r'(?:%s)(?!%s)' % ('|'.join(re.escape(k) for k in keywords), self._syntax.word_char)
+            self._keywords = re.compile(self._syntax.literal(pattern), re.IGNORECASE)
+            self._keyword_width = max(len(k) for k in keywords) + 1
+        else:
+            self._keywords = None
+
+    @property
+    def delimiter(self):
+        return self._delimiter
+
+    @property
+    def position(self) -> int:
+        """split 结束时的扫描位置（在 stop 处停止时为下一条语句之前的位置）"""
+        return self._pos
+
+    @property
+    def buffered(self) -> int:
+        """当前缓冲区中尚未结束的语句长度"""
+        return len(self._buffer)
+
+    def split(self, text, start: int = 0, stop: Optional[int] = None) -> Iterator[Span]:
+        """
+        一次性扫描完整文本（str，binary 模式下为 bytes/mmap），产出每条语句的区间
+
+        Args:
+            start: 从该位置开始扫描（须位于语句之间）
+            stop: 扫描位置到达 stop 且处于语句之间时停止；跨越 stop 的语句会完整扫描完
+        """
+        self._pos = start
+        self._start = None
+        self._skipping = False
+        yield from self._scan(text, final=True, stop=stop)
+
+    def feed(self, chunk, final: bool = False) -> Iterator[Tuple[int, int, str]]:
+        """
+        喂入一块文本，产出 (start, end, statement)，偏移量相对于整个输入流
+        缓冲区只保留当前未结束的语句
+        """
+        buffer = self._buffer + chunk if self._buffer else chunk
+        offset = self._offset
+        for start, end in self._scan(buffer, final):
+            yield offset + start, offset + end, buffer[start:end]
+
+        # 被跳过的语句无需保留，只保留尚未扫描的部分
+        keep = self._pos if self._start is None or self._skipping else self._start
+        self._buffer = buffer[keep:]
+        self._offset = offset + keep
+        self._pos -= keep
+        if self._start is not None:
+            self._start = max(self._start - keep, 0)
+
+    def close(self) -> Iterator[Tuple[int, int, str]]:
+        """输入结束，产出最后一条（可能没有分隔符结尾的）语句"""
+        yield from self.feed(self._syntax.empty, final=True)
+
+    def _set_delimiter(self, delimiter):
+        syntax = self._syntax
+        self._delimiter = delimiter
+        self._special = re.compile(syntax.literal(r"""['"`#]|--(?=\s)|/\*|""") + re.escape(delimiter))
+        # 一次匹配吞掉一段不含分隔符/注释的普通文本与完整字符串，
+        # 只有遇到特殊记号时才回到Python循环；同样限制单次重复次数
+        excluded = re.escape(syntax.unique(syntax.literal(";'\"`#/-") + delimiter[:1]))
+        self._plain = re.compile(
+            syntax.literal(r"(?:[^%s]+|%s|-(?=[^-]|-\S)|/(?=[^*])){0,1024}") % (excluded, syntax.quoted),
+            re.DOTALL
+        )
+        # 块末尾需要保留的字符数，避免截断分隔符或注释起始符
+        self._holdback = max(len(delimiter) - 1, 2)
+
+    def _scan(self, text, final: bool, stop: Optional[int] = None) -> Iterator[Span]:
+        length = len(text)
+        pos = self._pos
+
+        while True:
+            if self._start is None:
+                if stop is not None and pos >= stop:
+                    break
+                pos = self._syntax.leading_space.match(text, pos).end()
+                if pos >= length:
+                    break
+                skipped = self._skip_comment(text, pos, final)
+                if skipped is None:
+                    break
+                if skipped != pos:
+                    pos = skipped
+                    continue
+                command = self._match_delimiter_command(text, pos, final)
+                if command is None:
+                    break
+                if command != pos:
+                    pos = command
+                    continue
+                if self._keywords is not None:
+                    head = text[pos:pos + self._keyword_width]
+                    if not final and len(head) < self._keyword_width:
+                        break
+                    self._skipping = not self._keywords.match(head)
+                self._start = pos
+
+            pos = self._skip_plain(text, pos, length if final else length - self._holdback)
+            match = self._special.search(text, pos)
+            if not match:
+                if final:
+                    if not self._skipping:
+                        end = len(text[self._start:].rstrip()) + self._start
+                        if end > self._start:
+                            yield self._start, end
+                    self._start = None
+                    pos = length
+                else:
+                    pos = max(pos, length - self._holdback)
+                break
+
+            token = match.group()
+            at = match.start()
+
+            if token == self._delimiter:
+                if at > self._start and not self._skipping:
+                    yield self._start, at
+                self._start = None
+                pos = match.end()
+            elif token in self._syntax.quotes:
+                end = find_quoted_end(text, at, final)
+                if end == -1:
+                    if not final:
+                        pos = at
+                        break
+                    end = length
+                pos = end
+            else:
+                end = self._comment_end(text, token, match.end())
+                if end == -1:
+                    if not final:
+                        pos = at
+                        break
+                    end = length
+                pos = end
+
+        self._pos = pos
+
+    def _skip_plain(self, text, pos: int, endpos: int) -> int:
+        while pos < endpos:
+            end = self._plain.match(text, pos, endpos).end()
+            if end == pos:
+                break
+            pos = end
+        return pos
+
+    def _skip_comment(self, text, pos: int, final: bool) -> Optional[int]:
+        """语句起始处的注释：返回注释结束位置；不是注释返回 pos；数据不足返回 None"""
+        syntax = self._syntax
+        head = text[pos:pos + 3]
+        if head[:1] == syntax.hash:
+            token = syntax.hash
+        elif head[:2] == syntax.block_open:
+            token = syntax.block_open
+        elif head[:2] == syntax.dash and head[2:3].isspace():
+            token = syntax.dash
+        else:
+            token = None
+        if token:
+            end = self._comment_end(text, token, pos + len(token))
+            if end == -1:
+                return len(text) if final else None
+            return end
+        if not final and len(head) < 3 and head in syntax.partial_comments:
+            return None
+        return pos
+
+    def _match_delimiter_command(self, text, pos: int, final: bool) -> Optional[int]:
+        """DELIMITER 命令：切换分隔符并返回该行结束位置；不是命令返回 pos；数据不足返回 None"""
+        syntax = self._syntax
+        head = text[pos:pos + 10]
+        if not final and len(head) < 10 and syntax.delimiter_word.startswith(head.upper()):
+            return None
+        if not syntax.delimiter_prefix.match(head):
+            return pos
+        line_end = text.find(syntax.newline, pos)
+        if line_end == -1:
+            if not final:
+                return None
+            line_end = len(text)
+        command = syntax.delimiter_command.match(text, pos, line_end)
+        if command:
+            self._set_delimiter(command.group(1))
+        return line_end
+
+    def _comment_end(self, text, token, pos: int) -> int:
+        syntax = self._syntax
+        if token == syntax.block_open:
+            end = text.find(syntax.block_close, pos)
+            return -1 if end == -1 else end + 2
+        end = text.find(syntax.newline, pos)
+        return -1 if end == -1 else end
+
+
+def find_quoted_end(text, pos: int, final: bool = True) -> int:
+    """
+    从 text[pos] 处的引号开始，返回字符串/标识符结束后的位置（text 可为 str/bytes/mmap）
+    未闭合时返回 -1（非 final 时末尾的引号也可能是 '' 转义的一半，同样返回 -1）
+    """
+    quote = text[pos:pos + 1]
+    syntax = _SYNTAX[type(quote)]
+    length = len(text)
+    i = pos + 1
+    close = text.find(quote, i)
+
+    while close != -1:
+        if quote != syntax.quotes[2]:
+            backslash = text.find(syntax.literal('\\'), i, close)
+            if backslash != -1:
+                i = backslash + 2
+                if i > close:
+                    close = text.find(quote, i)
+                continue
+        if close + 1 < length and text[close + 1:close + 2] == quote:
+            i = close + 2
+            close = text.find(quote, i)
+            continue
+        if close + 1 == length and not final:
+            return -1
+        return close + 1
+
+    return -1
+
+
+_PAREN_OR_QUOTE = re.compile(r"""[()'"`]""")
+
+
+def find_paren_end(text: str, pos: int) -> int:
+    """从 text[pos] 处的左括号开始，返回与之匹配的右括号之后的位置，跳过引号内的括号；未闭合时返回 -1"""
+    depth = 0
+    while True:
+        match = _PAREN_OR_QUOTE.search(text, pos)
+        if not match:
+            return -1
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        else:
+            end = find_quoted_end(text, match.start())
+            if end == -1:
+                return -1
+            pos = end
+            continue
+        pos = match.end()
+
+
+def split_top_level(text: str, separator: str = ',') -> List[str]:
+    """按顶层（不在括号和引号内）的分隔符切分文本"""
+    parts = []
+    start = 0
+    depth = 0
+    pos = 0
+    special = re.compile(r"""[()'"`]|""" + re.escape(separator))
+
+    while True:
+        match = special.search(text, pos)
+        if not match:
+            break
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == separator:
+            if depth == 0:
+                parts.append(text[start:match.start()].strip())
+                start = match.end()
+        else:
+            end = find_quoted_end(text, match.start())
+            if end == -1:
+                break
+            pos = end
+            continue
+        pos = match.end()
+
+    tail = text[start:].strip()
+    if tail:
+        parts.append(tail)
+    return parts
+
+
+def normalize_statement(statement: str) -> str:
+    """去除语句中的注释并压缩空白，字符串与标识符内容保持不变"""
+    def replace(match):
+        return match.group(1) or ' '
+    return _COMMENT_OR_QUOTE.sub(replace, statement).strip()
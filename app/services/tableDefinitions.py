@@ -0,0 +1,290 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# 读取实际表定义的批量查询，{condition} 为按库（及表名）限定的条件，见 table_condition
+LIVE_DEFINITION_QUERIES = {
+    'columns': (
+        "SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, IS_NULLABLE, COLUMN_DEFAULT, EXTRA "
+        "FROM information_schema.COLUMNS WHERE {condition}"
+    ),
+    'statistics': (
+        "SELECT TABLE_SCHEMA, TABLE_NAME, INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME, INDEX_TYPE "
+        "FROM information_schema.STATISTICS WHERE {condition} "
+        "ORDER BY TABLE_SCHEMA, TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX"
+    ),
+    'foreign_keys': (
+        "SELECT TABLE_SCHEMA, TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_SCHEMA, "
+        "REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE ({condition}) AND REFERENCED_TABLE_NAME IS NOT NULL "
+        "ORDER BY TABLE_SCHEMA, TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION"
+    ),
+    'tables': (
+        "SELECT t.TABLE_SCHEMA, t.TABLE_NAME, t.ENGINE, c.CHARACTER_SET_NAME "
+        "FROM information_schema.TABLES t "
+        "LEFT JOIN information_schema.COLLATION_CHARACTER_SET_APPLICABILITY c "
+        "ON c.COLLATION_NAME = t.TABLE_COLLATION WHERE {condition}"
+    ),
+}
+
+# 表定义的按库聚合指纹，与 snapshotCache.FINGERPRINT_QUERIES 的格式相同；
+# 只增删索引或修改可空、默认值时表的 CREATE_TIME 不一定变化，校验表定义时与结构指纹一起判断结果是否仍然有效
+DEFINITION_FINGERPRINT_QUERIES = (
+    "SELECT s.SCHEMA_NAME AS TABLE_SCHEMA, COUNT(i.INDEX_NAME) AS object_count, NULL AS changed, "
+    "SUM(CRC32(CONCAT_WS(' ', i.TABLE_NAME, i.INDEX_NAME, i.SEQ_IN_INDEX, i.COLUMN_NAME, i.NON_UNIQUE))) AS checksum "
+    "FROM information_schema.SCHEMATA s "
+    "LEFT JOIN information_schema.STATISTICS i ON i.TABLE_SCHEMA = s.SCHEMA_NAME "
+    "WHERE s.SCHEMA_NAME IN ({placeholders}) GROUP BY s.SCHEMA_NAME",
+    "SELECT s.SCHEMA_NAME AS TABLE_SCHEMA, COUNT(c.COLUMN_NAME) AS object_count, NULL AS changed, "
+    "SUM(CRC32(CONCAT_WS(' ', c.TABLE_NAME, c.COLUMN_NAME, c.IS_NULLABLE, c.COLUMN_DEFAULT, c.EXTRA))) AS checksum "
+    "FROM information_schema.SCHEMATA s "
+    "LEFT JOIN information_schema.COLUMNS c ON c.TABLE_SCHEMA = s.SCHEMA_NAME "
+    "WHERE s.SCHEMA_NAME IN ({placeholders}) GROUP BY s.SCHEMA_NAME",
+)
+
+# 定义差异的种类 -> 报告中的名称；缺失的索引计入 missing_indexes，其余差异计入 mismatched_definitions
+DEFINITION_KINDS = {
+    'index': '索引',
+    'primary_key': '主键',
+    'foreign_key': '外键',
+    'nullable': '可空',
+    'default': '默认值',
+    'auto_increment': '自增',
+    'engine': '存储引擎',
+    'charset': '字符集',
+}
+
+_NUMBER = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$')
+_NOW = re.compile(r'(?:CURRENT_TIMESTAMP|NOW|LOCALTIME|LOCALTIMESTAMP)(?:\(\s*(\d*)\s*\))?$', re.IGNORECASE)
+
+
+def new_definition() -> Dict:
+    """
+    表定义（字段类型之外的 DDL 信息），与 {database: {table: {column: type}}} 结构并列保存为 {database: {table: 表定义}}：
+
+        {
+            'columns': {字段: {'nullable': bool, 'default': 默认值文本或 None, 'auto_increment': bool}},
+            'primary_key': [字段, ...],                  # 没有主键时为空列表
+            'indexes': {索引名: {'columns': [字段, ...], 'unique': bool, 'type': 'BTREE' | 'FULLTEXT' | 'SPATIAL'}},
+            'foreign_keys': {约束名: {'columns': [...], 'ref_database': 库或 None(同库), 'ref_table': 表,
+                                      'ref_columns': [...]}},
+            'engine': 存储引擎或 None,
+            'charset': 表的默认字符集或 None,
+        }
+
+    索引、外键的字段按定义顺序保存；函数索引的表达式部分记为 None。
+    默认值与 information_schema.COLUMNS.COLUMN_DEFAULT 的写法一致：字符串不带引号，NULL 为 None
+    """
+    return {'columns': {}, 'primary_key': [], 'indexes': {}, 'foreign_keys': {}, 'engine': None, 'charset': None}
+
+
+def normalize_default(value: Optional[str]) -> Optional[str]:
+    """DDL 中的 DEFAULT 值转为 COLUMN_DEFAULT 的写法：去掉字符串引号，CURRENT_TIMESTAMP 的同义写法统一"""
+    if value is None or value.upper() == 'NULL':
+        return None
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        quote = value[0]
+        return value[1:-1].replace(quote * 2, quote).replace('\\' + quote, quote).replace('\\\\', '\\')
+    if value.upper() in ('TRUE', 'FALSE'):
+        return '1' if value.upper() == 'TRUE' else '0'
+    now = _NOW.match(value)
+    if now:
+        return f"CURRENT_TIMESTAMP({now.group(1)})" if now.group(1) and now.group(1) != '0' else 'CURRENT_TIMESTAMP'
+    if value.startswith('(') and value.endswith(')'):
+        # 8.0 的表达式默认值
+        return value[1:-1].strip()
+    return value
+
+
+def defaults_match(expected: Optional[str], actual: Optional[str]) -> bool:
+    """比较默认值：数值按数值比较（0 与 0.00），CURRENT_TIMESTAMP 的各种写法视为一致"""
+    if expected is None or actual is None:
+        return expected is actual
+    if expected == actual:
+        return True
+    if _NUMBER.match(expected) and _NUMBER.match(actual):
+        return float(expected) == float(actual)
+    if _NOW.match(expected) and _NOW.match(actual):
+        return normalize_default(expected) == normalize_default(actual)
+    return False
+
+
+def normalize_charset(charset: Optional[str]) -> Optional[str]:
+    """字符集名小写，utf8 统一为 MySQL 8.0 中的 utf8mb3"""
+    if not charset:
+        return None
+    charset = charset.lower()
+    return 'utf8mb3' if charset == 'utf8' else charset
+
+
+def table_condition(batch: List[str], tables: Dict[str, List[str]], alias: str = '') -> Tuple[str, List]:
+    """按库、表名限定的查询条件：每个库只列出 tables 中的表"""
+    prefix = f"{alias}." if alias else ''
+    condition = ' OR '.join(
+        f"({prefix}TABLE_SCHEMA = %s AND {prefix}TABLE_NAME IN ({', '.join(['%s'] * len(tables[db]))}))"
+        for db in batch
+    )
+    return condition, [arg for db in batch for arg in (db, *tables[db])]
+
+
+def definition_queries(batch: List[str], tables: Dict[str, List[str]]) -> Dict[str, Tuple[str, List]]:
+    """一批库的表定义查询 {查询名: (SQL, 参数)}，结果交给 fold_live_definitions"""
+    queries = {}
+    for name, template in LIVE_DEFINITION_QUERIES.items():
+        condition, args = table_condition(batch, tables, 't' if name == 'tables' else '')
+        queries[name] = (template.format(condition=condition), args)
+    return queries
+
+
+def fold_live_definitions(rows: Dict[str, List[Dict]], definitions: Optional[Dict] = None) -> Dict:
+    """
+    把 definition_queries 各查询的结果行合并为 {database: {table: 表定义}}，
+    传入 definitions 时合并到其中（按批查询时逐批累积）
+    """
+    definitions = {} if definitions is None else definitions
+
+    def table(row: Dict) -> Dict:
+        tables = definitions.setdefault(row['TABLE_SCHEMA'], {})
+        definition = tables.get(row['TABLE_NAME'])
+        if definition is None:
+            definition = tables[row['TABLE_NAME']] = new_definition()
+        return definition
+
+    for row in rows.get('tables', ()):
+        definition = table(row)
+        definition['engine'] = row['ENGINE']
+        definition['charset'] = row['CHARACTER_SET_NAME']
+    for row in rows.get('columns', ()):
+        table(row)['columns'][row['COLUMN_NAME']] = {
+            'nullable': row['IS_NULLABLE'] == 'YES',
+            'default': row['COLUMN_DEFAULT'],
+            'auto_increment': 'auto_increment' in (row['EXTRA'] or '').lower(),
+        }
+    for row in rows.get('statistics', ()):
+        definition = table(row)
+        if row['INDEX_NAME'] == 'PRIMARY':
+            definition['primary_key'].append(row['COLUMN_NAME'])
+            continue
+        index = definition['indexes'].setdefault(row['INDEX_NAME'], {
+            'columns': [], 'unique': not int(row['NON_UNIQUE']), 'type': _index_type(row['INDEX_TYPE'])
+        })
+        index['columns'].append(row['COLUMN_NAME'])
+    for row in rows.get('foreign_keys', ()):
+        foreign_key = table(row)['foreign_keys'].setdefault(row['CONSTRAINT_NAME'], {
+            'columns': [], 'ref_database': row['REFERENCED_TABLE_SCHEMA'],
+            'ref_table': row['REFERENCED_TABLE_NAME'], 'ref_columns': []
+        })
+        foreign_key['columns'].append(row['COLUMN_NAME'])
+        foreign_key['ref_columns'].append(row['REFERENCED_COLUMN_NAME'])
+    return definitions
+
+
+def _index_type(index_type: Optional[str]) -> str:
+    # InnoDB 忽略 USING HASH，按 BTREE 比较
+    index_type = (index_type or 'BTREE').upper()
+    return index_type if index_type in ('FULLTEXT', 'SPATIAL') else 'BTREE'
+
+
+def _find_by_name(items: Dict, name: str) -> Optional[Dict]:
+    """索引、约束名不区分大小写"""
+    if name in items:
+        return items[name]
+    lowered = name.lower()
+    return next((item for key, item in items.items() if key.lower() == lowered), None)
+
+
+def _fold_names(names: List) -> List:
+    """字段名不区分大小写，比较前统一转为小写"""
+    return [name.lower() if isinstance(name, str) else name for name in names]
+
+
+def _fold_index(index: Dict) -> Dict:
+    return {**index, 'columns': _fold_names(index['columns'])}
+
+
+def _fold_foreign_key(foreign_key: Dict) -> Dict:
+    return {**foreign_key, 'columns': _fold_names(foreign_key['columns']),
+            'ref_columns': _fold_names(foreign_key['ref_columns'])}
+
+
+def compare_definitions(db_name: str, table_name: str, expected: Dict, actual: Dict,
+                        columns: Optional[Dict] = None) -> List[Tuple]:
+    """
+    比较一张表的预期与实际定义，返回差异列表 [(库, 表, 种类, 名称, 状态, 预期, 实际)]，
+    状态为 missing（索引、主键、外键不存在）或 mismatch；实际中多出的索引、外键不算差异。
+    索引、外键先按名称匹配，找不到时按定义匹配（自动命名的索引名称不同但定义一致时视为存在）。
+    字段名（主键、索引、外键中的字段与字段属性）与 MySQL 一样不区分大小写。
+    columns 为两边都存在的字段，只比较这些字段的属性
+    """
+    issues = []
+
+    def issue(kind, name, status, expected_value, actual_value):
+        issues.append((db_name, table_name, kind, name, status, expected_value, actual_value))
+
+    expected_key = expected.get('primary_key') or []
+    actual_key = actual.get('primary_key') or []
+    if expected_key and _fold_names(expected_key) != _fold_names(actual_key):
+        issue('primary_key', 'PRIMARY', 'mismatch' if actual_key else 'missing', expected_key, actual_key or None)
+
+    actual_indexes = actual.get('indexes', {})
+    for name, index in expected.get('indexes', {}).items():
+        folded = _fold_index(index)
+        found = _find_by_name(actual_indexes, name)
+        if found is None:
+            found = next((item for item in actual_indexes.values() if _fold_index(item) == folded), None)
+            if found is None:
+                issue('index', name, 'missing', index, None)
+                continue
+        if _fold_index(found) != folded:
+            issue('index', name, 'mismatch', index, found)
+
+    actual_keys = actual.get('foreign_keys', {})
+    for name, foreign_key in expected.get('foreign_keys', {}).items():
+        expected_fk = {**foreign_key, 'ref_database': foreign_key.get('ref_database') or db_name}
+        folded = _fold_foreign_key(expected_fk)
+        found = _find_by_name(actual_keys, name)
+        if found is None:
+            found = next((item for item in actual_keys.values() if _fold_foreign_key(item) == folded), None)
+            if found is None:
+                issue('foreign_key', name, 'missing', expected_fk, None)
+                continue
+        if _fold_foreign_key(found) != folded:
+            issue('foreign_key', name, 'mismatch', expected_fk, found)
+
+    actual_columns = {name.lower(): live for name, live in actual.get('columns', {}).items()}
+    compared = None if columns is None else {name.lower() for name in columns}
+    for column_name, attributes in expected.get('columns', {}).items():
+        live = actual_columns.get(column_name.lower())
+        if live is None or (compared is not None and column_name.lower() not in compared):
+            continue
+        if attributes['nullable'] != live['nullable']:
+            issue('nullable', column_name, 'mismatch', attributes['nullable'], live['nullable'])
+        if not defaults_match(attributes['default'], live['default']):
+            issue('default', column_name, 'mismatch', attributes['default'], live['default'])
+        if attributes['auto_increment'] != live['auto_increment']:
+            issue('auto_increment', column_name, 'mismatch', attributes['auto_increment'], live['auto_increment'])
+
+    if expected.get('engine') and (expected['engine'].lower() != (actual.get('engine') or '').lower()):
+        issue('engine', table_name, 'mismatch', expected['engine'], actual.get('engine'))
+    if expected.get('charset') and normalize_charset(expected['charset']) != normalize_charset(actual.get('charset')):
+        issue('charset', table_name, 'mismatch', expected['charset'], actual.get('charset'))
+    return issues
+
+
+def format_definition_value(kind: str, value) -> str:
+    """报告中显示的定义值"""
+    if value is None:
+        return '-'
+    if kind == 'primary_key':
+        return f"({', '.join(value)})"
+    if kind == 'index':
+        text = f"({', '.join(str(column) for column in value['columns'])})"
+        if value['type'] != 'BTREE':
+            text = f"{value['type']} {text}"
+        return f"UNIQUE {text}" if value['unique'] else text
+    if kind == 'foreign_key':
+        return (f"({', '.join(value['columns'])}) → {value['ref_database']}.{value['ref_table']}"
+                f"({', '.join(value['ref_columns'])})")
+    if isinstance(value, bool):
+        return 'YES' if value else 'NO'
+    return str(value)
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Config 在导入时读取 DATABASE_URL，测试使用临时数据库，不写 instance/app.db
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}"
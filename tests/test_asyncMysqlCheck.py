@@ -0,0 +1,141 @@
+import asyncio
+from functools import partial
+import pymysql
+from app.services.asyncMysqlCheck import AsyncDatabaseValidator
+from app.services.mysqlCheck import SUMMARY_KEYS, DatabaseValidator, validate_fleet
+
+LIVE = {
+    'shop': {f"t{index}": {'id': 'int(11)', 'name': 'varchar(32)'} for index in range(20)},
+    'hr': {'emp': {'id': 'bigint', 'salary': 'decimal(10,2)'}},
+}
+EXPECTED = {
+    'shop': {**{f"t{index}": {'id': 'int', 'name': 'varchar(32)'} for index in range(20)},
+             't_missing': {'id': 'int'}},
+    'hr': {'emp': {'id': 'int', 'salary': 'decimal(10,2)', 'dept': 'int'}},
+    'gone': {'x': {'id': 'int'}},
+}
+
+
+def rows(sql, args):
+    """information_schema 替身：SCHEMATA 按库名过滤，COLUMNS 按库名与表名过滤"""
+    if 'SCHEMATA' in sql:
+        return [{'SCHEMA_NAME': db} for db in args if db in LIVE]
+    names = set(args or ())
+    by_table = 'TABLE_NAME' in sql.split('WHERE')[1].split('ORDER BY')[0]
+    return [{'TABLE_SCHEMA': db, 'TABLE_NAME': table, 'COLUMN_NAME': column, 'COLUMN_TYPE': column_type}
+            for db, tables in LIVE.items() if db in names
+            for table, columns in tables.items() if not by_table or table in names
+            for column, column_type in columns.items()]
+
+
+class FakeCursor:
+    """同步校验器的游标：批量模式查询 information_schema，逐表模式为 SHOW DATABASES/USE/SHOW TABLES/DESCRIBE"""
+
+    def __init__(self):
+        self.result = []
+        self.database = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, args=None):
+        if sql == 'SHOW DATABASES':
+            self.result = [{'Database': db} for db in LIVE]
+        elif sql.startswith('USE '):
+            self.database = sql[5:-1]
+        elif sql == 'SHOW TABLES':
+            self.result = [{'Tables_in': table} for table in LIVE[self.database]]
+        elif sql.startswith('DESCRIBE '):
+            columns = LIVE[self.database][sql[10:-1]]
+            self.result = [{'Field': column, 'Type': column_type} for column, column_type in columns.items()]
+        else:
+            self.result = rows(sql, args)
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    open = True
+
+    def cursor(self):
+        return FakeCursor()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeAsyncConnection:
+    """每次查询让出事件循环，记录同时进行中的查询数"""
+
+    in_flight = 0
+    max_in_flight = 0
+    connections = 0
+
+    @classmethod
+    async def connect(cls, params):
+        cls.connections += 1
+        return cls()
+
+    async def fetchall(self, sql, args=None):
+        cls = type(self)
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return rows(sql, args)
+        finally:
+            cls.in_flight -= 1
+
+    async def close(self):
+        pass
+
+
+def _config(tmp_path):
+    config_file = tmp_path / 'db.yaml'
+    config_file.write_text("databases:\n  a:\n    host: h\n    port: 3306\n    username: u\n    password: p\n",
+                           encoding='utf-8')
+    return str(config_file)
+
+
+def test_per_table_checks_are_pipelined(tmp_path):
+    FakeAsyncConnection.max_in_flight = FakeAsyncConnection.connections = 0
+    validator = AsyncDatabaseValidator(host='h', username='u', password='p', max_connections=4,
+                                       connect=FakeAsyncConnection.connect)
+
+    result = asyncio.run(validator.validate_schema(EXPECTED, str(tmp_path / 'report.md'), bulk=False))
+
+    assert FakeAsyncConnection.max_in_flight == 4
+    assert FakeAsyncConnection.connections == 4
+    assert result['tables'] == 22 and result['missing_tables'] == 1
+
+
+def test_async_fleet_matches_thread_fleet(tmp_path, monkeypatch):
+    monkeypatch.setattr(pymysql, 'connect', lambda **kwargs: FakeConnection())
+    config_file = _config(tmp_path)
+    results = {}
+    for name, validator_class in (('thread', DatabaseValidator),
+                                  ('async', partial(AsyncDatabaseValidator, connect=FakeAsyncConnection.connect))):
+        for bulk in (True, False):
+            output_dir = tmp_path / f"{name}-{bulk}"
+            fleet = validate_fleet(EXPECTED, config_file=config_file, output_dir=str(output_dir), bulk=bulk,
+                                   snapshot_cache=None, validator_class=validator_class)
+            host = fleet['hosts'][0]
+            report = (output_dir / 'database_validation_a.md').read_text(encoding='utf-8').splitlines()
+            # 去掉含校验时间的行
+            results[name, bulk] = ({key: host[key] for key in SUMMARY_KEYS}, host['passed'],
+                                   [line for line in report if '校验时间' not in line])
+
+    assert results['thread', True][0] == {
+        'databases': 3, 'missing_databases': 1, 'tables': 22, 'missing_tables': 1, 'columns': 43,
+        'missing_columns': 1, 'mismatched_columns': 1, 'missing_indexes': 0, 'mismatched_definitions': 0,
+        'errors': 0,
+    }
+    assert results['async', True] == results['thread', True]
+    assert results['async', False] == results['thread', False]
@@ -0,0 +1,80 @@
+import json
+import pymysql
+import app.services.checkCtl as checkCtl
+from app.services.resultCache import check_results
+
+
+class FakeServer:
+    """information_schema 替身：指纹为各库结构的校验和，结构随 live 变化"""
+
+    def __init__(self, live):
+        self.live = live
+
+    def rows(self, sql, args):
+        if 'CRC32' in sql:
+            return [{'TABLE_SCHEMA': db, 'object_count': len(self.live[db]), 'changed': None,
+                     'checksum': json.dumps(self.live[db], sort_keys=True)} for db in args if db in self.live]
+        if 'COLUMNS' in sql:
+            return [{'TABLE_SCHEMA': db, 'TABLE_NAME': table, 'COLUMN_NAME': column, 'COLUMN_TYPE': column_type}
+                    for db in self.live if db in args
+                    for table, columns in self.live[db].items() for column, column_type in columns.items()]
+        return [{'SCHEMA_NAME': db} for db in args if db in self.live]
+
+
+class FakeCursor:
+    def __init__(self, server):
+        self.server = server
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, args=None):
+        self.result = self.server.rows(sql, args)
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    open = True
+
+    def __init__(self, server):
+        self.server = server
+
+    def cursor(self):
+        return FakeCursor(self.server)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_sqlcheck_revalidates_snapshot_after_live_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'app' / 'config').mkdir(parents=True)
+    (tmp_path / 'app' / 'config' / 'database_config.yaml').write_text(
+        'databases:\n  default:\n    host: h\n    port: 3306\n    username: u\n    password: p\n')
+    (tmp_path / 'app' / 'output').mkdir()
+    (tmp_path / 'app' / 'output' / 'shop.json').write_text(json.dumps({'shop': {'t': {'id': 'int', 'name': 'varchar(10)'}}}))
+
+    server = FakeServer({'shop': {'t': {'id': 'int'}}})
+    monkeypatch.setattr(pymysql, 'connect', lambda **kwargs: FakeConnection(server))
+    checkCtl.live_snapshots.invalidate()
+    check_results.invalidate()
+
+    first = checkCtl.sqlCheck('shop.json')
+    assert first['cache'] == 'miss' and first['passed'] is False
+
+    # 快照仍在有效期内，实际结构补上了缺失的字段
+    server.live['shop']['t']['name'] = 'varchar(10)'
+    second = checkCtl.sqlCheck('shop.json')
+    assert second['cache'] == 'miss' and second['passed'] is True
+
+    third = checkCtl.sqlCheck('shop.json')
+    assert third['cache'] == 'hit' and third['passed'] is True
@@ -0,0 +1,121 @@
+import pytest
+import app.services.connectionPool as connectionPool
+from app.services.connectionPool import ConnectionPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.open = True
+        self.closed = False
+        self.pings = 0
+        self.broken = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.broken:
+            raise ConnectionError('gone away')
+
+    def close(self):
+        self.closed = True
+        self.open = False
+
+
+@pytest.fixture
+def created(monkeypatch):
+    connections = []
+
+    def connect(**params):
+        connections.append(FakeConnection(len(connections)))
+        return connections[-1]
+
+    monkeypatch.setattr(connectionPool.pymysql, 'connect', connect)
+    return connections
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(connectionPool, 'time', clock)
+    return clock
+
+
+def test_checkout_and_return_reuses_connection(created, clock):
+    pool = ConnectionPool({'host': 'h', 'port': 3306}, max_size=2)
+
+    first = pool.acquire()
+    assert pool.stats() == {'idle': 0, 'borrowed': 1, 'max_size': 2}
+    pool.release(first)
+    assert pool.stats() == {'idle': 1, 'borrowed': 0, 'max_size': 2}
+
+    assert pool.acquire() is first
+    assert first.pings == 1 and len(created) == 1
+    second = pool.acquire()
+    assert second is not first and len(created) == 2
+
+
+def test_broken_connections_are_discarded(created, clock):
+    pool = ConnectionPool({'host': 'h', 'port': 3306})
+
+    # 归还时已断开
+    connection = pool.acquire()
+    connection.open = False
+    pool.release(connection)
+    assert connection.closed and pool.stats()['idle'] == 0
+
+    # 借出前 ping 失败
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.broken = True
+    replacement = pool.acquire()
+    assert connection.closed and replacement is not connection
+
+    # with 块中出现异常
+    with pytest.raises(RuntimeError):
+        with pool.connection() as used:
+            raise RuntimeError('query failed')
+    assert used.closed and pool.stats() == {'idle': 0, 'borrowed': 1, 'max_size': 8}
+
+
+def test_idle_connections_expire(created, clock):
+    pool = ConnectionPool({'host': 'h', 'port': 3306}, idle_timeout=300)
+    connection = pool.acquire()
+    pool.release(connection)
+
+    clock.now += 299
+    assert pool.acquire() is connection
+    pool.release(connection)
+
+    clock.now += 301
+    fresh = pool.acquire()
+    assert connection.closed and fresh is not connection
+
+
+def test_acquire_waits_then_times_out(created):
+    pool = ConnectionPool({'host': 'h', 'port': 3306}, max_size=1, acquire_timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    assert pool.stats()['borrowed'] == 1
+
+
+def test_failed_connect_returns_slot(monkeypatch):
+    def refuse(**params):
+        raise ConnectionError('refused')
+
+    monkeypatch.setattr(connectionPool.pymysql, 'connect', refuse)
+    pool = ConnectionPool({'host': 'h', 'port': 3306}, max_size=1)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            pool.acquire()
+    assert pool.stats()['borrowed'] == 0
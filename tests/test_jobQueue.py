@@ -0,0 +1,115 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from app.models import db, Job
+from app.services.jobQueue import JobQueue, QueueFullError
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'jobs.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def wait_finished(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_submit_and_status(app):
+    def stub(params, progress):
+        progress(50, 'half')
+        if params.get('fail'):
+            raise RuntimeError('boom')
+        return {'echo': params['value']}
+
+    queue = JobQueue(app, {'stub': stub}, max_workers=1)
+    try:
+        job = wait_finished(queue, queue.submit('stub', {'value': 1}))
+        assert job['status'] == 'succeeded' and job['progress'] == 100
+        assert job['result'] == {'echo': 1}
+        assert job['owner'] == queue.owner
+
+        failed = wait_finished(queue, queue.submit('stub', {'fail': True}))
+        assert failed['status'] == 'failed' and failed['error'] == 'boom'
+
+        assert queue.get('missing') is None
+        with pytest.raises(ValueError):
+            queue.submit('unknown')
+    finally:
+        queue.shutdown()
+
+
+def test_queue_full(app):
+    release = threading.Event()
+    queue = JobQueue(app, {'stub': lambda params, progress: release.wait(5)}, max_workers=1, max_pending=1)
+    try:
+        job_id = queue.submit('stub')
+        with pytest.raises(QueueFullError):
+            queue.submit('stub')
+        release.set()
+        assert wait_finished(queue, job_id)['status'] == 'succeeded'
+        queue.submit('stub')
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_heartbeat_renews_running_jobs(app):
+    release = threading.Event()
+    queue = JobQueue(app, {'stub': lambda params, progress: release.wait(5)}, max_workers=1,
+                     heartbeat_interval=0.05)
+    try:
+        job_id = queue.submit('stub')
+        first = queue.get(job_id)['heartbeat_at']
+        time.sleep(0.3)
+        assert queue.get(job_id)['heartbeat_at'] > first
+        release.set()
+        assert wait_finished(queue, job_id)['status'] == 'succeeded'
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_recover_only_dead_or_expired_owners(app):
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    hostname = socket.gethostname()
+    now = datetime.utcnow()
+    stale = now - timedelta(hours=1)
+    owners = {
+        'alive': (f"{hostname}:{os.getppid()}", now),
+        'dead': (f"{hostname}:{dead.pid}", now),
+        'remote': ('other-host:1', now),
+        'remote_expired': ('other-host:1', stale),
+        'alive_expired': (f"{hostname}:{os.getppid()}", stale),
+        'legacy': (None, None),
+    }
+    with app.app_context():
+        for job_id, (owner, heartbeat_at) in owners.items():
+            db.session.add(Job(id=job_id, kind='stub', status='running', owner=owner, heartbeat_at=heartbeat_at))
+        db.session.add(Job(id='done', kind='stub', status='succeeded', owner=owner))
+        db.session.commit()
+
+    queue = JobQueue(app, {'stub': lambda params, progress: None}, lease=60)
+    try:
+        statuses = {job_id: queue.get(job_id)['status'] for job_id in [*owners, 'done']}
+    finally:
+        queue.shutdown()
+    assert statuses == {'alive': 'running', 'dead': 'failed', 'remote': 'running', 'remote_expired': 'failed',
+                        'alive_expired': 'failed', 'legacy': 'failed', 'done': 'succeeded'}
@@ -0,0 +1,117 @@
+import threading
+import time
+import app.services.mysqlCheck as mysqlCheck
+from app.services.mysqlCheck import BULK_SCHEMA_BATCH, SUMMARY_KEYS, DatabaseValidator, validate_fleet
+
+
+class FakeCursor:
+    """按 information_schema 查询返回每个库一张表 t(id int)"""
+
+    def __init__(self, queries):
+        self.queries = queries
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, args=None):
+        self.queries.append(sql)
+        if 'SCHEMATA' in sql:
+            self.rows = [{'SCHEMA_NAME': name} for name in args]
+        else:
+            databases = [arg for arg in args if arg.startswith('db')]
+            self.rows = [{'TABLE_SCHEMA': db, 'TABLE_NAME': 't', 'COLUMN_NAME': 'id', 'COLUMN_TYPE': 'int'}
+                         for db in databases]
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    open = True
+
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self.queries)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+def _validator(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(mysqlCheck.pymysql, 'connect', lambda **kwargs: connection)
+    validator = DatabaseValidator(host='h', username='u', password='p', use_pool=False)
+    assert validator.connect()
+    return validator, connection
+
+
+def test_fetch_live_schema_scoped_tables_across_batches(monkeypatch):
+    validator, connection = _validator(monkeypatch)
+    db_names = [f"db{index}" for index in range(BULK_SCHEMA_BATCH + 50)]
+
+    live_schema = validator.fetch_live_schema(db_names, {db: ['t'] for db in db_names})
+
+    assert list(live_schema) == db_names
+    assert all(live_schema[db] == {'t': {'id': 'int'}} for db in db_names)
+    # 每批库查询一次 SCHEMATA 与 COLUMNS
+    assert len(connection.queries) == 4
+
+
+def test_fetch_live_schema_whole_databases_across_batches(monkeypatch):
+    validator, _ = _validator(monkeypatch)
+    db_names = [f"db{index}" for index in range(BULK_SCHEMA_BATCH + 50)]
+
+    live_schema = validator.fetch_live_schema(db_names)
+
+    assert len(live_schema) == len(db_names)
+    assert live_schema[db_names[-1]] == {'t': {'id': 'int'}}
+
+
+class SlowValidator:
+    """按别名决定校验耗时的校验器替身"""
+
+    release = threading.Event()
+
+    def __init__(self, db_alias, progress=None, **kwargs):
+        self.alias = db_alias
+        self.progress = progress
+
+    def validate_schema(self, schema_dict, output_file, **kwargs):
+        if self.alias == 'slow':
+            self.release.wait(5)
+        return {'host': self.alias, 'port': 3306, 'output': output_file, 'outputs': {'md': output_file},
+                'passed': True, 'error': None, **dict.fromkeys(SUMMARY_KEYS, 0)}
+
+
+def test_validate_fleet_marks_slow_host_as_timeout(tmp_path):
+    config_file = tmp_path / 'db.yaml'
+    config_file.write_text(
+        "databases:\n" + ''.join(f"  {alias}:\n    host: {alias}-host\n    port: 3306\n"
+                                 f"    username: u\n    password: p\n" for alias in ('fast', 'slow')),
+        encoding='utf-8'
+    )
+    events = []
+    started = time.perf_counter()
+    try:
+        result = validate_fleet({'db': {'t': {'id': 'int'}}}, config_file=str(config_file),
+                                output_dir=str(tmp_path), validator_class=SlowValidator, host_deadline=0.2,
+                                progress=events.append)
+    finally:
+        SlowValidator.release.set()
+
+    assert time.perf_counter() - started < 2
+    assert result['failed'] == ['slow'] and result['timed_out'] == ['slow']
+    slow = result['hosts'][1]
+    assert slow['timed_out'] and slow['host'] == 'slow-host' and not slow['passed']
+    assert [event['alias'] for event in events if event['stage'] == 'host_done'] == ['fast', 'slow']
+    report = (tmp_path / 'database_validation_fleet.md').read_text(encoding='utf-8')
+    assert '| slow | slow-host:3306 | ⏱️ 超时' in report
@@ -0,0 +1,35 @@
+from app.services.mysqlParser import MySQLSchemaParser
+
+CREATE = "USE shop;\nCREATE TABLE t (a int, b int DEFAULT 1);\n"
+ALTERS = "ALTER TABLE t ALTER b SET DEFAULT 5;\nALTER TABLE t ADD PRIMARY KEY (a);\n"
+
+
+def test_incremental_reparse_after_deleting_alters(tmp_path):
+    sql_file = tmp_path / 'migration.sql'
+    sql_file.write_text(CREATE + ALTERS)
+    parser = MySQLSchemaParser()
+    _, statement_index = parser.parse_sql_file_incremental(str(sql_file))
+    columns = parser.table_definitions['shop']['t']['columns']
+    assert columns['b']['default'] == '5' and columns['a']['nullable'] is False
+
+    # 删除 ALTER 后增量解析复用 CREATE TABLE 的事件，结果应与完整解析一致
+    sql_file.write_text(CREATE)
+    incremental = MySQLSchemaParser()
+    schema, _ = incremental.parse_sql_file_incremental(str(sql_file), statement_index)
+    full = MySQLSchemaParser()
+    assert schema == full.parse_sql_file(str(sql_file))
+    assert incremental.table_definitions == full.table_definitions
+    columns = incremental.table_definitions['shop']['t']['columns']
+    assert columns['b']['default'] == '1' and columns['a']['nullable'] is True
+    assert incremental.table_definitions['shop']['t']['primary_key'] == []
+
+
+def test_alter_chain_replay():
+    parser = MySQLSchemaParser()
+    parser.apply_events([
+        parser._statement_event("CREATE TABLE shop.users (id int PRIMARY KEY, name varchar(50), KEY idx_name (name))"),
+        parser._statement_event("ALTER TABLE shop.users ADD COLUMN age int AFTER id, CHANGE name full_name varchar(80)"),
+        parser._statement_event("RENAME TABLE shop.users TO shop.members"),
+    ])
+    assert parser.schema_dict == {'shop': {'members': {'id': 'INT', 'age': 'INT', 'full_name': 'VARCHAR(80)'}}}
+    assert parser.table_definitions['shop']['members']['indexes']['idx_name']['columns'] == ['full_name']
@@ -0,0 +1,93 @@
+import json
+import xml.etree.ElementTree as ElementTree
+from app.services.reportWriters import report_paths, write_reports
+from app.services.schemaDiff import diff_schemas
+
+EXPECTED = {
+    'shop': {
+        'ok_table': {'id': 'int'},
+        'a<b&"c"': {'id': 'int', 'name': 'varchar(8)', 'gone': 'int'},
+        'missing': {'id': 'int'},
+        'broken': {'id': 'int'},
+    },
+    'absent': {'t': {'id': 'int'}},
+}
+ACTUAL = {
+    'shop': {
+        'ok_table': {'id': 'int'},
+        'a<b&"c"': {'id': 'int', 'name': 'varchar(16)', 'extra': 'int'},
+        'broken': {'id': 'int'},
+        'extra_table': {'id': 'int'},
+    },
+}
+DEFINITIONS = {'shop': {'ok_table': {'primary_key': ['id'], 'indexes': {}, 'foreign_keys': {}, 'columns': {}}}}
+LIVE_DEFINITIONS = {'shop': {'ok_table': {'primary_key': [], 'indexes': {}, 'foreign_keys': {}, 'columns': {}}}}
+META = {'time': '2024-01-01 00:00:00', 'host': 'h', 'port': 3306, 'username': 'u'}
+
+
+def write(tmp_path, summary_only=False, definitions=False):
+    diff = diff_schemas(EXPECTED, ACTUAL, {('shop', 'broken'): 'denied <x>'},
+                        definitions=DEFINITIONS if definitions else None,
+                        live_definitions=LIVE_DEFINITIONS if definitions else None)
+    outputs = report_paths(str(tmp_path / 'report.md'), ['md', 'jsonl', 'junit'])
+    write_reports(diff, META, outputs, summary_only=summary_only)
+    return {fmt: open(path, encoding='utf-8').read() for fmt, path in outputs.items()}
+
+
+def test_junit_counts_and_escaping(tmp_path):
+    root = ElementTree.fromstring(write(tmp_path, definitions=True)['junit'].encode('utf-8'))
+
+    assert (root.get('tests'), root.get('failures'), root.get('errors')) == ('5', '4', '1')
+    shop, absent = root.findall('testsuite')
+    assert (shop.get('tests'), shop.get('failures'), shop.get('errors')) == ('4', '3', '1')
+    assert absent.find('testcase/failure').get('message') == '数据库不存在'
+
+    cases = {case.get('name'): case for case in shop.findall('testcase')}
+    assert list(cases) == ['ok_table', 'a<b&"c"', 'missing', 'broken']
+    failure = cases['a<b&"c"'].find('failure')
+    assert failure.get('message') == '2 个字段不一致'
+    assert 'varchar(8)' in failure.text and 'gone' in failure.text
+    assert cases['ok_table'].find('failure').get('message') == '1 处表定义不一致'
+    assert cases['missing'].find('failure').get('message') == '表不存在'
+    assert cases['broken'].find('error').get('message') == 'denied <x>'
+
+
+def test_jsonl_line_schema(tmp_path):
+    records = [json.loads(line) for line in write(tmp_path, definitions=True)['jsonl'].splitlines()]
+    keys = {
+        'run': {'type', 'time', 'host', 'port', 'username'},
+        'database': {'type', 'database', 'status', 'error'},
+        'table': {'type', 'database', 'table', 'status', 'error'},
+        'column': {'type', 'database', 'table', 'column', 'expected', 'actual', 'status'},
+        'definition': {'type', 'database', 'table', 'kind', 'name', 'expected', 'actual', 'status'},
+    }
+
+    assert records[0]['type'] == 'run' and records[-1]['type'] == 'summary'
+    for record in records[:-1]:
+        assert set(record) == keys[record['type']]
+    assert records[-1]['passed'] is False and records[-1]['missing_columns'] == 1
+    statuses = {(record['type'], record.get('table'), record.get('column')): record['status']
+                for record in records[1:-1]}
+    assert statuses['column', 'a<b&"c"', 'name'] == 'mismatch'
+    assert statuses['column', 'a<b&"c"', 'extra'] == 'extra'
+    assert statuses['table', 'extra_table', None] == 'extra'
+    assert statuses['definition', 'ok_table', None] == 'missing'
+
+
+def test_summary_only_filters_passing_objects(tmp_path):
+    reports = write(tmp_path, summary_only=True)
+
+    records = [json.loads(line) for line in reports['jsonl'].splitlines()]
+    assert all(record['status'] != 'ok' for record in records if 'status' in record)
+    assert ('column', 'id') not in {(record['type'], record.get('column')) for record in records
+                                    if record.get('table') == 'a<b&"c"'}
+
+    markdown = reports['md']
+    assert "| 库 | 缺失库 | 表 | 缺失表 | 字段 | 缺失字段 | 类型不匹配 | 出错 |\n" in markdown
+    assert "| 2 | 1 | 4 | 1 | 4 | 1 | 1 | 1 |\n" in markdown
+    assert 'ok_table' not in markdown and '`id`' not in markdown.split('a<b&"c"')[1].split('###')[0]
+    assert '### 表: missing ❌' in markdown and '### 表: broken ❌' in markdown
+
+    with_definitions = write(tmp_path, summary_only=True, definitions=True)['md']
+    assert "| 缺失索引 | 定义不一致 | 出错 |" in with_definitions
+    assert '### 表: ok_table ✅' in with_definitions
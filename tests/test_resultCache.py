@@ -0,0 +1,121 @@
+import threading
+import time
+import pytest
+import app.services.resultCache as resultCache
+from app.services.resultCache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resultCache, 'time', clock)
+    return clock
+
+
+def test_ttl(clock):
+    cache = ResultCache(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or {'value': len(calls)}
+
+    assert cache.get_or_compute('k', compute) == {'value': 1, 'cache': 'miss'}
+    clock.now += 59
+    assert cache.get_or_compute('k', compute) == {'value': 1, 'cache': 'hit'}
+    clock.now += 1
+    assert cache.get_or_compute('k', compute) == {'value': 2, 'cache': 'miss'}
+    assert cache.stats == {'hits': 1, 'coalesced': 0, 'misses': 2}
+
+
+def test_lru_eviction(clock):
+    cache = ResultCache(ttl=60, max_entries=2)
+    for key in ('a', 'b'):
+        cache.get_or_compute(key, lambda: {'key': key})
+    # 访问 a 后 b 成为最久未使用的
+    assert cache.get_or_compute('a', dict)['cache'] == 'hit'
+    cache.get_or_compute('c', lambda: {'key': 'c'})
+
+    assert cache.get_or_compute('a', dict)['cache'] == 'hit'
+    assert cache.get_or_compute('c', dict)['cache'] == 'hit'
+    assert cache.get_or_compute('b', dict)['cache'] == 'miss'
+
+
+def test_uncacheable_and_failed_results_are_not_kept(clock):
+    cache = ResultCache()
+    assert cache.get_or_compute('k', lambda: {'error': 'x'}, cacheable=lambda r: r['error'] is None)['cache'] == 'miss'
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute('k', fail)
+    assert cache.get_or_compute('k', lambda: {'error': None})['cache'] == 'miss'
+
+
+def test_concurrent_requests_share_one_computation(clock):
+    cache = ResultCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'value': 42}
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    owner.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(4)]
+    for waiter in waiters:
+        waiter.start()
+    # 等待者都已登记到同一个 Future 上再放行
+    while cache.stats['coalesced'] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [owner, *waiters]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(result['cache'] for result in results) == ['coalesced'] * 4 + ['miss']
+    assert all(result['value'] == 42 for result in results)
+
+
+def test_waiters_get_the_same_exception(clock):
+    cache = ResultCache()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('down')
+
+    def request():
+        try:
+            cache.get_or_compute('k', compute)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=request))
+    threads[1].start()
+    while cache.stats['coalesced'] < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2 and errors[0] is errors[1]
@@ -0,0 +1,53 @@
+import time
+import pytest
+from app import create_app
+
+
+@pytest.fixture
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize('path', ['/sqlcheck/missing.json', '/sqlcheck/fleet/missing.json'])
+@pytest.mark.parametrize('query', ['', '?async=1'])
+def test_missing_file_returns_404_without_job(client, path, query):
+    response = client.get(path + query)
+    assert response.status_code == 404
+    assert 'job_id' not in response.get_json()
+
+
+def test_missing_snapshot_returns_404(client):
+    response = client.get('/sqlcheck/2.json?snapshot=missing.json')
+    assert response.status_code == 404
+
+
+def test_sync_by_default_and_async_opt_in(client, monkeypatch):
+    monkeypatch.setattr('app.routes.sqlprase', lambda: {'files': 0})
+    monkeypatch.setitem(client.application.extensions['job_queue'].handlers, 'sqlprase',
+                        lambda params, progress: {'files': 0})
+    response = client.get('/sqlprase')
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'success', 'files': 0}
+
+    response = client.get('/sqlprase?async=1')
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    # 等任务结束再恢复处理函数
+    deadline = time.monotonic() + 5
+    while client.get(f'/jobs/{job_id}').get_json()['status'] not in ('succeeded', 'failed'):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert client.get(f'/jobs/{job_id}').get_json()['result'] == {'files': 0}
+    assert client.get('/jobs/missing').status_code == 404
+
+
+def test_async_queue_full_returns_503(client):
+    client.application.extensions['job_queue'].max_pending = 0
+    response = client.get('/sqlprase?async=1')
+    assert response.status_code == 503
+    assert 'job_id' not in response.get_json()
+
+
+def test_fleet_rejects_unknown_engine(client):
+    response = client.get('/sqlcheck/fleet/2.json?engine=bogus')
+    assert response.status_code == 400
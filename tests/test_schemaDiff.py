@@ -0,0 +1,16 @@
+from app.services.schemaDiff import diff_schemas
+
+
+def test_diff_follows_schema_order():
+    names = [f"db{index}" for index in range(30)]
+    expected = {db: {'t': {'a': 'int', 'b': 'int'}} for db in names}
+    actual = {db: {'t': {'a': 'bigint', 'z': 'int', 'y': 'int'}, 'x2': {}, 'x1': {}} for db in reversed(names)}
+    databases = []
+
+    diff = diff_schemas(expected, actual, progress=lambda **counts: databases.append(len(databases)))
+
+    assert [item[0] for item in diff.mismatched_columns] == names
+    assert [item[0] for item in diff.missing_columns] == names
+    assert diff.extra_tables[:2] == [('db0', 'x2'), ('db0', 'x1')]
+    assert diff.extra_columns[:2] == [('db0', 't', 'z'), ('db0', 't', 'y')]
+    assert len(databases) == len(names)
@@ -0,0 +1,73 @@
+import json
+import threading
+from app.services.schemaModel import ColumnType, SchemaModel, Table, compact_schema, load_schema_model
+
+
+SCHEMA = {
+    'shop': {
+        'orders': {'id': 'INT(11)', 'amount': 'DECIMAL(10,2)', 'status': "ENUM('a','b,c')"},
+        'users': {'id': 'bigint unsigned', 'name': 'varchar(64)'},
+    },
+    'empty': {},
+}
+
+
+def test_dict_model_dict_round_trip(tmp_path):
+    model = SchemaModel.from_dict(SCHEMA)
+
+    assert model.to_dict() == SCHEMA
+    assert list(model.to_dict()['shop']['orders']) == ['id', 'amount', 'status']
+
+    schema_file = tmp_path / 'schema.json'
+    schema_file.write_text(json.dumps(SCHEMA), encoding='utf-8')
+    assert load_schema_model(str(schema_file)).to_dict() == SCHEMA
+
+
+def test_table_is_read_only_mapping():
+    table = compact_schema(SCHEMA)['shop']['orders']
+
+    assert isinstance(table, Table)
+    assert dict(table) == SCHEMA['shop']['orders']
+    assert table['amount'] == 'DECIMAL(10,2)'
+    assert table.get('missing') is None
+    assert 'id' in table and 'missing' not in table
+    assert table.keys() - {'id'} == {'amount', 'status'}
+    try:
+        table['missing']
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('missing column should raise KeyError')
+
+
+def test_compact_schema_reuses_tables():
+    model = SchemaModel.from_dict(SCHEMA)
+    databases = compact_schema(model)
+
+    assert databases is model.databases
+    assert compact_schema(databases) is databases
+    assert SchemaModel.from_dict(databases).databases['shop']['users'] is databases['shop']['users']
+
+
+def test_intern_shares_whitespace_variants_across_threads():
+    text = "decimal(18,  4)   unsigned"
+    barrier = threading.Barrier(8)
+    results = []
+
+    def intern():
+        barrier.wait()
+        results.append(ColumnType.intern(text))
+
+    threads = [threading.Thread(target=intern) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    registered = len(ColumnType._registry)
+    column_type = ColumnType.intern("decimal(18, 4) unsigned")
+    assert all(result is column_type for result in results)
+    assert column_type.text == "decimal(18, 4) unsigned"
+    assert ColumnType.from_id(column_type.type_id) is column_type
+    assert ColumnType.intern("enum('a  b')") is not ColumnType.intern("enum('a b')")
+    assert len(ColumnType._registry) == registered + 2
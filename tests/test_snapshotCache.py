@@ -0,0 +1,41 @@
+import threading
+from app.services.snapshotCache import SnapshotCache
+
+
+def test_concurrent_reads_keep_stats_consistent():
+    cache = SnapshotCache(ttl=0)
+    fingerprints = lambda names, sql: {name: 1 for name in names}
+    schema = lambda names: {name: {'t': {'id': 'int'}} for name in names}
+    db_names = ['a', 'b', 'c']
+    barrier = threading.Barrier(8)
+
+    def read():
+        barrier.wait()
+        for _ in range(200):
+            assert cache.get_schema('h', 3306, db_names, fingerprints, schema) == schema(db_names)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats
+    # 每个库的每次读取恰好计数一次：命中（其他线程刚刚刷新）、按指纹续期或重新读取
+    assert stats['hits'] + stats['revalidated'] + stats['fetched'] == 8 * 200 * len(db_names)
+    assert stats['revalidated'] > 0
+
+
+def test_expire_forces_fingerprint_check():
+    cache = SnapshotCache(ttl=300)
+    calls = []
+    fingerprints = lambda names, sql: calls.append(list(names)) or {name: 1 for name in names}
+    schema = lambda names: {name: {'t': {'id': 'int'}} for name in names}
+
+    cache.get_schema('h', 3306, ['a', 'b'], fingerprints, schema)
+    cache.get_schema('h', 3306, ['a', 'b'], fingerprints, schema)
+    cache.expire('h', 3306, ['a'])
+    cache.get_schema('h', 3306, ['a', 'b'], fingerprints, schema)
+
+    assert calls == [['a', 'b'], ['a']]
+    assert cache.stats == {'hits': 3, 'revalidated': 1, 'fetched': 2}
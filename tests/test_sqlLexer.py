@@ -0,0 +1,101 @@
+import mmap
+import pytest
+from app.services.sqlLexer import SQLLexer, find_quoted_end, normalize_statement, split_top_level
+
+SQL = """-- 建表脚本
+# mysql 风格注释
+/* 块注释; 含分号 */
+CREATE TABLE `a;b` (id INT COMMENT 'x;y', name VARCHAR(8) DEFAULT 'it''s; ok');
+INSERT INTO t VALUES ('a\\';b', "c"";d", '--not a comment;');
+SELECT 1 -- 行尾注释; 不结束语句
+, 2 # 另一种; 行尾注释
+;
+SELECT 3 /* 行内; */ + 4;
+DELIMITER $$
+CREATE PROCEDURE p() BEGIN SELECT 1; SELECT 2; END$$
+DELIMITER ;
+SELECT 'last'"""
+
+
+def statements(lexer, text):
+    return [text[start:end] for start, end in lexer.split(text)]
+
+
+def streamed(text, size, **options):
+    lexer = SQLLexer(**options)
+    result = []
+    for index in range(0, len(text), size):
+        result.extend(lexer.feed(text[index:index + size]))
+    result.extend(lexer.close())
+    return result
+
+
+def test_split_quotes_comments_and_delimiter():
+    assert statements(SQLLexer(), SQL) == [
+        "CREATE TABLE `a;b` (id INT COMMENT 'x;y', name VARCHAR(8) DEFAULT 'it''s; ok')",
+        "INSERT INTO t VALUES ('a\\';b', \"c\"\";d\", '--not a comment;')",
+        "SELECT 1 -- 行尾注释; 不结束语句\n, 2 # 另一种; 行尾注释\n",
+        "SELECT 3 /* 行内; */ + 4",
+        "CREATE PROCEDURE p() BEGIN SELECT 1; SELECT 2; END",
+        "SELECT 'last'",
+    ]
+
+
+def test_double_dash_without_space_is_not_comment():
+    assert statements(SQLLexer(), "SELECT 1--1;SELECT 2") == ["SELECT 1--1", "SELECT 2"]
+
+
+def test_keywords_skip_other_statements():
+    lexer = SQLLexer(keywords=['CREATE', 'DELIMITER'])
+    assert [text.split('(')[0] for text in statements(lexer, SQL)] == [
+        "CREATE TABLE `a;b` ", "CREATE PROCEDURE p",
+    ]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7, 16, 64])
+def test_streaming_matches_whole_text(size):
+    expected = [(start, end, SQL[start:end]) for start, end in SQLLexer().split(SQL)]
+    assert streamed(SQL, size) == expected
+
+
+@pytest.mark.parametrize('boundary', ["'it'", "DELIM", "--", "/", "$"])
+def test_chunk_boundary_inside_tokens(boundary):
+    at = SQL.index(boundary) + 1
+    lexer = SQLLexer()
+    result = list(lexer.feed(SQL[:at])) + list(lexer.feed(SQL[at:])) + list(lexer.close())
+    assert [item[2] for item in result] == statements(SQLLexer(), SQL)
+
+
+def test_feed_keeps_only_unfinished_statement():
+    lexer = SQLLexer(keywords=['CREATE'])
+    list(lexer.feed("INSERT INTO t VALUES " + "(1)," * 1000))
+    assert lexer.buffered < 10
+    assert [item[2] for item in lexer.feed("(2);CREATE TABLE x (id INT);")] == ["CREATE TABLE x (id INT)"]
+
+
+def test_binary_mode_on_bytes_and_mmap(tmp_path):
+    data = SQL.encode('utf-8')
+    expected = [statement.encode('utf-8') for statement in statements(SQLLexer(), SQL)]
+    assert [data[start:end] for start, end in SQLLexer(binary=True).split(data)] == expected
+
+    sql_file = tmp_path / 'schema.sql'
+    sql_file.write_bytes(data)
+    with open(sql_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        assert [mapped[start:end] for start, end in SQLLexer(binary=True).split(mapped)] == expected
+
+    assert [item[2] for item in streamed(data, 3, binary=True)] == expected
+
+
+def test_split_stop_resumes_between_statements():
+    lexer = SQLLexer()
+    first = list(lexer.split(SQL, stop=SQL.index('INSERT')))
+    rest = list(lexer.split(SQL, start=lexer.position))
+    assert first + rest == list(SQLLexer().split(SQL))
+
+
+def test_helpers():
+    text = "'a\\'b''c' rest"
+    assert find_quoted_end(text, 0) == text.index(' rest')
+    assert find_quoted_end("'open", 0) == -1
+    assert split_top_level("a, f(b, c), 'd,e'") == ['a', 'f(b, c)', "'d,e'"]
+    assert normalize_statement("SELECT  /* x */ '--  y'  -- z\n FROM t") == "SELECT '--  y' FROM t"
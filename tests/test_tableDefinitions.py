@@ -0,0 +1,33 @@
+from app.services.tableDefinitions import compare_definitions
+
+
+def definition(primary_key, index_columns, fk_columns, ref_columns, column, nullable=False):
+    return {
+        'primary_key': primary_key,
+        'indexes': {'idx_user': {'columns': index_columns, 'unique': False, 'type': 'BTREE'}},
+        'foreign_keys': {'fk_user': {'columns': fk_columns, 'ref_database': 'shop', 'ref_table': 'users',
+                                     'ref_columns': ref_columns}},
+        'columns': {column: {'nullable': nullable, 'default': None, 'auto_increment': False}},
+    }
+
+
+def test_column_names_match_case_insensitively():
+    expected = definition(['ID'], ['User_Id', 'Created'], ['User_Id'], ['ID'], 'User_Id')
+    actual = definition(['id'], ['user_id', 'created'], ['user_id'], ['id'], 'user_id')
+
+    assert compare_definitions('shop', 'orders', expected, actual, columns={'user_id': 'int'}) == []
+
+
+def test_case_insensitive_match_still_reports_real_differences():
+    expected = definition(['ID'], ['User_Id'], ['User_Id'], ['ID'], 'User_Id', nullable=True)
+    actual = definition(['id', 'tenant'], ['created'], ['tenant'], ['id'], 'user_id')
+    # 按名称找不到时按定义匹配，同样不区分大小写
+    actual['indexes'] = {'auto_1': {'columns': ['user_id'], 'unique': False, 'type': 'BTREE'}}
+
+    issues = compare_definitions('shop', 'orders', expected, actual)
+
+    assert [(kind, name, status) for _, _, kind, name, status, _, _ in issues] == [
+        ('primary_key', 'PRIMARY', 'mismatch'),
+        ('foreign_key', 'fk_user', 'mismatch'),
+        ('nullable', 'User_Id', 'mismatch'),
+    ]